@@ -1,30 +1,149 @@
-from django.contrib import admin
-from .models import Student, Course, AttendanceRecord, Tutor
+from functools import reduce
+from operator import or_
+
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.db.models import Count, Q
+from django.template.response import TemplateResponse
+from .models import Student, Course, AttendanceCounter, AttendanceRecord, Tutor
+from .pagination import CappedCountPaginator
+from .roster import WEEKS
+from .search import matching_ids, search
+
+
+class IndexedSearchMixin:
+    """Answer the changelist search box from the search index instead of icontains over search_fields."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search(queryset, search_term), False
+
+
+class ScalableChangeListMixin:
+    """Changelist settings for large tables: capped page counts and no second, unfiltered COUNT."""
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+
+class AttendanceRecordPaginator(CappedCountPaginator):
+    def unfiltered_count(self):
+        # Kept current on every write, so the unfiltered total is one row read
+        return AttendanceCounter.current().total
+
+
+class WeekFilter(admin.SimpleListFilter):
+    """Fixed week choices; the default filter would SELECT DISTINCT week over every record."""
+    title = 'week'
+    parameter_name = 'week'
+
+    def lookups(self, request, model_admin):
+        return [(week, f'Week {week}') for week in range(1, WEEKS + 1)]
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(week=self.value())
+        return queryset
 
 
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(IndexedSearchMixin, ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ('student_id', 'first_name', 'last_name', 'email', 'created_at')
     search_fields = ('student_id', 'first_name', 'last_name', 'email')
+    autocomplete_fields = ('courses',)
+    date_hierarchy = 'created_at'
     exclude = ('passport_data',)
 
 
 @admin.register(Tutor)
-class TutorAdmin(admin.ModelAdmin):
+class TutorAdmin(IndexedSearchMixin, ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ('tutor_id', 'first_name', 'last_name', 'email', 'created_at')
     search_fields = ('tutor_id', 'first_name', 'last_name', 'email')
-    filter_horizontal = ('courses',)
-    exclude = ('passport_data',) 
+    autocomplete_fields = ('courses',)
+    exclude = ('passport_data',)
 
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(IndexedSearchMixin, ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ('code', 'name')
     search_fields = ('code', 'name')
+    # The autocomplete view paginates this changelist queryset, so it needs an order
+    ordering = ('code',)
 
 
 @admin.register(AttendanceRecord)
-class AttendanceRecordAdmin(admin.ModelAdmin):
-    list_display = ('date', 'student', 'course', 'status')
-    list_filter = ('course', 'date', 'status')
-    search_fields = ('student__first_name', 'student__last_name', 'student__student_id')
\ No newline at end of file
+class AttendanceRecordAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ('date', 'student', 'course', 'semester', 'week', 'status')
+    list_select_related = ('student', 'course')
+    # Fixed choices or rows of the course table; none of them reads the attendance table
+    list_filter = ('semester', WeekFilter, 'status', 'course')
+    # created_at is indexed, so the drill-down reads MIN/MAX and date ranges from the index
+    date_hierarchy = 'created_at'
+    search_fields = ('student__first_name', 'student__last_name', 'student__student_id')
+    autocomplete_fields = ('student', 'course')
+    paginator = AttendanceRecordPaginator
+    actions = ['mark_present', 'mark_absent', 'mark_excused', 'delete_records', 'delete_weeks']
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(student__in=matching_ids(Student, search_term)), False
+
+    def get_actions(self, request):
+        # Replaced by delete_records, whose confirmation page does not list every row
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def _mark(self, request, queryset, status):
+        # One UPDATE; AttendanceRecordQuerySet.update() keeps the derived tables in step
+        updated = queryset.update(status=status)
+        label = dict(AttendanceRecord.STATUS_CHOICES)[status]
+        self.message_user(request, f'{updated} record(s) marked {label}.', messages.SUCCESS)
+
+    @admin.action(description='Mark selected records Present', permissions=['change'])
+    def mark_present(self, request, queryset):
+        self._mark(request, queryset, AttendanceRecord.STATUS_PRESENT)
+
+    @admin.action(description='Mark selected records Absent', permissions=['change'])
+    def mark_absent(self, request, queryset):
+        self._mark(request, queryset, AttendanceRecord.STATUS_ABSENT)
+
+    @admin.action(description='Mark selected records Excused', permissions=['change'])
+    def mark_excused(self, request, queryset):
+        self._mark(request, queryset, AttendanceRecord.STATUS_EXCUSED)
+
+    @admin.action(description='Delete selected records', permissions=['delete'])
+    def delete_records(self, request, queryset):
+        return self._confirm_delete(request, queryset, 'delete_records', 'Delete selected attendance records')
+
+    @admin.action(description='Delete every record in the weeks of the selected records', permissions=['delete'])
+    def delete_weeks(self, request, queryset):
+        weeks = queryset.order_by().values_list('course', 'semester', 'week').distinct()
+        records = AttendanceRecord.objects.filter(reduce(or_, (
+            Q(course=course, semester=semester, week=week) for course, semester, week in weeks
+        ), Q(pk__in=[])))
+        return self._confirm_delete(request, records, 'delete_weeks', 'Delete whole weeks of attendance')
+
+    def _confirm_delete(self, request, records, action, title):
+        """Summarise records per course and week; delete them in one statement once confirmed."""
+        if request.POST.get('post') == 'yes':
+            deleted, _ = records.delete()
+            self.message_user(request, f'Deleted {deleted} attendance record(s).', messages.SUCCESS)
+            return None
+        summary = list(
+            records.order_by('course__code', 'semester', 'week')
+            .values('course__code', 'semester', 'week')
+            .annotate(records=Count('pk'))
+        )
+        return TemplateResponse(request, 'admin/attendance_records/attendancerecord/delete_records_confirmation.html', {
+            **self.admin_site.each_context(request),
+            'title': title,
+            'opts': self.model._meta,
+            'action': action,
+            'summary': summary,
+            'total': sum(row['records'] for row in summary),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
@@ -0,0 +1,281 @@
+"""Vectorised attendance analytics for a whole semester.
+
+Answers questions like "which students missed more than 25% of their
+sessions in any course" without instantiating a single model. Records are
+streamed as (id, student, course, week, status) tuples from one values_list
+query, fetched in keyset chunks of `chunk_size` rows, and folded into NumPy
+arrays holding three week bitmasks (present, absent, excused) per
+(student, course) pair. Because the unique constraint allows one record per
+pair and week, a bitmask is exact, and everything else is derived from it:
+
+- counts are popcounts of the masks;
+- the longest run of consecutive absent weeks is the number of
+  `mask &= mask >> 1` steps it takes to clear the absent mask;
+- student, course and tutor rates are bincounts over the pair arrays.
+
+Memory therefore grows with the number of enrolled pairs (24 bytes each) plus
+one chunk, not with the number of records, so a 10M-record semester costs the
+same as a 100k-record one with the same enrollments.
+"""
+
+import numpy as np
+from django.db.models import Count, Max
+
+from .models import AttendanceRecord, Course, Student, Tutor
+
+CHUNK_SIZE = 50_000
+# Weeks are stored as bits of a uint64; records outside 1..MAX_WEEK are ignored
+MAX_WEEK = 52
+
+PRESENT, ABSENT, EXCUSED = range(3)
+STATUS_INDEX = {
+    AttendanceRecord.STATUS_PRESENT: PRESENT,
+    AttendanceRecord.STATUS_ABSENT: ABSENT,
+    AttendanceRecord.STATUS_EXCUSED: EXCUSED,
+}
+
+
+def latest_semester():
+    return AttendanceRecord.objects.aggregate(latest=Max('semester'))['latest'] or 1
+
+
+def _rate(part, total):
+    """Element-wise percentage rounded to 2 places, 0 where total is 0."""
+    part = np.asarray(part, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    rate = np.divide(part * 100, total, out=np.zeros_like(part), where=total > 0)
+    return np.round(rate, 2)
+
+
+def _longest_run(masks):
+    """Length of the longest run of consecutive set bits in each mask."""
+    masks = masks.copy()
+    runs = np.zeros(masks.shape, dtype=np.int64)
+    while masks.any():
+        runs += masks != 0
+        masks &= masks >> np.uint64(1)
+    return runs
+
+
+class _PairMasks:
+    """Sorted (student, course) pair keys with their three week bitmasks."""
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.masks = np.zeros((3, 0), dtype=np.uint64)
+
+    def positions(self, keys):
+        """Index of each key in the state, adding unseen pairs first."""
+        unique, inverse = np.unique(keys, return_inverse=True)
+        found = np.searchsorted(self.keys, unique)
+        known = found < self.keys.size
+        known[known] = self.keys[found[known]] == unique[known]
+        if not known.all():
+            added = unique[~known]
+            keys = np.concatenate([self.keys, added])
+            order = np.argsort(keys, kind='stable')
+            self.keys = keys[order]
+            self.masks = np.concatenate(
+                [self.masks, np.zeros((3, added.size), dtype=np.uint64)], axis=1,
+            )[:, order]
+            found = np.searchsorted(self.keys, unique)
+        return found[inverse]
+
+    def add(self, students, courses, weeks, statuses):
+        positions = self.positions((students << 32) | courses)
+        # One record per pair and week, so summing distinct week bits is an OR
+        bits = np.ldexp(1.0, weeks - 1)
+        for status in (PRESENT, ABSENT, EXCUSED):
+            selected = statuses == status
+            if selected.any():
+                summed = np.bincount(positions[selected], weights=bits[selected], minlength=self.keys.size)
+                self.masks[status] |= summed.astype(np.uint64)
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.masks.nbytes
+
+
+class SemesterAnalytics:
+    """Per-pair counts and streaks for one semester, with rollups by student, course and tutor."""
+
+    def __init__(self, semester, records, pairs):
+        self.semester = semester
+        self.records = records
+        self.state_bytes = pairs.nbytes
+        self.students = pairs.keys >> 32
+        self.courses = pairs.keys & 0xFFFFFFFF
+        self.present, self.absent, self.excused = (np.bitwise_count(mask).astype(np.int64) for mask in pairs.masks)
+        self.marked = self.present + self.absent + self.excused
+        self.absence_streak = _longest_run(pairs.masks[ABSENT])
+
+    @classmethod
+    def load(cls, semester, course=None, chunk_size=CHUNK_SIZE):
+        records = AttendanceRecord.objects.filter(semester=semester, week__gte=1, week__lte=MAX_WEEK)
+        if course is not None:
+            records = records.filter(course=course)
+        rows = records.order_by('id').values_list('id', 'student_id', 'course_id', 'week', 'status')
+
+        pairs = _PairMasks()
+        total = 0
+        last_id = None
+        while True:
+            chunk = rows if last_id is None else rows.filter(id__gt=last_id)
+            batch = list(chunk[:chunk_size])
+            if not batch:
+                break
+            ids, students, courses, weeks, statuses = zip(*batch)
+            count = len(batch)
+            pairs.add(
+                np.fromiter(students, dtype=np.int64, count=count),
+                np.fromiter(courses, dtype=np.int64, count=count),
+                np.fromiter(weeks, dtype=np.int64, count=count),
+                np.fromiter((STATUS_INDEX[status] for status in statuses), dtype=np.int8, count=count),
+            )
+            total += count
+            last_id = ids[-1]
+            del batch, ids, students, courses, weeks, statuses
+            if count < chunk_size:
+                break
+        return cls(semester, total, pairs)
+
+    def _rollup(self, groups):
+        """Sum present/absent/excused/marked over pairs sharing a group id."""
+        ids, inverse = np.unique(groups, return_inverse=True)
+        sums = [
+            np.bincount(inverse, weights=values, minlength=ids.size).astype(np.int64)
+            for values in (self.present, self.absent, self.excused, self.marked)
+        ]
+        return ids, sums
+
+    def by_student(self):
+        return self._rollup(self.students)
+
+    def by_course(self):
+        return self._rollup(self.courses)
+
+    def by_tutor(self):
+        """Totals over each tutor's courses, from the tutor/course link table."""
+        links = np.array(
+            Tutor.courses.through.objects.values_list('tutor_id', 'course_id'), dtype=np.int64,
+        ).reshape(-1, 2)
+        course_ids, course_sums = self.by_course()
+        slot = np.searchsorted(course_ids, links[:, 1])
+        taught = slot < course_ids.size
+        taught[taught] = course_ids[slot[taught]] == links[taught, 1]
+        links, slot = links[taught], slot[taught]
+        tutor_ids, inverse = np.unique(links[:, 0], return_inverse=True)
+        sums = [
+            np.bincount(inverse, weights=values[slot], minlength=tutor_ids.size).astype(np.int64)
+            for values in course_sums
+        ]
+        return tutor_ids, sums
+
+    def breaches(self, threshold=25.0, streak=3):
+        """Pair positions whose absence rate exceeds `threshold` percent or whose absence streak reaches `streak`."""
+        absence_rate = _rate(self.absent, self.marked)
+        flagged = (absence_rate > threshold) | (self.absence_streak >= streak)
+        positions = np.flatnonzero(flagged)
+        # Worst first: highest absence rate, then longest streak
+        order = np.lexsort((-self.absence_streak[positions], -absence_rate[positions]))
+        return positions[order], absence_rate
+
+    def report(self, threshold=25.0, streak=3, limit=50):
+        """JSON-ready summary: overall, per course and tutor, lowest-rate students and at-risk pairs."""
+        present, absent, excused = int(self.present.sum()), int(self.absent.sum()), int(self.excused.sum())
+
+        course_ids, (c_present, c_absent, c_excused, c_marked) = self.by_course()
+        # Enrolled students come from the link table; a pair only exists once a record was marked
+        enrolled = dict(
+            Student.courses.through.objects.filter(course_id__in=course_ids.tolist())
+            .values('course_id').annotate(count=Count('student_id')).values_list('course_id', 'count')
+        )
+        with_records = np.bincount(np.unique(self.courses, return_inverse=True)[1], minlength=course_ids.size)
+        course_rates = _rate(c_present, c_marked)
+        course_info = Course.objects.in_bulk(course_ids.tolist())
+
+        tutor_ids, (t_present, t_absent, t_excused, t_marked) = self.by_tutor()
+        tutor_rates = _rate(t_present, t_marked)
+        tutor_info = Tutor.objects.in_bulk(tutor_ids.tolist())
+
+        student_ids, (s_present, s_absent, s_excused, s_marked) = self.by_student()
+        student_rates = _rate(s_present, s_marked)
+        lowest = np.lexsort((student_ids, student_rates))[:limit]
+
+        at_risk, absence_rate = self.breaches(threshold, streak)
+        shown = at_risk[:limit]
+        student_info = Student.objects.in_bulk(
+            sorted(set(student_ids[lowest].tolist()) | set(self.students[shown].tolist()))
+        )
+
+        def student_ref(pk):
+            student = student_info.get(pk)
+            return {
+                'id': pk,
+                'student_id': student.student_id if student else None,
+                'name': f'{student.first_name} {student.last_name}' if student else None,
+            }
+
+        return {
+            'semester': self.semester,
+            'records': self.records,
+            'threshold': threshold,
+            'streak': streak,
+            'overall': {
+                'present': present,
+                'absent': absent,
+                'excused': excused,
+                'attendance_rate': float(_rate(present, present + absent + excused)),
+            },
+            'courses': [
+                {
+                    'id': pk,
+                    'code': course_info[pk].code if pk in course_info else None,
+                    'students': enrolled.get(pk, 0),
+                    'students_with_records': int(with_records[i]),
+                    'present': int(c_present[i]),
+                    'absent': int(c_absent[i]),
+                    'excused': int(c_excused[i]),
+                    'attendance_rate': float(course_rates[i]),
+                }
+                for i, pk in enumerate(course_ids.tolist())
+            ],
+            'tutors': [
+                {
+                    'id': pk,
+                    'tutor_id': tutor_info[pk].tutor_id if pk in tutor_info else None,
+                    'name': f'{tutor_info[pk].first_name} {tutor_info[pk].last_name}' if pk in tutor_info else None,
+                    'present': int(t_present[i]),
+                    'absent': int(t_absent[i]),
+                    'excused': int(t_excused[i]),
+                    'attendance_rate': float(tutor_rates[i]),
+                }
+                for i, pk in enumerate(tutor_ids.tolist())
+            ],
+            'lowest_students': [
+                {
+                    **student_ref(int(student_ids[i])),
+                    'present': int(s_present[i]),
+                    'absent': int(s_absent[i]),
+                    'excused': int(s_excused[i]),
+                    'attendance_rate': float(student_rates[i]),
+                }
+                for i in lowest.tolist()
+            ],
+            'at_risk_total': int(at_risk.size),
+            'at_risk': [
+                {
+                    'student': student_ref(int(self.students[i])),
+                    'course': {
+                        'id': int(self.courses[i]),
+                        'code': course_info[int(self.courses[i])].code if int(self.courses[i]) in course_info else None,
+                    },
+                    'present': int(self.present[i]),
+                    'absent': int(self.absent[i]),
+                    'excused': int(self.excused[i]),
+                    'absence_rate': float(absence_rate[i]),
+                    'longest_absence_streak': int(self.absence_streak[i]),
+                }
+                for i in shown.tolist()
+            ],
+        }
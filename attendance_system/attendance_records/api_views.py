@@ -1,32 +1,81 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
-from .models import Student, Course, AttendanceRecord
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from django.views.decorators.gzip import gzip_page
+from .analytics import SemesterAnalytics, latest_semester
+from .autocomplete import lookup
+from .exports import EXPORT_FORMATS, iter_export
+from .fieldsets import SparseFieldsetMixin
+from .metrics import record_cache_lookup
+from .pagination import OptionalCursorPagination
+from .roster import SEMESTERS, get_roster
+from .models import Student, Course, AttendanceRecord, AttendanceCounter
+from .roles import ROLE_ADMIN, ROLE_TUTOR, get_user_role
+from .routers import replica_reads
+from .search import search
 from .serializers import (
     StudentSerializer,
     CourseSerializer,
     AttendanceRecordSerializer,
+    attendance_rows,
+    attendance_values,
+    simple_attendance_rows,
+    simple_attendance_values,
 )
 
 
-class StudentViewSet(viewsets.ReadOnlyModelViewSet):
+STATS_CACHE_KEY = 'attendance_records:api_stats'
+ANALYTICS_CACHE_KEY = 'attendance_records:analytics:{}:{}:{}:{}:{}'
+
+ROSTER_FORMATS = {
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class IsTutorOrAdmin(permissions.BasePermission):
+    def has_permission(self, request, view):
+        # Same cached role RoleMiddleware uses; request.user may come from
+        # BasicAuthentication, so resolve it here rather than reading user_role.
+        return get_user_role(request.user) in (ROLE_TUTOR, ROLE_ADMIN)
+
+
+@replica_reads
+class StudentViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    field_columns = {
+        'id': ('id',),
+        'student_id': ('student_id',),
+        'first_name': ('first_name',),
+        'last_name': ('last_name',),
+        'full_name': ('first_name', 'last_name'),
+        'email': ('email',),
+        'created_at': ('created_at',),
+        'total_records': (),
+        'attendance_percentage': (),
+    }
+    flat_fields = ('id', 'student_id', 'first_name', 'last_name', 'email', 'created_at')
     
     def get_queryset(self):
         queryset = Student.objects.all()
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(student_id__icontains=search) |
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search)
-            )
-        return queryset.order_by('last_name', 'first_name')
+        if self.fieldset.selects('total_records', 'attendance_percentage'):
+            queryset = queryset.with_attendance_stats()
+        search_query = self.request.query_params.get('search', None)
+        if search_query:
+            queryset = search(queryset, search_query).order_by('-search_rank', 'last_name', 'first_name')
+        else:
+            queryset = queryset.order_by('last_name', 'first_name')
+        return self.sparse_queryset(queryset, ordering=('created_at', 'id'))
     
     @action(detail=True, methods=['get'])
     def attendance(self, request, pk=None):
@@ -35,11 +84,11 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet):
         course_id = request.query_params.get('course', None)
         if course_id:
             records = records.filter(course_id=course_id)
-        serializer = AttendanceRecordSimpleSerializer(records, many=True)
-        return Response(serializer.data)
+        return Response(simple_attendance_rows(simple_attendance_values(records)))
 
 
-class CourseViewSet(viewsets.ReadOnlyModelViewSet):
+@replica_reads
+class CourseViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for courses
     - List all courses: GET /api/courses/
@@ -48,48 +97,129 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
+    field_columns = {
+        'id': ('id',),
+        'code': ('code',),
+        'name': ('name',),
+        'student_count': (),
+        'total_records': (),
+    }
+    flat_fields = ('id', 'code', 'name')
     
     def get_queryset(self):
-        queryset = Course.objects.all()
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(code__icontains=search) |
-                Q(name__icontains=search)
-            )
-        return queryset.order_by('code')
+        stats = [
+            name for name, field in (('num_students', 'student_count'), ('num_records', 'total_records'))
+            if self.fieldset.selects(field)
+        ]
+        queryset = Course.objects.with_stats(*stats) if stats else Course.objects.all()
+        search_query = self.request.query_params.get('search', None)
+        if search_query:
+            queryset = search(queryset, search_query).order_by('-search_rank', 'code')
+        else:
+            queryset = queryset.order_by('code')
+        return self.sparse_queryset(queryset)
     
     @action(detail=True, methods=['get'])
     def attendance(self, request, pk=None):
         course = self.get_object()
-        records = course.attendances.all().order_by('-created_at', 'student__last_name')
+        records = course.attendances.all().order_by('-created_at', '-id')
         date = request.query_params.get('date', None)
         if date:
-            records = records.filter(created_at__date=date)
-        serializer = AttendanceRecordSimpleSerializer(records, many=True)
-        return Response(serializer.data)
+            records = records.created_on(parse_day(date))
+        return Response(simple_attendance_rows(simple_attendance_values(records)))
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated, IsTutorOrAdmin])
+    def roster(self, request, pk=None):
+        """
+        Student x week grid for one semester.
+        GET /api/courses/{id}/roster/?semester=1&output=json|csv
+        """
+        course = get_object_or_404(Course, pk=pk)
+        try:
+            semester = int(request.query_params.get('semester', 1))
+        except ValueError:
+            semester = None
+        output = request.query_params.get('output', 'json')
+        if semester not in SEMESTERS or output not in ROSTER_FORMATS:
+            return Response(
+                {'error': f"Expected semester in {list(SEMESTERS)} and output in {list(ROSTER_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        response = HttpResponse(get_roster(course, semester, output), content_type=ROSTER_FORMATS[output])
+        if output == 'csv':
+            response['Content-Disposition'] = f'attachment; filename="{course.code}-semester-{semester}.csv"'
+        return response
 
 
-class AttendanceRecordViewSet(viewsets.ModelViewSet):
+def parse_day(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({'date': 'Enter a valid date in YYYY-MM-DD format.'})
+    return day
+
+
+def filter_attendance(queryset, params):
+    """Apply the attendance list filters (student, course, date, status) from query params."""
+    student_id = params.get('student', None)
+    if student_id:
+        queryset = queryset.filter(student_id=student_id)
+    course_id = params.get('course', None)
+    if course_id:
+        queryset = queryset.filter(course_id=course_id)
+    date = params.get('date', None)
+    if date:
+        queryset = queryset.created_on(parse_day(date))
+    status_param = params.get('status', None)
+    if status_param:
+        queryset = queryset.filter(status=status_param)
+    return queryset
+
+
+@replica_reads
+class AttendanceRecordViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = AttendanceRecord.objects.all()
     serializer_class = AttendanceRecordSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    field_columns = {
+        'id': ('id',),
+        'student': ('student',),
+        'student_detail': ('student',),
+        'course': ('course',),
+        'course_detail': ('course',),
+        'status': ('status',),
+        'status_display': ('status',),
+        'created_at': ('created_at',),
+    }
+    expandable = {'student': 'student_detail', 'course': 'course_detail'}
+    flat_fields = (
+        'id', 'student', 'student__student_id', 'student__first_name', 'student__last_name',
+        'course', 'course__code', 'course__name', 'semester', 'week', 'status', 'created_at',
+    )
     
     def get_queryset(self):
+        fieldset = self.fieldset
         queryset = AttendanceRecord.objects.all()
-        student_id = self.request.query_params.get('student', None)
-        if student_id:
-            queryset = queryset.filter(student_id=student_id)
-        course_id = self.request.query_params.get('course', None)
-        if course_id:
-            queryset = queryset.filter(course_id=course_id)
-        date = self.request.query_params.get('date', None)
-        if date:
-            queryset = queryset.filter(created_at__date=date)
-        status_param = self.request.query_params.get('status', None)
-        if status_param:
-            queryset = queryset.filter(status=status_param)
-        return queryset.order_by('-created_at', 'student__last_name')
+        if fieldset.fields is None and fieldset.flat is None:
+            queryset = queryset.with_related_stats()
+        elif fieldset.expand:
+            queryset = queryset.with_related_stats(*fieldset.expand)
+        queryset = filter_attendance(queryset, self.request.query_params)
+        # Index order (attendance_created_idx); created_at ties are broken by id
+        return self.sparse_queryset(queryset.order_by('-created_at', '-id'), ordering=('created_at', 'id'))
+
+    def list(self, request, *args, **kwargs):
+        if self.fieldset.fields is not None or self.fieldset.flat is not None:
+            return super().list(request, *args, **kwargs)
+        # The default shape, built from values_list rows rather than through the serializer
+        rows = attendance_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(attendance_rows(page))
+        return Response(attendance_rows(rows))
     
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -99,28 +229,19 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class IsTutorOrAdmin(permissions.BasePermission):
-    def has_permission(self, request, view):
-        return (
-            request.user.is_staff or
-            request.user.is_superuser or
-            request.user.groups.filter(name='Tutors').exists()
-        )
-
-
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_attendance(request):
     try:
-        student = Student.objects.get(student_id=request.user.username)
-        records = student.attendances.all().order_by('-created_at')
+        student = Student.objects.with_attendance_stats().get(student_id=request.user.username)
+        records = AttendanceRecord.objects.with_related_stats().filter(student=student).order_by('-created_at')
         course_id = request.query_params.get('course', None)
         if course_id:
             records = records.filter(course_id=course_id)
-        serializer = AttendanceRecordSerializer(records, many=True)
         return Response({
             'student': StudentSerializer(student).data,
-            'attendance_records': serializer.data
+            'attendance_records': attendance_rows(attendance_values(records)),
         })
     except Student.DoesNotExist:
         return Response(
@@ -129,28 +250,101 @@ def my_attendance(request):
         )
 
 
+@gzip_page
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsTutorOrAdmin])
+def export_attendance(request):
+    """
+    Stream attendance records as CSV (default) or NDJSON.
+    GET /api/attendance/export/?output=ndjson&course=3&status=A
+    Accepts the same filters as the attendance list endpoint.
+    """
+    output = request.query_params.get('output', 'csv')
+    if output not in EXPORT_FORMATS:
+        return Response(
+            {'error': f"Unknown output '{output}'; expected one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    queryset = filter_attendance(AttendanceRecord.objects.all(), request.query_params)
+    response = StreamingHttpResponse(iter_export(queryset, output), content_type=EXPORT_FORMATS[output])
+    response['Content-Disposition'] = f'attachment; filename="attendance.{output}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsTutorOrAdmin])
+def api_analytics(request):
+    """
+    Semester attendance rates per course, tutor and student, plus at-risk pairs.
+    GET /api/analytics/?semester=1&course=3&threshold=25&streak=3&limit=50
+    """
+    try:
+        semester = int(request.query_params.get('semester') or latest_semester())
+        course_id = int(request.query_params['course']) if request.query_params.get('course') else None
+        threshold = float(request.query_params.get('threshold', 25))
+        streak = int(request.query_params.get('streak', 3))
+        limit = min(int(request.query_params.get('limit', 50)), 500)
+        # Also rejects NaN and infinities, which compare false
+        if not 0 <= threshold <= 100 or streak < 1 or limit < 1:
+            raise ValueError
+    except ValueError:
+        return Response(
+            {'error': 'semester, course, streak and limit must be integers, streak and limit at least 1, '
+                      'and threshold a number from 0 to 100'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    key = ANALYTICS_CACHE_KEY.format(semester, course_id, threshold, streak, limit)
+    data = record_cache_lookup('analytics', cache.get(key))
+    if data is None:
+        data = SemesterAnalytics.load(semester, course=course_id).report(threshold, streak, limit)
+        cache.set(key, data, settings.ANALYTICS_CACHE_TIMEOUT)
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsTutorOrAdmin])
+def api_autocomplete(request, kind):
+    """
+    One page of picker options for the student and course form fields.
+    GET /api/autocomplete/students/?q=garc&page=2
+    """
+    try:
+        page = int(request.query_params.get('page', 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        return Response({'error': 'page must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(lookup(kind, request.query_params.get('q', ''), page))
+
+
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def api_stats(request):
-    total_students = Student.objects.count()
-    total_courses = Course.objects.count()
-    total_records = AttendanceRecord.objects.count()
-    
-    # Calculate attendance rate
+    # Dashboards poll this constantly; serve a briefly cached copy.
+    data = record_cache_lookup('stats', cache.get(STATS_CACHE_KEY))
+    if data is None:
+        data = stats_payload(AttendanceCounter.current(), Student.objects.count(), Course.objects.count())
+        cache.set(STATS_CACHE_KEY, data, settings.STATS_CACHE_TIMEOUT)
+    return Response(data)
+
+
+def stats_payload(counter, total_students, total_courses):
+    """The /api/stats/ body; shared with the async variant in async_api_views.py."""
+    total_records = counter.total
     if total_records > 0:
-        present_count = AttendanceRecord.objects.filter(status='P').count()
-        attendance_rate = round((present_count / total_records) * 100, 2)
+        attendance_rate = round((counter.present / total_records) * 100, 2)
     else:
         attendance_rate = 0
-    
-    return Response({
+
+    return {
         'total_students': total_students,
         'total_courses': total_courses,
         'total_attendance_records': total_records,
         'overall_attendance_rate': f'{attendance_rate}%',
         'status_breakdown': {
-            'present': AttendanceRecord.objects.filter(status='P').count(),
-            'absent': AttendanceRecord.objects.filter(status='A').count(),
-            'late': AttendanceRecord.objects.filter(status='L').count(),
+            'present': counter.present,
+            'absent': counter.absent,
+            'excused': counter.excused,
         }
-    })
\ No newline at end of file
+    }
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AttendanceRecordsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance_records'
+
+    def ready(self):
+        from . import receivers  # noqa: F401
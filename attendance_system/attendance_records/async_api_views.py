@@ -0,0 +1,115 @@
+"""Async variants of the read-only JSON endpoints, served under /api/async/.
+
+    /api/async/my-attendance/              -> api_views.my_attendance
+    /api/async/stats/                      -> api_views.api_stats
+    /api/async/students/<pk>/attendance/   -> StudentViewSet.attendance
+    /api/async/courses/<pk>/attendance/    -> CourseViewSet.attendance
+
+DRF views are synchronous, so these are plain Django coroutine views: rows
+come from the async ORM, and the same row builders, serializers and renderer
+as the sync endpoints only run over data that is already loaded, giving
+byte-for-byte the same bodies. Under an ASGI worker (WEB_WORKER_CLASS=asgi, see
+gunicorn_config.py) a request waiting on the database no longer holds a
+worker; under WSGI they still work but gain nothing.
+
+Authentication is the session only. HTTP Basic clients keep using the sync
+endpoints.
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import ValidationError
+
+from .api_views import STATS_CACHE_KEY, parse_day, stats_payload
+from .metrics import record_cache_lookup
+from .models import AttendanceCounter, AttendanceRecord, Course, Student
+from .renderers import FastJSONRenderer
+from .routers import replica_reads
+from .serializers import (
+    StudentSerializer,
+    attendance_rows,
+    attendance_values,
+    simple_attendance_rows,
+    simple_attendance_values,
+)
+
+
+def _json(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def _not_found(model):
+    # The body DRF returns for get_object_or_404() misses
+    return _json({'detail': f'No {model._meta.object_name} matches the given query.'}, status=404)
+
+
+def session_required(view):
+    """DRF's IsAuthenticated for a coroutine view: 403 with DRF's body when there is no session user."""
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return _json({'detail': 'Authentication credentials were not provided.'}, status=403)
+        return await view(request, user, *args, **kwargs)
+    return wrapper
+
+
+@replica_reads
+@session_required
+async def my_attendance(request, user):
+    try:
+        student = await Student.objects.with_attendance_stats().aget(student_id=user.username)
+    except Student.DoesNotExist:
+        return _json({'error': 'Student profile not found for this user'}, status=404)
+    records = AttendanceRecord.objects.with_related_stats().filter(student=student).order_by('-created_at')
+    course_id = request.GET.get('course')
+    if course_id:
+        records = records.filter(course_id=course_id)
+    return _json({
+        'student': StudentSerializer(student).data,
+        'attendance_records': attendance_rows([row async for row in attendance_values(records)]),
+    })
+
+
+@replica_reads
+@session_required
+async def api_stats(request, user):
+    data = record_cache_lookup('stats', await cache.aget(STATS_CACHE_KEY))
+    if data is None:
+        data = stats_payload(
+            await AttendanceCounter.acurrent(), await Student.objects.acount(), await Course.objects.acount()
+        )
+        await cache.aset(STATS_CACHE_KEY, data, settings.STATS_CACHE_TIMEOUT)
+    return _json(data)
+
+
+@replica_reads
+@session_required
+async def student_attendance(request, user, pk):
+    if not await Student.objects.filter(pk=pk).aexists():
+        return _not_found(Student)
+    records = AttendanceRecord.objects.filter(student_id=pk).order_by('-created_at')
+    course_id = request.GET.get('course')
+    if course_id:
+        records = records.filter(course_id=course_id)
+    return _json(simple_attendance_rows([row async for row in simple_attendance_values(records)]))
+
+
+@replica_reads
+@session_required
+async def course_attendance(request, user, pk):
+    if not await Course.objects.filter(pk=pk).aexists():
+        return _not_found(Course)
+    records = AttendanceRecord.objects.filter(course_id=pk).order_by('-created_at', '-id')
+    date = request.GET.get('date')
+    if date:
+        try:
+            records = records.created_on(parse_day(date))
+        except ValidationError as exc:
+            return _json(exc.detail, status=400)
+    return _json(simple_attendance_rows([row async for row in simple_attendance_values(records)]))
@@ -0,0 +1,53 @@
+"""Paginated lookups behind the student and course pickers.
+
+Forms render only the options already selected (see widgets.py) and fetch
+the rest from /api/autocomplete/<kind>/ as the user types, so page weight no
+longer grows with the tables. Responses use the select2 shape that Django's
+admin autocomplete also returns:
+
+    {"results": [{"id": "12", "text": "Ann Lee (S0012)"}], "pagination": {"more": true}}
+
+Matching goes through search.py. Each (kind, normalized query, page) result
+is cached for AUTOCOMPLETE_CACHE_TIMEOUT seconds, which also absorbs the
+request per keystroke; new or renamed objects show up once it expires.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import record_cache_lookup
+from .models import Course, Student
+from .search import normalize, search
+
+PAGE_SIZE = 20
+AUTOCOMPLETE_CACHE_KEY = 'attendance_records:autocomplete:{}:{}:{}'
+
+SOURCES = {
+    'students': (Student, ('last_name', 'first_name', 'pk'), ('first_name', 'last_name', 'student_id')),
+    'courses': (Course, ('code', 'pk'), ('code', 'name')),
+}
+
+
+def lookup(kind, query, page=1):
+    """One page of {"id", "text"} results for a SOURCES kind, best matches first."""
+    model, ordering, fields = SOURCES[kind]
+    normalized = ' '.join(normalize(query))
+    key = AUTOCOMPLETE_CACHE_KEY.format(kind, hashlib.md5(normalized.encode()).hexdigest(), page)
+    data = record_cache_lookup('autocomplete', cache.get(key))
+    if data is None:
+        queryset = model.objects.only(*fields)
+        if normalized:
+            queryset = search(queryset, normalized).order_by('-search_rank', *ordering)
+        else:
+            queryset = queryset.order_by(*ordering)
+        start = (page - 1) * PAGE_SIZE
+        # One extra row tells whether there is a next page without a COUNT
+        objects = list(queryset[start:start + PAGE_SIZE + 1])
+        data = {
+            'results': [{'id': str(obj.pk), 'text': str(obj)} for obj in objects[:PAGE_SIZE]],
+            'pagination': {'more': len(objects) > PAGE_SIZE},
+        }
+        cache.set(key, data, settings.AUTOCOMPLETE_CACHE_TIMEOUT)
+    return data
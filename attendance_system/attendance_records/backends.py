@@ -1,71 +1,116 @@
 from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import User, Group
+from django.db import router
+from django.db.models import F, Value
 from .models import Student, Tutor
+from .roles import STUDENTS_GROUP, TUTORS_GROUP
 
+ACCOUNT_STUDENT = 'student'
+ACCOUNT_TUTOR = 'tutor'
+ACCOUNT_GROUPS = {
+    ACCOUNT_STUDENT: STUDENTS_GROUP,
+    ACCOUNT_TUTOR: TUTORS_GROUP,
+}
+ACCOUNT_FIELDS = ('kind', 'passport_data', 'first_name', 'last_name', 'email')
+
+
+def _account_lookup(username):
+    students = (
+        Student.objects.filter(student_id=username).order_by()
+        .annotate(kind=Value(ACCOUNT_STUDENT)).values(*ACCOUNT_FIELDS)
+    )
+    tutors = (
+        Tutor.objects.filter(tutor_id=username).order_by()
+        .annotate(kind=Value(ACCOUNT_TUTOR)).values(*ACCOUNT_FIELDS)
+    )
+    return students.union(tutors, all=True)
+
+
+def _user_lookup(username):
+    # One row per group membership (a single NULL row when there are none)
+    return User.objects.filter(username=username).annotate(group_name=F('groups__name'))
+
+
+def find_accounts(username):
+    """
+    Look the ID up as a student and as a tutor in one UNION ALL query.
+
+    Each side hits the unique index on student_id/tutor_id. Rows come back
+    as dicts with a 'kind' key, students first, matching the order the
+    separate student and tutor backends used to be tried in.
+    """
+    rows = list(_account_lookup(username).using(router.db_for_write(Student)))
+    rows.sort(key=lambda row: row['kind'] != ACCOUNT_STUDENT)
+    return rows
+
+
+def provision_user(username, group_name, profile):
+    """
+    Return the Django user for an authenticated student/tutor.
+
+    The user is expected to exist and belong to exactly `group_name`; that is
+    checked by the same query that loads the user, so the common case costs
+    one read and no writes. Otherwise the user is created from `profile` and
+    its groups are reset to `group_name` alone.
+    """
+    rows = list(_user_lookup(username).using(router.db_for_write(User)))
+    if len(rows) == 1 and rows[0].group_name == group_name:
+        return rows[0]
+
+    created = False
+    if rows:
+        user = rows[0]
+    else:
+        user, created = User.objects.get_or_create(
+            username=username,
+            defaults={
+                'first_name': profile['first_name'],
+                'last_name': profile['last_name'],
+                'email': profile['email'],
+            }
+        )
+    group, _ = Group.objects.get_or_create(name=group_name)
+    if created:
+        # A new user has no groups to reconcile
+        user.groups.add(group)
+    else:
+        user.groups.set([group])
+    return user
+
+
+class PassportBackend(BaseBackend):
+    """Student and tutor login by ID and passport data, resolved in one lookup."""
 
-class StudentAuthBackend(BaseBackend):
-    """Custom authentication backend for students"""
-    
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            student = Student.objects.get(student_id=username)
-            
-            if student.check_passport_data(password):
-                user, created = User.objects.get_or_create(
-                    username=student.student_id,
-                    defaults={
-                        'first_name': student.first_name,
-                        'last_name': student.last_name,
-                        'email': student.email,
-                    }
-                )
-                
-                students_group, _ = Group.objects.get_or_create(name='Students')
-                user.groups.clear()
-                user.groups.add(students_group)
-                
-                return user
-        except Student.DoesNotExist:
-            pass
-        
+        if not username or not password:
+            return None
+
+        for account in find_accounts(username):
+            if check_password(password, account['passport_data']):
+                return provision_user(username, ACCOUNT_GROUPS[account['kind']], account)
+
         return None
 
     def get_user(self, user_id):
         try:
-            return User.objects.get(pk=user_id)
+            user = User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return None
+        return user if user.is_active else None
+
 
+class StudentAuthBackend(PassportBackend):
+    """
+    Custom authentication backend for students, superseded by PassportBackend.
+
+    Still listed in AUTHENTICATION_BACKENDS so sessions created through it
+    keep resolving their user; logins go through PassportBackend.
+    """
 
-class TutorAuthBackend(BaseBackend):
-    """Custom authentication backend for tutors"""
-    
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            tutor = Tutor.objects.get(tutor_id=username)
-            
-            if tutor.check_passport_data(password):
-                user, created = User.objects.get_or_create(
-                    username=tutor.tutor_id,
-                    defaults={
-                        'first_name': tutor.first_name,
-                        'last_name': tutor.last_name,
-                        'email': tutor.email,
-                    }
-                )
-                
-                tutors_group, _ = Group.objects.get_or_create(name='Tutors')
-                user.groups.clear()
-                user.groups.add(tutors_group)
-                
-                return user
-        except Tutor.DoesNotExist:
-            pass
-        
         return None
 
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
\ No newline at end of file
+
+class TutorAuthBackend(StudentAuthBackend):
+    """Custom authentication backend for tutors, superseded by PassportBackend (see StudentAuthBackend)."""
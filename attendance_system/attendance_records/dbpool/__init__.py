@@ -0,0 +1,186 @@
+"""Per-process database connection pools for the MySQL (pymysql) and SQLite backends.
+
+Django opens a connection the first time a request touches the database and
+closes it when the request ends (CONN_MAX_AGE = 0). On MySQL that is a TCP
+connect, the pymysql handshake and authentication, and the session setup
+query on every request. The backends in dbpool.mysql and dbpool.sqlite3 keep
+Django's connection lifecycle but hand the DB-API connection to a pool on
+close and take one back on connect:
+
+    checkout  the most recently returned idle connection is pinged (a MySQL
+              COM_PING, a SELECT 1 on SQLite); one that fails the ping or has
+              outlived DB_POOL_MAX_AGE is closed and the next one tried. With
+              none left a new connection is opened, unless DB_POOL_SIZE are
+              already open, in which case checkout waits up to
+              DB_POOL_TIMEOUT seconds for one to come back.
+    checkin   a connection closed inside a transaction, or used
+              DB_POOL_MAX_USES times, is closed for real; anything else goes
+              back to the pool.
+
+Pools are per process (each gunicorn worker has its own, shared by its
+threads) and per database, so DB_POOL_SIZE bounds each worker's connections
+to one database. Pooling is opt-in: with DB_POOL on, settings.py switches
+ENGINE to these backends through DB_POOL_ENGINES.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+class PooledConnection:
+    """A DB-API connection with the bookkeeping needed to recycle it."""
+
+    __slots__ = ('connection', 'opened', 'uses')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.opened = time.monotonic()
+        self.uses = 1
+
+
+class ConnectionPool:
+    """Idle connections to one database in this process, with at most `size` open at once."""
+
+    def __init__(self, size, max_uses, max_age, timeout):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.timeout = timeout
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        # Totals for bench_connections and debugging
+        self.opened = self.reused = self.discarded = 0
+
+    def checkout(self, connect, is_usable):
+        """A PooledConnection and whether it was reused; `connect` opens a new DB-API connection."""
+        if not self._slots.acquire(timeout=self.timeout):
+            return None, False
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    break
+                if self._expired(entry) or not is_usable(entry.connection):
+                    self._discard(entry)
+                    continue
+                entry.uses += 1
+                with self._lock:
+                    self.reused += 1
+                return entry, True
+            entry = PooledConnection(connect())
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.opened += 1
+        return entry, False
+
+    def checkin(self, entry, reusable=True):
+        try:
+            if reusable and entry.uses < self.max_uses and not self._expired(entry):
+                with self._lock:
+                    self._idle.append(entry)
+            else:
+                self._discard(entry)
+        finally:
+            self._slots.release()
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for entry in idle:
+            self._discard(entry)
+
+    def _expired(self, entry):
+        return self.max_age is not None and time.monotonic() - entry.opened > self.max_age
+
+    def _discard(self, entry):
+        with self._lock:
+            self.discarded += 1
+        try:
+            entry.connection.close()
+        except Exception:
+            # Already broken; there is nothing left to release
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_pool(key, **options):
+    """The process-wide pool for `key`, created with `options` on first use."""
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Forked: the parent's sockets are not ours to reuse or close
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**options)
+        return pool
+
+
+class PooledDatabaseWrapperMixin:
+    """Mixed into a backend's DatabaseWrapper to take connections from, and return them to, a ConnectionPool.
+
+    The backend provides ping(connection), raising the driver's Error when a
+    pooled connection is no longer usable.
+    """
+
+    pooled = None
+    reused_connection = False
+
+    def pool(self):
+        if not settings.DB_POOL:
+            return None
+        settings_dict = self.settings_dict
+        key = (self.vendor, settings_dict['NAME'], settings_dict['HOST'], settings_dict['PORT'], settings_dict['USER'])
+        return get_pool(
+            key,
+            size=settings.DB_POOL_SIZE,
+            max_uses=settings.DB_POOL_MAX_USES,
+            max_age=settings.DB_POOL_MAX_AGE or None,
+            timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        entry, self.reused_connection = pool.checkout(
+            lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params), self._pool_usable,
+        )
+        if entry is None:
+            raise self.Database.OperationalError(
+                f"No free connection to database '{self.alias}' after {pool.timeout}s "
+                f"({pool.size} open in this process; see DB_POOL_SIZE)"
+            )
+        self.pooled = (pool, entry)
+        return entry.connection
+
+    def init_connection_state(self):
+        # Session settings made when the connection was opened are still in place
+        if not self.reused_connection:
+            super().init_connection_state()
+
+    def _close(self):
+        if self.pooled is None:
+            return super()._close()
+        (pool, entry), self.pooled = self.pooled, None
+        # A connection closed mid-transaction has uncommitted state; never hand it on
+        pool.checkin(entry, reusable=not self.in_atomic_block and self.autocommit)
+
+    def _pool_usable(self, connection):
+        try:
+            self.ping(connection)
+        except self.Database.Error:
+            return False
+        return True
@@ -0,0 +1,11 @@
+"""Django's MySQL backend with pooled connections (see attendance_records/dbpool/__init__.py)."""
+
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from .. import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    def ping(self, connection):
+        # One round trip; a server that dropped the connection (wait_timeout, failover) raises
+        connection.ping(reconnect=False)
@@ -0,0 +1,14 @@
+"""Django's SQLite backend with pooled connections (see attendance_records/dbpool/__init__.py)."""
+
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from .. import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    def pool(self):
+        # Closing an in-memory database destroys it, so Django never closes one anyway
+        return None if self.is_in_memory_db() else super().pool()
+
+    def ping(self, connection):
+        connection.execute('SELECT 1').close()
@@ -0,0 +1,143 @@
+"""Sparse fieldsets for the list and detail API endpoints: ?fields=, ?expand= and ?flat=.
+
+    GET /api/attendance/?fields=id,status,created_at
+    GET /api/attendance/?fields=id,status&expand=student
+    GET /api/attendance/?flat=1&fields=student__student_id,week,status
+
+fields= keeps only the named serializer fields. expand= names the related
+objects to embed (student and course on attendance records, as
+student_detail and course_detail). Once either parameter is given, related
+objects that are not expanded are left out. The viewset shapes its queryset
+to match: only the columns behind the remaining fields are selected, and
+only expanded relations are joined and get their aggregate subqueries.
+Without either parameter responses are exactly as before.
+
+flat=1 bypasses the serializer and model instances altogether: rows come
+straight from QuerySet.values() over the columns in fields= (the viewset's
+flat_fields when omitted), including columns of related rows written as
+Django lookups (student__student_id). Values are as stored: status is the
+code with no status_display, and datetimes are encoded by the JSON renderer.
+
+Each viewset describes its fields with three class attributes, see
+SparseFieldsetMixin.
+"""
+
+from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+FLAT_PARAM = 'flat'
+TRUE_VALUES = {'1', 'true', 'yes'}
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class Fieldset:
+    """What one request asked for: serializer fields and expanded relations, or flat columns."""
+
+    def __init__(self, fields=None, expand=(), flat=None):
+        self.fields = fields
+        self.expand = set(expand)
+        self.flat = flat
+
+    def selects(self, *names):
+        """Whether any of the serializer fields `names` is in the response."""
+        if self.flat is not None:
+            return False
+        return self.fields is None or any(name in self.fields for name in names)
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields=, ?expand= and ?flat= for a viewset's list and retrieve actions.
+
+    field_columns maps each serializer field to the model fields it reads,
+    for QuerySet.only(). expandable maps each ?expand= name to the
+    serializer field embedding that relation. flat_fields lists the values()
+    lookups flat mode may return, by default all of them. get_queryset()
+    reads self.fieldset to decide which joins and annotations it needs and
+    passes its result through sparse_queryset(); the serializer must accept
+    a `fields` argument (serializers.DynamicFieldsMixin).
+    """
+
+    field_columns = {}
+    expandable = {}
+    flat_fields = ()
+
+    @cached_property
+    def fieldset(self):
+        params = self.request.query_params
+        if self.action not in ('list', 'retrieve'):
+            return Fieldset()
+        fields = _names(params[FIELDS_PARAM]) if FIELDS_PARAM in params else None
+        expand = _names(params.get(EXPAND_PARAM, ''))
+        if params.get(FLAT_PARAM, '').lower() in TRUE_VALUES:
+            if expand:
+                raise ValidationError({EXPAND_PARAM: 'Flat rows cannot embed related objects.'})
+            self._check(FIELDS_PARAM, fields or (), self.flat_fields)
+            return Fieldset(flat=tuple(fields or self.flat_fields))
+        self._check(EXPAND_PARAM, expand, self.expandable)
+        if fields is None and not expand:
+            return Fieldset()
+        embedded = set(self.expandable.values())
+        if fields is None:
+            fields = [name for name in self.field_columns if name not in embedded]
+        self._check(FIELDS_PARAM, fields, self.field_columns)
+        expand = {name for name, field in self.expandable.items() if name in expand or field in fields}
+        fields = [name for name in fields if name not in embedded]
+        fields += [self.expandable[name] for name in self.expandable if name in expand]
+        return Fieldset(fields, expand)
+
+    def _check(self, param, names, allowed):
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ValidationError({
+                param: f"Unknown: {', '.join(unknown)}. Choose from: {', '.join(allowed)}."
+            })
+
+    def sparse_queryset(self, queryset, ordering=()):
+        """Restrict the SELECT to the requested fields' columns; `ordering` columns are always kept."""
+        fieldset = self.fieldset
+        if fieldset.flat is not None:
+            columns = [*fieldset.flat, *(name for name in ordering if name not in fieldset.flat)]
+            return queryset.values(*columns)
+        if fieldset.fields is None:
+            return queryset
+        columns = {'pk', *ordering}
+        for name in fieldset.fields:
+            columns.update(self.field_columns[name])
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.fieldset.fields is not None:
+            kwargs.setdefault('fields', self.fieldset.fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        if self.fieldset.flat is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self._flat_rows(page))
+        return Response(self._flat_rows(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.fieldset.flat is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(self.get_queryset(), **{self.lookup_field: self.kwargs[lookup]})
+        return Response(self._flat_rows([row])[0])
+
+    def _flat_rows(self, rows):
+        names = self.fieldset.flat
+        rows = list(rows)
+        # Ordering columns added only for the paginator's cursor are dropped again
+        if rows and len(rows[0]) != len(names):
+            return [{name: row[name] for name in names} for row in rows]
+        return rows
@@ -0,0 +1,103 @@
+"""Per-request SQL and template timings behind RequestTimingMiddleware and MetricsMiddleware.
+
+The middleware puts a RequestTimings in the current_timings context variable
+for the duration of a request. With REQUEST_TIMING on, query_hook, an
+execute_wrapper added to every database connection as it opens, hands each
+statement to it to be timed and grouped by SQL. With only METRICS on, the
+lighter query_counter is added instead and just bumps query_count. A context
+variable rather than a per-request wrapper is what lets async views be
+measured: the async ORM runs queries on a worker thread with its own
+connection objects, but the thread inherits the request's context. The SQL is
+still parameterized, so the N+1 queries of one view share a single SQL string
+and group together.
+
+Template time is collected by the TimedDjangoTemplates backend, which
+settings.py only selects with REQUEST_TIMING. Outside a request
+(instrumentation disabled, management commands, tests) the variable is empty
+and queries and templates run untimed.
+"""
+
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+current_timings = ContextVar('attendance_records_request_timings', default=None)
+
+
+class RequestTimings:
+    """Query count, DB time and template time of one request (durations in seconds)."""
+
+    def __init__(self):
+        self.queries = Counter()
+        self.query_count = 0
+        self.db = 0.0
+        self.render = 0.0
+        self._render_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.query_count += 1
+            self.queries[sql] += 1
+
+    def duplicates(self, limit=5):
+        """The most repeated SQL statements as (count, sql), most frequent first."""
+        return [(count, sql) for sql, count in self.queries.most_common(limit) if count > 1]
+
+    def time_render(self, render, *args):
+        # {% include %} and {% extends %} render nested templates; only the outermost is timed
+        self._render_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(*args)
+        finally:
+            self._render_depth -= 1
+            if not self._render_depth:
+                self.render += time.perf_counter() - started
+
+
+def query_hook(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install_query_hook(connection):
+    if query_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_hook)
+
+
+def query_counter(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.query_count += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection):
+    if query_counter not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_counter)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return super().render(context, request)
+        return timings.time_render(super().render, context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, reporting render time to the current request's timings."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
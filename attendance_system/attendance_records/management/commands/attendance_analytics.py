@@ -0,0 +1,59 @@
+"""Semester attendance analytics: rates per course and tutor, and at-risk students.
+
+    python manage.py attendance_analytics                       # latest semester
+    python manage.py attendance_analytics --semester 1 --threshold 20 --streak 4
+    python manage.py attendance_analytics --json > report.json
+
+See attendance_records/analytics.py for how the figures are computed.
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance_records.analytics import CHUNK_SIZE, SemesterAnalytics, latest_semester
+
+
+class Command(BaseCommand):
+    help = 'Report attendance rates and students over an absence threshold for one semester.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, help='Semester to analyse (default: the latest with records).')
+        parser.add_argument('--threshold', type=float, default=25.0, help='Flag absence rates above this percentage.')
+        parser.add_argument('--streak', type=int, default=3, help='Flag this many consecutive absent weeks.')
+        parser.add_argument('--limit', type=int, default=50, help='Rows to list per section.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Records fetched per query.')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON.')
+
+    def handle(self, *args, **options):
+        semester = options['semester'] or latest_semester()
+        started = time.perf_counter()
+        analytics = SemesterAnalytics.load(semester, chunk_size=options['chunk_size'])
+        report = analytics.report(options['threshold'], options['streak'], options['limit'])
+        elapsed = time.perf_counter() - started
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        overall = report['overall']
+        self.stdout.write(
+            f"Semester {semester}: {report['records']} records, {overall['attendance_rate']}% present "
+            f"({elapsed:.2f}s, {analytics.state_bytes / 1024:.0f} KiB of pair state)"
+        )
+        self.stdout.write('\nCourses')
+        for course in report['courses']:
+            self.stdout.write(f"  {course['code'] or course['id']:<12}{course['students']:>6} students{course['attendance_rate']:>9}%")
+        self.stdout.write('\nTutors')
+        for tutor in report['tutors']:
+            self.stdout.write(f"  {tutor['tutor_id'] or tutor['id']:<12}{tutor['name'] or '':<30}{tutor['attendance_rate']:>9}%")
+        self.stdout.write(
+            f"\nAt risk: {report['at_risk_total']} student/course pair(s) above {report['threshold']}% "
+            f"absent or with {report['streak']}+ consecutive absences"
+        )
+        for row in report['at_risk']:
+            self.stdout.write(
+                f"  {row['student']['student_id'] or row['student']['id']:<14}{row['course']['code'] or row['course']['id']:<12}"
+                f"{row['absence_rate']:>7}% absent  streak {row['longest_absence_streak']}"
+            )
@@ -0,0 +1,209 @@
+"""Replay every route in attendance_records/urls.py and report latency and query counts as JSON.
+
+Each named route is requested through the test client as an admin (a
+student for the student-only pages), first with an empty cache and then
+--repeat more times. URL arguments are filled from existing rows, so run it
+against a populated database (see seed_synthetic). Users created for the run
+are rolled back at the end.
+
+    python manage.py bench --repeat 20 --output before.json
+    python manage.py bench --repeat 20 --output after.json --compare before.json
+
+The JSON carries cold, p50 and p95 milliseconds, the query count, status
+code and body size per route. --compare prints the p50 and query count
+changes against an earlier run.
+"""
+
+import json
+import platform
+import time
+
+import django
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from attendance_records.models import AttendanceRecord, Course, Student, Tutor
+from attendance_records.roles import STUDENTS_GROUP
+
+NAMESPACE = 'attendance_records'
+# Routes that would end the benchmark's session
+SKIPPED = {'logout', 'rest_framework:logout'}
+STUDENT_ROUTES = {'student_dashboard', 'api-my-attendance', 'api-async-my-attendance'}
+# Which model a route's <pk> refers to, by route name prefix
+PK_MODELS = (
+    ('students_', Student), ('api-student-', Student), ('api-async-student-', Student),
+    ('tutors_', Tutor),
+    ('courses_', Course), ('course_', Course), ('api-course-', Course), ('api-async-course-', Course),
+    ('attendance_', AttendanceRecord), ('api-attendance-', AttendanceRecord),
+)
+
+
+def _percentile(timings, share):
+    return sorted(timings)[min(len(timings) - 1, int(len(timings) * share))]
+
+
+def named_routes(resolver=None, namespace=NAMESPACE):
+    """(name, argument names) of every named route under the namespace, first occurrence only."""
+    if resolver is None:
+        resolver = get_resolver()
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLResolver) and pattern.namespace == namespace:
+                return named_routes(pattern, namespace)
+        raise CommandError(f"No '{namespace}' namespace in the URLconf.")
+    routes = {}
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f'{pattern.namespace}:' if pattern.namespace else ''
+            for name, arguments in named_routes(pattern, namespace).items():
+                routes.setdefault(prefix + name, arguments)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            # DRF's format-suffix variants reuse the name with an extra 'format' argument
+            routes.setdefault(pattern.name, tuple(pattern.pattern.regex.groupindex))
+    return routes
+
+
+class Command(BaseCommand):
+    help = 'Measure latency and query count of every attendance_records route.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10, help='Timed warm requests per route.')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+        parser.add_argument('--compare', help='An earlier JSON report to print p50 and query changes against.')
+        parser.add_argument('--label', default='', help='Free text stored in the report, e.g. a commit id.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            samples = self._samples()
+            clients = self._clients(samples)
+            results = []
+            for name, arguments in sorted(named_routes().items()):
+                if name in SKIPPED or 'format' in arguments:
+                    continue
+                url = self._url(name, arguments, samples)
+                if url is None:
+                    self.stderr.write(f'{name}: no row to fill {arguments}, skipped')
+                    continue
+                client = clients['student' if name in STUDENT_ROUTES else 'admin']
+                results.append(self._measure(client, name, url, options['repeat']))
+            transaction.set_rollback(True)
+
+        report = {
+            'label': options['label'],
+            'created': timezone.now().isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeat': options['repeat'],
+            'rows': {
+                'students': Student.objects.count(),
+                'courses': Course.objects.count(),
+                'attendance': AttendanceRecord.objects.count(),
+            },
+            'routes': results,
+        }
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                stream.write(text + '\n')
+        else:
+            self.stdout.write(text)
+        if options['compare']:
+            self._compare(report, options['compare'])
+
+    def _samples(self):
+        """Query strings and URL arguments per route, taken from existing rows."""
+        record = AttendanceRecord.objects.order_by('-id').first()
+        if record is None:
+            raise CommandError('No attendance records to benchmark against; run seed_synthetic first.')
+        course = record.course
+        return {
+            'pks': {
+                Student: record.student_id,
+                Course: course.pk,
+                AttendanceRecord: record.pk,
+                Tutor: Tutor.objects.values_list('pk', flat=True).first(),
+            },
+            'student': record.student,
+            'queries': {
+                'tutor_mark': f'?course={course.pk}&semester={record.semester}&week={record.week}',
+                'course_roster': f'?semester={record.semester}',
+                'api-course-roster': f'?semester={record.semester}',
+                'api-attendance-export': f'?course={course.pk}',
+                'api-analytics': f'?semester={record.semester}',
+                'api-autocomplete-students': f'?q={record.student.last_name[:3]}',
+                'api-autocomplete-courses': f'?q={course.code[:3]}',
+                'api-student-list': f'?search={record.student.last_name}',
+            },
+        }
+
+    def _clients(self, samples):
+        admin = User.objects.create_superuser('bench-admin', 'bench@example.edu', None)
+        student_user, _ = User.objects.get_or_create(username=samples['student'].student_id)
+        student_user.groups.add(Group.objects.get_or_create(name=STUDENTS_GROUP)[0])
+        # A failing route is reported with its 500 instead of ending the run
+        clients = {'admin': Client(raise_request_exception=False), 'student': Client(raise_request_exception=False)}
+        clients['admin'].force_login(admin)
+        clients['student'].force_login(student_user)
+        return clients
+
+    def _url(self, name, arguments, samples):
+        kwargs = {}
+        for argument in arguments:
+            model = next((model for prefix, model in PK_MODELS if name.startswith(prefix)), None)
+            if argument != 'pk' or samples['pks'].get(model) is None:
+                return None
+            kwargs['pk'] = samples['pks'][model]
+        return reverse(f'{NAMESPACE}:{name}', kwargs=kwargs) + samples['queries'].get(name, '')
+
+    def _measure(self, client, name, url, repeat):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        def fetch():
+            started = time.perf_counter()
+            response = client.get(url)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            return response, body, (time.perf_counter() - started) * 1000
+
+        cache.clear()
+        with connection.execute_wrapper(count):
+            response, body, cold = fetch()
+        cold_queries, queries = queries, 0
+        timings = []
+        with connection.execute_wrapper(count):
+            for _ in range(repeat):
+                timings.append(fetch()[2])
+        return {
+            'name': name,
+            'url': url,
+            'status': response.status_code,
+            'bytes': len(body),
+            'cold_ms': round(cold, 2),
+            'p50_ms': round(_percentile(timings, 0.5), 2) if timings else None,
+            'p95_ms': round(_percentile(timings, 0.95), 2) if timings else None,
+            'cold_queries': cold_queries,
+            'queries': round(queries / repeat, 1) if repeat else None,
+        }
+
+    def _compare(self, report, path):
+        with open(path) as stream:
+            before = {route['name']: route for route in json.load(stream)['routes']}
+        self.stderr.write(f"{'route':<40}{'p50 before':>12}{'p50 now':>10}{'change':>9}{'queries':>13}")
+        for route in report['routes']:
+            old = before.get(route['name'])
+            if old is None or not old['p50_ms'] or route['p50_ms'] is None:
+                continue
+            change = (route['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+            queries = f"{old['queries']} -> {route['queries']}"
+            self.stderr.write(
+                f"{route['name']:<40}{old['p50_ms']:>12.1f}{route['p50_ms']:>10.1f}{change:>+8.0f}%{queries:>13}"
+            )
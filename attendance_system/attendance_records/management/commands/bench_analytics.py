@@ -0,0 +1,115 @@
+"""Compare the vectorised semester analytics against a plain ORM loop.
+
+Builds a synthetic semester inside a transaction that is rolled back at the
+end, so it is safe to run against a development database. The records use
+their own semester number so existing data does not skew the numbers:
+
+    python manage.py bench_analytics --students 2000 --courses 3
+"""
+
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from attendance_records.analytics import SemesterAnalytics
+from attendance_records.models import AttendanceRecord, Course, Student
+
+BENCH_SEMESTER = 9
+WEEKS = 18
+THRESHOLD = 25.0
+STREAK = 3
+
+
+def naive_at_risk(semester):
+    """What the question took before: load every record and tally in Python."""
+    pairs = {}
+    for record in AttendanceRecord.objects.filter(semester=semester):
+        entry = pairs.setdefault((record.student_id, record.course_id), {'P': 0, 'A': 0, 'E': 0, 'absent_weeks': []})
+        entry[record.status] += 1
+        if record.status == AttendanceRecord.STATUS_ABSENT:
+            entry['absent_weeks'].append(record.week)
+
+    at_risk = set()
+    for pair, entry in pairs.items():
+        marked = entry['P'] + entry['A'] + entry['E']
+        rate = round(entry['A'] / marked * 100, 2) if marked else 0
+        longest = run = 0
+        previous = None
+        for week in sorted(entry['absent_weeks']):
+            run = run + 1 if previous is not None and week == previous + 1 else 1
+            longest = max(longest, run)
+            previous = week
+        if rate > THRESHOLD or longest >= STREAK:
+            at_risk.add(pair)
+    return at_risk
+
+
+def vectorised_at_risk(semester):
+    analytics = SemesterAnalytics.load(semester)
+    positions, _ = analytics.breaches(THRESHOLD, STREAK)
+    return set(zip(analytics.students[positions].tolist(), analytics.courses[positions].tolist()))
+
+
+class Command(BaseCommand):
+    help = 'Measure time and peak memory of the at-risk analysis, ORM loop versus NumPy.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--courses', type=int, default=3, help='Courses each student is enrolled on.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            records = self._build_semester(options['students'], options['courses'], random.Random(options['seed']))
+            self.stdout.write(f'{records} records in semester {BENCH_SEMESTER}')
+            self.stdout.write(f"{'path':<12}{'seconds':>10}{'records/s':>14}{'peak MiB':>12}{'at risk':>10}")
+            results = {}
+            for label, implementation in (('orm loop', naive_at_risk), ('numpy', vectorised_at_risk)):
+                tracemalloc.start()
+                started = time.perf_counter()
+                results[label] = implementation(BENCH_SEMESTER)
+                elapsed = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.stdout.write(
+                    f'{label:<12}{elapsed:>10.2f}{records / elapsed:>14.0f}{peak / 2 ** 20:>12.1f}{len(results[label]):>10}'
+                )
+            if results['orm loop'] != results['numpy']:
+                self.stdout.write(self.style.ERROR('At-risk sets differ between the two paths.'))
+            transaction.set_rollback(True)
+
+    def _build_semester(self, students, per_student, rng):
+        courses = Course.objects.bulk_create(
+            Course(code=f'BENCH-AN-{i:03d}', name='Analytics benchmark') for i in range(per_student * 4)
+        )
+        course_ids = list(
+            Course.objects.filter(code__startswith='BENCH-AN-').order_by('pk').values_list('pk', flat=True)
+        )
+        Student.objects.bulk_create(
+            Student(first_name='Bench', last_name=f'Student {i:06d}', student_id=f'BENCH-AN-{i:06d}')
+            for i in range(students)
+        )
+        # bulk_create does not return primary keys on MySQL, so read them back.
+        student_ids = Student.objects.filter(student_id__startswith='BENCH-AN-').values_list('pk', flat=True)
+
+        batch = []
+        created = 0
+        for student_id in student_ids:
+            # Each student has a personal absence tendency so some cross the threshold
+            absence = rng.random() * 0.4
+            for course_id in rng.sample(course_ids, min(per_student, len(courses))):
+                for week in range(1, WEEKS + 1):
+                    roll = rng.random()
+                    status = 'A' if roll < absence else 'E' if roll < absence + 0.05 else 'P'
+                    batch.append(AttendanceRecord(
+                        student_id=student_id, course_id=course_id, semester=BENCH_SEMESTER, week=week, status=status,
+                    ))
+            if len(batch) >= 20_000:
+                AttendanceRecord.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        AttendanceRecord.objects.bulk_create(batch)
+        return created + len(batch)
@@ -0,0 +1,91 @@
+"""Measure what opening a database connection costs each request, with and without the pool.
+
+Each iteration is one request's database lifecycle as the handlers run it:
+request_started, connect, one query, request_finished (which closes the
+connection, or returns it to the pool). The connect step is timed apart
+from the query, so against MySQL the unpooled column is the TCP connect,
+handshake and session setup, and the pooled column the checkout ping.
+
+    python manage.py bench_connections --iterations 2000
+    DATABASE_URL=mysql://... python manage.py bench_connections --output connections.json
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+
+from attendance_records.dbpool import PooledDatabaseWrapperMixin
+
+from .bench import _percentile
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request connect time and request time with DB_POOL off and on.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--query', default='SELECT 1', help='SQL run once per iteration.')
+        parser.add_argument('--output', help='Also write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not isinstance(connection, PooledDatabaseWrapperMixin):
+            raise CommandError(
+                f"Database '{connection.alias}' uses {connection.settings_dict['ENGINE']}, which is not pooled; "
+                f"run with DB_POOL=1 (only MySQL and SQLite have pooled backends)."
+            )
+        connection.close()
+
+        results = {}
+        self.stdout.write(f"{'pool':<6}{'connect p50 us':>16}{'connect p95 us':>16}{'request p50 us':>16}"
+                          f"{'request p95 us':>16}{'opened':>8}")
+        for pooled in (False, True):
+            with override_settings(DB_POOL=pooled):
+                connect, request = self._run(connection, options['iterations'], options['query'])
+                pool = connection.pool()
+                opened = pool.opened if pool else options['iterations']
+                if pool:
+                    pool.close_idle()
+            label = 'on' if pooled else 'off'
+            results[label] = row = {
+                'connect_p50_us': round(_percentile(connect, 0.5), 1),
+                'connect_p95_us': round(_percentile(connect, 0.95), 1),
+                'request_p50_us': round(_percentile(request, 0.5), 1),
+                'request_p95_us': round(_percentile(request, 0.95), 1),
+                'connections_opened': opened,
+            }
+            self.stdout.write(
+                f"{label:<6}{row['connect_p50_us']:>16.1f}{row['connect_p95_us']:>16.1f}"
+                f"{row['request_p50_us']:>16.1f}{row['request_p95_us']:>16.1f}{opened:>8}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                json.dump({
+                    'vendor': connection.vendor,
+                    'iterations': options['iterations'],
+                    'query': options['query'],
+                    'results': results,
+                }, stream, indent=2)
+                stream.write('\n')
+
+    def _run(self, connection, iterations, query):
+        connect, request = [], []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            connection.ensure_connection()
+            connected = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                cursor.fetchall()
+            request_finished.send(sender=self.__class__)
+            finished = time.perf_counter()
+            connect.append((connected - started) * 1e6)
+            request.append((finished - started) * 1e6)
+        return connect, request
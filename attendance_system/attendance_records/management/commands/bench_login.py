@@ -0,0 +1,85 @@
+"""Measure login throughput of the old and new passport authentication paths.
+
+Creates synthetic students and tutors inside a transaction that is rolled back
+at the end, then authenticates each of them twice: once while their Django
+user still has to be provisioned, and once more in steady state.
+
+    python manage.py bench_login --accounts 200
+    python manage.py bench_login --fast-hasher   # isolate the database cost
+"""
+
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from attendance_records.auth import PassportAuthBackend
+from attendance_records.backends import PassportBackend
+from attendance_records.models import Student, Tutor
+
+PASSWORD = 'bench-passport'
+
+
+def old_login(account_id, kind):
+    return PassportAuthBackend().authenticate(None, username=account_id, password=PASSWORD, user_type=kind)
+
+
+def new_login(account_id, kind):
+    return PassportBackend().authenticate(None, username=account_id, password=PASSWORD)
+
+
+class Command(BaseCommand):
+    help = 'Compare login throughput of auth.PassportAuthBackend and backends.PassportBackend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=100, help='Students and tutors to create (each).')
+        parser.add_argument(
+            '--fast-hasher', action='store_true',
+            help='Hash passports with MD5 so the numbers show database work rather than PBKDF2.',
+        )
+
+    def handle(self, *args, **options):
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['fast_hasher'] else None
+        with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+            with transaction.atomic():
+                accounts = self._build_accounts(options['accounts'])
+                self.stdout.write(f"{'path':<10}{'round':<12}{'logins/s':>12}{'queries/login':>16}")
+                for label, login in (('old', old_login), ('new', new_login)):
+                    for round_name in ('provision', 'steady'):
+                        rate, queries = self._measure(login, accounts)
+                        self.stdout.write(f'{label:<10}{round_name:<12}{rate:>12.1f}{queries:>16.1f}')
+                transaction.set_rollback(True)
+
+    def _build_accounts(self, count):
+        encoded = make_password(PASSWORD)
+        Student.objects.bulk_create(
+            Student(first_name='Bench', last_name=f'Student {i}', student_id=f'BENCH-LS-{i:05d}', passport_data=encoded)
+            for i in range(count)
+        )
+        Tutor.objects.bulk_create(
+            Tutor(first_name='Bench', last_name=f'Tutor {i}', tutor_id=f'BENCH-LT-{i:05d}', passport_data=encoded)
+            for i in range(count)
+        )
+        accounts = []
+        for i in range(count):
+            accounts.append((f'BENCH-LS-{i:05d}', 'student'))
+            accounts.append((f'BENCH-LT-{i:05d}', 'tutor'))
+        return accounts
+
+    def _measure(self, login, accounts):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            for account_id, kind in accounts:
+                if login(account_id, kind) is None:
+                    raise RuntimeError(f'Login failed for {account_id}')
+            elapsed = time.perf_counter() - started
+        return len(accounts) / elapsed, queries / len(accounts)
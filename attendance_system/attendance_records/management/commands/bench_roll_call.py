@@ -0,0 +1,100 @@
+"""Compare the legacy per-row roll-call submit against the batched one.
+
+Builds a synthetic course inside a transaction that is rolled back at the end,
+so it is safe to run against a development database:
+
+    python manage.py bench_roll_call --students 500
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from attendance_records.models import AttendanceRecord, Course, Student
+
+
+def legacy_roll_call(course, semester, week, statuses, removals):
+    """The pre-batching TutorMarkAttendanceView.post loop, kept for comparison."""
+    for student in Student.objects.filter(courses=course):
+        status = statuses.get(student.id)
+        if student.id in removals:
+            AttendanceRecord.objects.filter(
+                student=student, course=course, semester=semester, week=week
+            ).delete()
+        elif status:
+            record, _ = AttendanceRecord.objects.get_or_create(
+                student=student,
+                course=course,
+                semester=semester,
+                week=week,
+                defaults={'status': status}
+            )
+            record.status = status
+            record.save()
+
+
+def batched_roll_call(course, semester, week, statuses, removals):
+    enrolled = set(course.students.values_list('id', flat=True))
+    AttendanceRecord.objects.apply_roll_call(
+        course, semester, week,
+        {pk: status for pk, status in statuses.items() if pk in enrolled},
+        removals & enrolled,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Measure query count and latency of a roll-call submit on a synthetic course.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            student_ids = self._build_course(options['students'])
+            course = Course.objects.get(code='BENCH-ROLLCALL')
+
+            # Fresh submit: every student marked present.
+            fresh = {pk: AttendanceRecord.STATUS_PRESENT for pk in student_ids}
+            # Resubmit: every other student flips to absent, one in ten removed.
+            resubmit = dict(fresh)
+            for pk in student_ids[::2]:
+                resubmit[pk] = AttendanceRecord.STATUS_ABSENT
+            removals = set(student_ids[::10])
+
+            self.stdout.write(f"{'scenario':<12}{'path':<10}{'queries':>10}{'ms':>12}")
+            for label, implementation in (('legacy', legacy_roll_call), ('batched', batched_roll_call)):
+                for scenario, statuses, removed in (
+                    ('fresh', fresh, set()),
+                    ('resubmit', resubmit, removals),
+                ):
+                    queries, elapsed = self._measure(implementation, course, statuses, removed)
+                    self.stdout.write(f'{scenario:<12}{label:<10}{queries:>10}{elapsed * 1000:>12.1f}')
+                AttendanceRecord.objects.filter(course=course).delete()
+
+            transaction.set_rollback(True)
+
+    def _build_course(self, count):
+        course = Course.objects.create(code='BENCH-ROLLCALL', name='Roll-call benchmark')
+        Student.objects.bulk_create(
+            Student(first_name='Bench', last_name=f'Student {i:05d}', student_id=f'BENCH-RC-{i:05d}')
+            for i in range(count)
+        )
+        # bulk_create does not return primary keys on MySQL, so read them back.
+        student_ids = list(
+            Student.objects.filter(student_id__startswith='BENCH-RC-')
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        Student.courses.through.objects.bulk_create(
+            Student.courses.through(student_id=pk, course_id=course.pk)
+            for pk in student_ids
+        )
+        return student_ids
+
+    def _measure(self, implementation, course, statuses, removals):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            implementation(course, 1, 1, statuses, removals)
+            elapsed = time.perf_counter() - started
+        return len(ctx.captured_queries), elapsed
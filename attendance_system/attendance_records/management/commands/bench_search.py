@@ -0,0 +1,119 @@
+"""Compare the student search before and after the search index.
+
+Creates synthetic students inside a transaction that is rolled back at the
+end, indexes them, then runs each query the way the student API does (one
+page of 20 plus the page count) against the old four-column icontains filter
+and against search.search():
+
+    python manage.py bench_search --students 100000 --repeat 20
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from attendance_records.models import SearchTerm, Student
+from attendance_records.search import reindex, search
+
+FIRST_NAMES = (
+    'Aziz', 'Bekzod', 'Dilnoza', 'Elena', 'Farrukh', 'Gulnora', 'Hana', 'Ivan', 'Jasur', 'Kamila',
+    'Laylo', 'Madina', 'Maria', 'Nodir', 'Olga', 'Pavel', 'Rustam', 'Sardor', 'Shahzod', 'Timur',
+    'Umida', 'Valentina', 'Yusuf', 'Zarina', 'José', 'Chloé', 'Anna', 'Bobur', 'Dmitri', 'Emma',
+)
+LAST_NAMES = (
+    'Abdullaev', 'Azimova', 'Bakirov', 'Ergasheva', 'Garcia', 'Ibragimov', 'Ivanova', 'Karimov',
+    'Kowalski', 'Mahmudova', 'Nazarov', 'Nurmatova', 'Petrov', 'Qodirov', 'Rahimova', 'Rashidov',
+    'Saidova', 'Smirnov', 'Tashkentova', 'Tursunov', 'Umarova', 'Usmonov', 'Xolmatov', 'Yuldasheva',
+    'Zakirov', 'Müller', 'Núñez', 'Orlova', 'Sultonov', 'Haydarova',
+)
+QUERIES = (
+    ('surname prefix', 'kowal'),
+    ('first and last name', 'maria garcia'),
+    ('student id prefix', 'bs0042'),
+    ('email fragment', 'garcia12'),
+    ('accented name', 'nunez'),
+    ('typo', 'ibragimvo'),
+    ('single letter', 'm'),
+)
+PAGE_SIZE = 20
+
+
+def old_search(query):
+    return Student.objects.with_attendance_stats().filter(
+        Q(student_id__icontains=query) |
+        Q(first_name__icontains=query) |
+        Q(last_name__icontains=query) |
+        Q(email__icontains=query)
+    ).order_by('last_name', 'first_name')
+
+
+def new_search(query):
+    return search(Student.objects.with_attendance_stats(), query).order_by('-search_rank', 'last_name', 'first_name')
+
+
+def _percentile(timings, share):
+    return sorted(timings)[min(len(timings) - 1, int(len(timings) * share))]
+
+
+class Command(BaseCommand):
+    help = 'Measure student search latency with icontains scans and with the search index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query and implementation.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            self._create_students(options['students'], random.Random(options['seed']))
+            created = time.perf_counter() - started
+            started = time.perf_counter()
+            reindex(Student.objects.filter(student_id__startswith='BS'))
+            self.stdout.write(
+                f"{options['students']} students created in {created:.1f}s, indexed in "
+                f"{time.perf_counter() - started:.1f}s ({SearchTerm.objects.filter(kind=SearchTerm.KIND_STUDENT).count()} terms)"
+            )
+            self.stdout.write(
+                f"{'query':<22}{'':<14}{'matches':>9}{'old p50':>10}{'old p95':>10}{'new p50':>10}{'new p95':>10}{'speedup':>9}"
+            )
+            for label, query in QUERIES:
+                old_matches, old_timings = self._time(old_search, query, options['repeat'])
+                new_matches, new_timings = self._time(new_search, query, options['repeat'])
+                old_p50, new_p50 = statistics.median(old_timings), statistics.median(new_timings)
+                self.stdout.write(
+                    f'{label:<22}{query!r:<14}{f"{old_matches}/{new_matches}":>9}'
+                    f'{old_p50:>10.1f}{_percentile(old_timings, 0.95):>10.1f}'
+                    f'{new_p50:>10.1f}{_percentile(new_timings, 0.95):>10.1f}{old_p50 / new_p50:>8.1f}x'
+                )
+            self.stdout.write('Times are milliseconds per page of 20 plus its count; matches are old/new.')
+            transaction.set_rollback(True)
+
+    def _create_students(self, count, rng):
+        batch = []
+        for i in range(count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            batch.append(Student(
+                student_id=f'BS{i:06d}',
+                first_name=first,
+                last_name=last,
+                email=f'{first}.{last}{i % 100}@students.example.edu'.lower(),
+            ))
+            if len(batch) == 5000:
+                Student.objects.bulk_create(batch)
+                batch = []
+        Student.objects.bulk_create(batch)
+
+    def _time(self, implementation, query, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = implementation(query)
+            list(queryset[:PAGE_SIZE])
+            matches = queryset.count()
+            timings.append((time.perf_counter() - started) * 1000)
+        return matches, timings
@@ -0,0 +1,105 @@
+"""Rows per second from queryset to JSON bytes, serializer pipeline against values_list rows.
+
+For the nested attendance shape (/api/attendance/, my-attendance) and the
+flat one (the students/courses attendance actions), the newest --rows
+records are serialized --repeat times by each pipeline:
+
+    serializer + DRF JSON   model instances, DRF serializer, stock renderer
+    rows + DRF JSON         values_list rows and builders, stock renderer
+    rows + orjson           values_list rows and builders, FastJSONRenderer
+
+Each run includes the query. The bodies of all pipelines are compared and
+must be identical; the best run of each is reported.
+
+    python manage.py bench_serializers --rows 5000 --repeat 5 --output serializers.json
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from attendance_records import renderers
+from attendance_records.models import AttendanceRecord
+from attendance_records.serializers import (
+    AttendanceRecordSerializer,
+    AttendanceRecordSimpleSerializer,
+    attendance_rows,
+    attendance_values,
+    simple_attendance_rows,
+    simple_attendance_values,
+)
+
+SHAPES = {
+    'attendance': (
+        lambda: AttendanceRecord.objects.with_related_stats(),
+        AttendanceRecordSerializer,
+        lambda queryset: attendance_rows(attendance_values(queryset)),
+    ),
+    'simple': (
+        lambda: AttendanceRecord.objects.all(),
+        AttendanceRecordSimpleSerializer,
+        lambda queryset: simple_attendance_rows(simple_attendance_values(queryset)),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure rows/sec serialized to JSON by the serializer pipeline and the values_list fast path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--output', help='Also write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write('orjson is not installed; FastJSONRenderer falls back to the stock renderer.')
+        ids = list(AttendanceRecord.objects.order_by('-created_at', '-id').values_list('pk', flat=True)[:options['rows']])
+        if not ids:
+            raise CommandError('No attendance records to serialize; run seed_synthetic first.')
+
+        results = {}
+        self.stdout.write(f"{'shape':<12}{'pipeline':<22}{'best ms':>10}{'rows/s':>12}{'speedup':>9}")
+        for shape, (base, serializer_class, build) in SHAPES.items():
+            def queryset():
+                return base().filter(pk__in=ids).order_by('-created_at', '-id')
+
+            pipelines = {
+                'serializer + DRF JSON': lambda: JSONRenderer().render(serializer_class(queryset(), many=True).data),
+                'rows + DRF JSON': lambda: JSONRenderer().render(build(queryset())),
+                'rows + orjson': lambda: renderers.FastJSONRenderer().render(build(queryset())),
+            }
+            bodies, timings = {}, {}
+            for name, pipeline in pipelines.items():
+                runs = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    bodies[name] = pipeline()
+                    runs.append(time.perf_counter() - started)
+                timings[name] = min(runs)
+            if len(set(bodies.values())) != 1:
+                raise CommandError(f'{shape}: the pipelines produced different bodies')
+
+            baseline = timings['serializer + DRF JSON']
+            results[shape] = {}
+            for name, seconds in timings.items():
+                row = results[shape][name] = {
+                    'best_ms': round(seconds * 1000, 1),
+                    'rows_per_s': round(len(ids) / seconds),
+                    'speedup': round(baseline / seconds, 1),
+                }
+                self.stdout.write(
+                    f"{shape:<12}{name:<22}{row['best_ms']:>10.1f}{row['rows_per_s']:>12}{row['speedup']:>8.1f}x"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                json.dump({
+                    'rows': len(ids),
+                    'repeat': options['repeat'],
+                    'orjson': renderers.orjson is not None,
+                    'shapes': results,
+                }, stream, indent=2)
+                stream.write('\n')
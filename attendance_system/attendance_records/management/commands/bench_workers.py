@@ -0,0 +1,173 @@
+"""Compare gunicorn worker models on the JSON read path.
+
+For each mode, gunicorn is started with gunicorn_config.py and --users
+seeded students log in (untimed). Each student then loops over four reads
+for --duration seconds with no think time:
+
+    my-attendance, stats, their own attendance, one day of a course's attendance
+
+    sync        sync workers, DRF views under /api/
+    gthread     gthread workers (--threads each), DRF views under /api/
+    asgi        uvicorn workers, the same DRF views (run in a thread by Django)
+    asgi-async  uvicorn workers, the async ORM views under /api/async/
+
+    python manage.py seed_synthetic --students 5000
+    python manage.py bench_workers --users 64 --duration 20 --workers 4 --output workers.json
+
+Every mode uses the same worker count, so the comparison isolates how
+each model overlaps requests that are waiting on the database.
+"""
+
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance_records.models import AttendanceRecord, Student
+
+from .load_spike import HttpSession, RequestFailed, Spike, _percentile, spawn_gunicorn
+
+MODES = {
+    'sync': ('sync', '/api'),
+    'gthread': ('gthread', '/api'),
+    'asgi': ('asgi', '/api'),
+    'asgi-async': ('asgi', '/api/async'),
+}
+
+
+def read_paths(api, student_pk, course_id, day):
+    return (
+        ('my-attendance', f'{api}/my-attendance/'),
+        ('stats', f'{api}/stats/'),
+        ('student attendance', f'{api}/students/{student_pk}/attendance/'),
+        ('course day', f'{api}/courses/{course_id}/attendance/?date={day}'),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Measure read throughput and tail latency under sync, gthread and ASGI workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(MODES), help=f"Comma-separated, from: {', '.join(MODES)}.")
+        parser.add_argument('--users', type=int, default=32, help='Concurrent logged-in students.')
+        parser.add_argument('--duration', type=float, default=15.0, help='Seconds of load per mode.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=8, help='Threads per gthread worker.')
+        parser.add_argument('--prefix', default='SYN', help='seed_synthetic --prefix of the accounts to use.')
+        parser.add_argument('--passport', default='synthetic')
+        parser.add_argument('--output', help='Also write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = set(modes) - MODES.keys()
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        users = self._users(options)
+
+        results = {}
+        self.stdout.write(
+            f"{'mode':<12}{'requests':>9}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for mode in modes:
+            worker_class, api = MODES[mode]
+            with spawn_gunicorn(worker_class, options['workers'], options['threads']) as base_url:
+                url = urlsplit(base_url)
+                spike = Spike(url.hostname, url.port, options['passport'], 0, random.Random(1), api=api)
+                elapsed, logged_in = asyncio.run(self._load(spike, users, api, options['duration']))
+            results[mode] = row = self._summarize(spike, elapsed)
+            row['logged_in'] = logged_in
+            if logged_in < len(users):
+                self.stderr.write(f'{mode}: only {logged_in} of {len(users)} logins succeeded')
+            self.stdout.write(
+                f"{mode:<12}{row['requests']:>9}{row['throughput_rps']:>9.1f}{row['errors']:>8}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                json.dump({
+                    'users': options['users'],
+                    'duration_s': options['duration'],
+                    'workers': options['workers'],
+                    'threads': options['threads'],
+                    'modes': results,
+                }, stream, indent=2)
+                stream.write('\n')
+
+    def _users(self, options):
+        students = list(
+            Student.objects.filter(student_id__startswith=f"{options['prefix']}-S", attendances__isnull=False)
+            .distinct().order_by('pk').values_list('pk', 'student_id')[:options['users']]
+        )
+        if len(students) < options['users']:
+            raise CommandError(f"Found {len(students)} seeded students with attendance; run seed_synthetic first.")
+        users = []
+        for pk, student_id in students:
+            record = AttendanceRecord.objects.filter(student=pk).order_by('-created_at').first()
+            users.append((pk, student_id, record.course_id, timezone.localdate(record.created_at).isoformat()))
+        return users
+
+    async def _load(self, spike, users, api, duration):
+        sessions = []
+
+        async def login(user):
+            session = HttpSession(spike.host, spike.port)
+            try:
+                await spike.login(session, user[1])
+                sessions.append((session, user))
+            except RequestFailed:
+                session.close()
+
+        await asyncio.gather(*(login(user) for user in users))
+        # Only the reads are reported
+        spike.timings.clear()
+        spike.errors.clear()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+
+        async def read(session, user):
+            pk, _, course_id, day = user
+            paths = read_paths(api, pk, course_id, day)
+            while loop.time() < deadline:
+                for name, path in paths:
+                    try:
+                        await spike.step(session, name, 'GET', path)
+                    except RequestFailed:
+                        pass
+            session.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(read(session, user) for session, user in sessions))
+        return time.perf_counter() - started, len(sessions)
+
+    def _summarize(self, spike, elapsed):
+        timings = [seconds * 1000 for step in spike.timings.values() for seconds in step]
+        errors = sum(sum(reasons.values()) for reasons in spike.errors.values())
+        transport_errors = sum(
+            count for reasons in spike.errors.values() for reason, count in reasons.items()
+            if not reason.startswith('HTTP')
+        )
+        requests = len(timings) + transport_errors
+        nan = float('nan')
+        return {
+            'requests': requests,
+            'errors': errors,
+            'elapsed_s': round(elapsed, 2),
+            'throughput_rps': round(requests / elapsed, 1),
+            'p50_ms': round(_percentile(timings, 0.5), 1) if timings else nan,
+            'p95_ms': round(_percentile(timings, 0.95), 1) if timings else nan,
+            'p99_ms': round(_percentile(timings, 0.99), 1) if timings else nan,
+            'steps': {
+                name: {
+                    'requests': len(step),
+                    'p50_ms': round(_percentile(step, 0.5) * 1000, 1),
+                    'p95_ms': round(_percentile(step, 0.95) * 1000, 1),
+                }
+                for name, step in spike.timings.items() if step
+            },
+        }
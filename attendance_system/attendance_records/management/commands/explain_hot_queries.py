@@ -0,0 +1,132 @@
+"""EXPLAIN the hot attendance queries and fail if any of them scans a whole table.
+
+Each query is built the way its view builds it, with parameters taken from an
+existing attendance row (or placeholders on an empty database), and run
+through the backend's own planner:
+
+    python manage.py explain_hot_queries                # SQLite or MySQL
+    python manage.py explain_hot_queries --verbosity 2  # print every plan
+
+A full scan is `SCAN <table>` without an index on SQLite and access type `ALL`
+on MySQL. Walking an index in order (`SCAN ... USING INDEX`, MySQL type
+`index`) is accepted, since the paginated lists stop after one page. MySQL may
+prefer a table scan on tiny tables, so run it against representative data.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from attendance_records.api_views import filter_attendance
+from attendance_records.models import AttendanceRecord, Student
+from attendance_records.pagination import OptionalCursorPagination, keyset_filter
+from attendance_records.search import search
+from attendance_records.views import AttendanceListView
+
+PAGE = 20
+
+
+def hot_queries(using):
+    """(label, queryset) pairs mirroring the views that issue them."""
+    records = AttendanceRecord.objects.using(using)
+    sample = records.select_related('student').order_by().first()
+    if sample is not None:
+        student_pk, student_id, course_pk = sample.student_id, sample.student.student_id, sample.course_id
+        semester, week, day = sample.semester, sample.week, sample.created_at.date()
+    else:
+        student_pk, student_id, course_pk, semester, week, day = 1, 'S0001', 1, 1, 1, datetime.date.today()
+    keyset = AttendanceListView.keyset
+    after = keyset_filter(keyset, [semester, week, 1])
+    cursor, now = OptionalCursorPagination.ordering, timezone.now()
+    api_list = filter_attendance(records.with_related_stats(), {}).order_by('-created_at', '-id')
+    students = Student.objects.using(using).with_attendance_stats()
+
+    return [
+        ('TutorMarkAttendanceView: roll call', records.filter(
+            course=course_pk, semester=semester, week=week).order_by()),
+        ('StudentDashboardView: student course history', records.filter(
+            student__student_id=student_id, course=course_pk).order_by('-semester', '-week')),
+        ('AttendanceListView: first page', records.select_related('student', 'course').order_by(*keyset)[:51]),
+        ('AttendanceListView: later page', records.select_related('student', 'course').filter(
+            after).order_by(*keyset)[:51]),
+        ('AttendanceListView: course week', records.select_related('student', 'course').filter(
+            course=course_pk, semester=semester, week=week).order_by(*keyset)[:51]),
+        ('API attendance list', api_list[:PAGE]),
+        ('API attendance list ?course=', filter_attendance(
+            api_list, {'course': course_pk})[:PAGE]),
+        ('API attendance list ?student=', filter_attendance(
+            api_list, {'student': student_pk})[:PAGE]),
+        ('API attendance list ?date=', filter_attendance(
+            api_list, {'date': day.isoformat()})[:PAGE]),
+        ('API attendance list ?cursor=', api_list.filter(
+            keyset_filter(cursor, [now, 1])).order_by(*cursor)[:PAGE + 1]),
+        ('API student list ?cursor=', students.filter(
+            keyset_filter(cursor, [now, 1])).order_by(*cursor)[:PAGE + 1]),
+        ('API student list ?search= (prefix)', search(students, student_id).order_by(
+            '-search_rank', 'last_name', 'first_name')[:PAGE]),
+        ('API student list ?search= (trigram)', search(students, f'{student_id}qqq').order_by(
+            '-search_rank', 'last_name', 'first_name')[:PAGE]),
+        ('API student attendance / my-attendance', records.filter(student=student_pk).order_by('-created_at')),
+        ('API course attendance ?date=', records.filter(course=course_pk).created_on(day).order_by(
+            '-created_at', '-id')),
+    ]
+
+
+def sqlite_full_scans(cursor, sql, params):
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+    plan = [row[-1] for row in cursor.fetchall()]
+    scans = [
+        line for line in plan
+        if line.startswith('SCAN ') and ' USING ' not in line and 'CONSTANT ROW' not in line
+    ]
+    return plan, scans
+
+
+def mysql_full_scans(cursor, sql, params):
+    cursor.execute('EXPLAIN ' + sql, params)
+    columns = [column[0] for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    plan = [
+        f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {row.get('Extra') or ''}".rstrip()
+        for row in rows
+    ]
+    scans = [line for line, row in zip(plan, rows) if row['type'] == 'ALL']
+    return plan, scans
+
+
+EXPLAINERS = {
+    'sqlite': sqlite_full_scans,
+    'mysql': mysql_full_scans,
+}
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the hot attendance queries and fail if any does a full table scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to explain against.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        explain = EXPLAINERS.get(connection.vendor)
+        if explain is None:
+            raise CommandError(f'EXPLAIN parsing is only implemented for {", ".join(EXPLAINERS)}, not {connection.vendor}.')
+
+        failures = []
+        with connection.cursor() as cursor:
+            for label, queryset in hot_queries(options['database']):
+                sql, params = queryset.query.get_compiler(using=options['database']).as_sql()
+                plan, scans = explain(cursor, sql, params)
+                if scans:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'FULL SCAN  {label}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'ok         {label}'))
+                if scans or options['verbosity'] > 1:
+                    for line in plan:
+                        self.stdout.write(f'           {line}')
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot quer{"y" if len(failures) == 1 else "ies"} did a full table scan.')
@@ -0,0 +1,361 @@
+"""Bulk import students, tutors, courses and enrollments from CSV or JSONL.
+
+Input is streamed and applied in batches, one transaction per batch, so a
+20k-student intake neither loads the whole file into memory nor holds one
+giant transaction open. Passport data is hashed in a process pool so PBKDF2
+runs on every core.
+
+Columns (CSV header or JSONL keys) per --kind:
+
+    courses      code, name
+    students     student_id, first_name, last_name, email, passport, courses
+    tutors       tutor_id, first_name, last_name, email, passport, courses
+    enrollments  student_id or tutor_id, course_code
+
+`courses` on student/tutor rows is an optional ';'-separated list of course
+codes to enroll in. Enrollments are only ever added, never removed.
+
+    python manage.py import_roster intake.csv --kind students
+    python manage.py import_roster intake.jsonl --kind students --dry-run
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attendance_records.models import Course, Student, Tutor
+from attendance_records.roles import STUDENTS_GROUP, TUTORS_GROUP, invalidate_users
+from attendance_records.roster import invalidate_rosters
+from attendance_records.search import reindex
+
+PEOPLE = {
+    'students': (Student, 'student_id', STUDENTS_GROUP),
+    'tutors': (Tutor, 'tutor_id', TUTORS_GROUP),
+}
+PROFILE_FIELDS = ('first_name', 'last_name', 'email')
+
+
+def read_rows(path, fmt):
+    """Yield (line number, row dict) from a CSV or JSONL file, or stdin for '-'."""
+    stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, _normalize(row)
+        else:
+            for line_num, line in enumerate(stream, start=1):
+                if line.strip():
+                    yield line_num, _normalize(json.loads(line))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _normalize(row):
+    # Missing values (short CSV lines, JSON nulls) are left out like missing keys
+    return {
+        str(key).strip().lower(): str(value).strip()
+        for key, value in row.items()
+        if key is not None and value is not None
+    }
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _init_hash_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV/JSONL roster into students, tutors, courses and enrollments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Input files; '-' reads standard input.")
+        parser.add_argument('--kind', required=True, choices=['courses', 'students', 'tutors', 'enrollments'])
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes used to hash passport data (default: one per core).',
+        )
+        parser.add_argument(
+            '--skip-existing-passports', action='store_true',
+            help='Only hash passports for new accounts; existing accounts keep theirs.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing them.')
+        parser.add_argument('--diff-limit', type=int, default=50, help='Changes listed in --dry-run output.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.dry_run = options['dry_run']
+        self.stats = Counter()
+        self.diff_lines = 0
+        self.pool = None
+        if options['kind'] in PEOPLE and not self.dry_run and options['workers'] > 1:
+            self.pool = ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_hash_worker)
+
+        started = time.perf_counter()
+        rows = 0
+        try:
+            for path in options['paths']:
+                fmt = options['format'] or self._format_for(path)
+                for batch in batched(read_rows(path, fmt), options['batch_size']):
+                    with transaction.atomic():
+                        self._import_batch(batch)
+                    rows += len(batch)
+                    if options['verbosity'] >= 2:
+                        elapsed = time.perf_counter() - started
+                        self.stdout.write(f'{rows} rows, {rows / elapsed:.0f} rows/s')
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{count} {name}' for name, count in sorted(self.stats.items()) if count) or 'no changes'
+        prefix = 'Dry run: would apply' if self.dry_run else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s): {summary}'
+        ))
+
+    def _format_for(self, path):
+        if path.endswith('.csv'):
+            return 'csv'
+        if path.endswith(('.jsonl', '.ndjson')):
+            return 'jsonl'
+        raise CommandError(f'Cannot tell the format of {path}; pass --format.')
+
+    def _import_batch(self, batch):
+        # Courses whose roster matrices the batch changed
+        self.roster_courses = set()
+        self._apply_batch(batch)
+        if self.roster_courses and not self.dry_run:
+            # Bulk writes bypass the signals that normally invalidate rosters
+            invalidate_rosters(self.roster_courses)
+
+    def _apply_batch(self, batch):
+        kind = self.options['kind']
+        if kind == 'courses':
+            self._import_courses(batch)
+        elif kind == 'enrollments':
+            pairs = []
+            for line_num, row in batch:
+                for people in PEOPLE:
+                    _, id_field, _ = PEOPLE[people]
+                    if row.get(id_field) and row.get('course_code'):
+                        pairs.append((people, row[id_field], row['course_code']))
+                        break
+                else:
+                    self._error(line_num, 'needs student_id or tutor_id and course_code')
+            self._enroll(pairs)
+        else:
+            self._import_people(kind, batch)
+
+    def _error(self, line_num, message):
+        self.stats['errors'] += 1
+        self.stderr.write(f'line {line_num}: {message}')
+
+    def _diff(self, line):
+        if self.dry_run and self.diff_lines < self.options['diff_limit']:
+            self.stdout.write(line)
+        self.diff_lines += 1
+
+    def _import_courses(self, batch):
+        rows = {}
+        for line_num, row in batch:
+            if not row.get('code') or not row.get('name'):
+                self._error(line_num, 'needs code and name')
+                continue
+            rows[row['code']] = row['name']
+
+        existing = Course.objects.in_bulk(list(rows), field_name='code')
+        to_create, to_update = [], []
+        for code, name in rows.items():
+            course = existing.get(code)
+            if course is None:
+                to_create.append(Course(code=code, name=name))
+                self._diff(f'+ course {code}')
+            elif course.name != name:
+                self._diff(f'~ course {code} name: {course.name!r} -> {name!r}')
+                course.name = name
+                to_update.append(course)
+            else:
+                self.stats['courses unchanged'] += 1
+
+        self.stats['courses created'] += len(to_create)
+        self.stats['courses updated'] += len(to_update)
+        if not self.dry_run:
+            Course.objects.bulk_create(to_create)
+            Course.objects.bulk_update(to_update, ['name'])
+            self.roster_courses.update(course.pk for course in to_update)
+            # bulk writes send no post_save, so refresh the search terms here
+            reindex(Course.objects.filter(code__in=[course.code for course in [*to_create, *to_update]]))
+
+    def _import_people(self, kind, batch):
+        model, id_field, group_name = PEOPLE[kind]
+        label = kind[:-1]
+        rows = {}
+        for line_num, row in batch:
+            if not all(row.get(field) for field in (id_field, 'first_name', 'last_name')):
+                self._error(line_num, f'needs {id_field}, first_name and last_name')
+                continue
+            rows[row[id_field]] = (line_num, row)
+
+        existing = model.objects.in_bulk(list(rows), field_name=id_field)
+        to_create, to_update, to_hash = [], [], []
+        pairs = []
+        for account_id, (line_num, row) in rows.items():
+            # Profile fields the row leaves out keep their stored values
+            profile = {field: row[field] for field in PROFILE_FIELDS if field in row}
+            passport = row.get('passport', '')
+            pairs.extend((kind, account_id, code) for code in filter(None, row.get('courses', '').split(';')))
+
+            obj = existing.get(account_id)
+            if obj is None:
+                if not passport:
+                    self._error(line_num, f'new {label} {account_id} needs passport data')
+                    continue
+                obj = model(**{id_field: account_id}, **profile)
+                to_create.append(obj)
+                to_hash.append((obj, passport))
+                self._diff(f'+ {label} {account_id}')
+                continue
+
+            changes = {field: (getattr(obj, field), value) for field, value in profile.items() if getattr(obj, field) != value}
+            rehash = bool(passport) and not self.options['skip_existing_passports']
+            if not changes and not rehash:
+                self.stats[f'{kind} unchanged'] += 1
+                continue
+            for field, (old, new) in changes.items():
+                self._diff(f'~ {label} {account_id} {field}: {old!r} -> {new!r}')
+                setattr(obj, field, new)
+            if rehash:
+                self._diff(f'~ {label} {account_id} passport data')
+                to_hash.append((obj, passport))
+            to_update.append(obj)
+
+        self.stats[f'{kind} created'] += len(to_create)
+        self.stats[f'{kind} updated'] += len(to_update)
+        if not self.dry_run:
+            self._hash_passports(to_hash)
+            model.objects.bulk_create(to_create)
+            model.objects.bulk_update(to_update, [*PROFILE_FIELDS, 'passport_data'])
+            if model is Student:
+                self.roster_courses.update(
+                    Student.courses.through.objects.filter(student__in=to_update).values_list('course_id', flat=True)
+                )
+            reindex(model.objects.filter(
+                **{f'{id_field}__in': [getattr(obj, id_field) for obj in [*to_create, *to_update]]}
+            ))
+            self._sync_users(
+                {
+                    getattr(obj, id_field): {field: getattr(obj, field) for field in PROFILE_FIELDS}
+                    for obj in [*to_create, *to_update]
+                },
+                group_name,
+            )
+        self._enroll(pairs)
+
+    def _hash_passports(self, to_hash):
+        raw = [passport for _, passport in to_hash]
+        if self.pool is not None and len(raw) > 1:
+            chunksize = max(1, len(raw) // (self.options['workers'] * 4))
+            hashed = self.pool.map(make_password, raw, chunksize=chunksize)
+        else:
+            hashed = map(make_password, raw)
+        for (obj, _), encoded in zip(to_hash, hashed):
+            obj.passport_data = encoded
+
+    def _sync_users(self, profiles, group_name):
+        """Mirror what StudentForm/TutorForm.save() do, for a whole batch at once."""
+        if not profiles:
+            return
+        users = User.objects.in_bulk(list(profiles), field_name='username')
+        new_users, changed_users = [], []
+        for username, profile in profiles.items():
+            user = users.get(username)
+            if user is None:
+                new_users.append(User(username=username, **profile))
+            elif any(getattr(user, field) != value for field, value in profile.items()):
+                for field, value in profile.items():
+                    setattr(user, field, value)
+                changed_users.append(user)
+        User.objects.bulk_create(new_users)
+        User.objects.bulk_update(changed_users, list(PROFILE_FIELDS))
+
+        # Each account belongs to its role group only, as the forms enforce
+        group, _ = Group.objects.get_or_create(name=group_name)
+        user_ids = list(User.objects.filter(username__in=profiles).values_list('pk', flat=True))
+        memberships = User.groups.through.objects.filter(user_id__in=user_ids)
+        memberships.exclude(group=group).delete()
+        in_group = set(memberships.filter(group=group).values_list('user_id', flat=True))
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user_id=user_id, group_id=group.pk)
+            for user_id in user_ids
+            if user_id not in in_group
+        )
+        # Bulk writes bypass the signals that normally drop cached identities
+        invalidate_users(user_ids)
+
+    def _enroll(self, pairs):
+        if not pairs:
+            return
+        courses = dict(
+            Course.objects.filter(code__in={code for _, _, code in pairs}).values_list('code', 'pk')
+        )
+        for kind in PEOPLE:
+            model, id_field, _ = PEOPLE[kind]
+            kind_pairs = [(account_id, code) for pair_kind, account_id, code in pairs if pair_kind == kind]
+            if not kind_pairs:
+                continue
+            people = dict(
+                model.objects.filter(**{f'{id_field}__in': {a for a, _ in kind_pairs}})
+                .values_list(id_field, 'pk')
+            )
+            through = model.courses.through
+            owner_field = f'{model._meta.model_name}_id'
+            wanted = set()
+            for account_id, code in kind_pairs:
+                if code not in courses:
+                    self.stats['unknown course codes'] += 1
+                    continue
+                if account_id not in people:
+                    # Only possible in --dry-run, where new accounts are not written
+                    self._diff(f'+ enrollment {account_id} -> {code}')
+                    self.stats['enrollments added'] += 1
+                    continue
+                wanted.add((people[account_id], courses[code]))
+
+            existing = set(
+                through.objects.filter(**{f'{owner_field}__in': {p for p, _ in wanted}})
+                .values_list(owner_field, 'course_id')
+            )
+            new = wanted - existing
+            self.stats['enrollments added'] += len(new)
+            if self.dry_run:
+                by_pk = {pk: account_id for account_id, pk in people.items()}
+                by_course = {pk: code for code, pk in courses.items()}
+                for person_pk, course_pk in sorted(new):
+                    self._diff(f'+ enrollment {by_pk[person_pk]} -> {by_course[course_pk]}')
+            else:
+                through.objects.bulk_create(
+                    [through(**{owner_field: person_pk, 'course_id': course_pk}) for person_pk, course_pk in new],
+                    ignore_conflicts=True,
+                )
+                if model is Student:
+                    self.roster_courses.update(course_pk for _, course_pk in new)
@@ -0,0 +1,381 @@
+"""Replay the lecture-start spike against a running server and report throughput and tail latency.
+
+At 09:00 students log in and open their attendance while tutors load the
+roll-call page and submit it. Each virtual user here runs one of those
+scripts once, arriving at a random moment within --ramp seconds and pausing
+for a random think time between steps:
+
+    student  GET /login/, POST /login/, GET /my-attendance/?course=,
+             GET /api/my-attendance/, GET /api/stats/
+    tutor    GET /login/, POST /login/, GET /mark-attendance/?course=&semester=&week=,
+             POST /mark-attendance/ (every enrolled student), GET /api/courses/<pk>/roster/
+
+Accounts are the ones seed_synthetic created under --prefix, logging in with
+--passport through the passport backend. The client is plain asyncio
+streams speaking HTTP/1.1 with keep-alive, so it needs nothing beyond the
+standard library and one process drives thousands of users.
+
+    python manage.py load_spike --url http://127.0.0.1:8000 --students 2000 --tutors 40
+    python manage.py load_spike --spawn --workers 9 --students 2000 --output sync.json
+
+--spawn starts gunicorn with gunicorn_config.py on a free local port for
+the run and stops it afterwards. --worker-class (sync, gthread or asgi),
+--workers and --threads override the config, which makes worker models easy
+to compare; --async-api sends the students' API reads to the /api/async/
+variants. Roll-call submits write to the database.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance_records.models import Course, Student, Tutor
+from attendance_records.roster import WEEKS
+
+CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+GUNICORN_CONFIG = Path(settings.BASE_DIR).parent / 'gunicorn_config.py'
+
+
+def _percentile(timings, share):
+    return sorted(timings)[min(len(timings) - 1, int(len(timings) * share))]
+
+
+class RequestFailed(Exception):
+    pass
+
+
+@contextmanager
+def spawn_gunicorn(worker_class=None, workers=None, threads=None):
+    """Run gunicorn with gunicorn_config.py on a free local port; yields its base URL."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    command = [
+        sys.executable, '-m', 'gunicorn', '-c', str(GUNICORN_CONFIG),
+        '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+    ]
+    if workers:
+        command += ['--workers', str(workers)]
+    env = os.environ.copy()
+    # Read by gunicorn_config.py, which also picks the WSGI or ASGI application
+    if worker_class:
+        env['WEB_WORKER_CLASS'] = worker_class
+    if threads:
+        env['WEB_THREADS'] = str(threads)
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise CommandError(f'gunicorn exited with status {process.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise CommandError('gunicorn did not start listening within 30s')
+                time.sleep(0.2)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+class HttpSession:
+    """One virtual user's cookie jar and keep-alive connection."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.cookies = {}
+        self.reader = self.writer = None
+
+    async def request(self, method, path, form=None):
+        body = urlencode(form, doseq=True).encode() if form is not None else b''
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}']
+        if self.cookies:
+            head.append('Cookie: ' + '; '.join(f'{name}={value}' for name, value in self.cookies.items()))
+        if form is not None:
+            head += ['Content-Type: application/x-www-form-urlencoded', f'Content-Length: {len(body)}']
+        message = ('\r\n'.join(head) + '\r\n\r\n').encode() + body
+
+        reused = self.writer is not None
+        try:
+            return await self._exchange(message)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+        # The server dropped an idle keep-alive connection; retry once on a new one
+        return await self._exchange(message)
+
+    async def _exchange(self, message):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(message)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        if not status_line:
+            raise ConnectionError('connection closed')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip()
+            if name == 'set-cookie':
+                cookie_name, _, cookie_value = value.split(';', 1)[0].partition('=')
+                self.cookies[cookie_name] = cookie_value.strip('"')
+            headers[name] = value
+
+        if 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            body = b''
+            while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                body += await self.reader.readexactly(size + 2)
+            await self.reader.readuntil(b'\r\n')
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Spike:
+    """Runs the virtual users and collects per-step latencies and failures."""
+
+    def __init__(self, host, port, passport, think, rng, api='/api'):
+        self.host, self.port = host, port
+        self.passport = passport
+        self.think = think
+        self.rng = rng
+        self.api = api
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(Counter)
+
+    async def step(self, session, name, method, path, form=None, expect=200):
+        started = time.perf_counter()
+        try:
+            status, body = await session.request(method, path, form)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+            self.errors[name][type(exc).__name__] += 1
+            raise RequestFailed from exc
+        self.timings[name].append(time.perf_counter() - started)
+        if status != expect:
+            self.errors[name][f'HTTP {status}'] += 1
+            raise RequestFailed
+        return body
+
+    async def pause(self):
+        if self.think:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think))
+
+    async def login(self, session, username):
+        page = await self.step(session, 'login page', 'GET', '/login/')
+        token = CSRF_INPUT.search(page)
+        # A 200 means the form came back with an error: the login failed
+        await self.step(session, 'login', 'POST', '/login/', {
+            'csrfmiddlewaretoken': token.group(1).decode() if token else '',
+            'username': username,
+            'password': self.passport,
+        }, expect=302)
+
+    async def student(self, student_id, course_id):
+        session = HttpSession(self.host, self.port)
+        try:
+            await self.login(session, student_id)
+            await self.pause()
+            await self.step(session, 'dashboard', 'GET', f'/my-attendance/?course={course_id}')
+            await self.pause()
+            await self.step(session, 'api my-attendance', 'GET', f'{self.api}/my-attendance/')
+            await self.step(session, 'api stats', 'GET', f'{self.api}/stats/')
+        except RequestFailed:
+            pass
+        finally:
+            session.close()
+
+    async def tutor(self, tutor_id, course_id, student_ids, semester, week):
+        session = HttpSession(self.host, self.port)
+        query = f'course={course_id}&semester={semester}&week={week}'
+        try:
+            await self.login(session, tutor_id)
+            await self.pause()
+            page = await self.step(session, 'roll-call page', 'GET', f'/mark-attendance/?{query}')
+            token = CSRF_INPUT.search(page)
+            await self.pause()
+            statuses = {
+                f'status_{pk}': self.rng.choice('PPPPPPPAE') for pk in student_ids
+            }
+            await self.step(session, 'roll-call submit', 'POST', '/mark-attendance/', {
+                'csrfmiddlewaretoken': token.group(1).decode() if token else '',
+                'course': course_id, 'semester': semester, 'week': week, **statuses,
+            }, expect=302)
+            await self.step(session, 'api roster', 'GET', f'/api/courses/{course_id}/roster/?semester={semester}')
+        except RequestFailed:
+            pass
+        finally:
+            session.close()
+
+    async def run(self, users, ramp):
+        async def arrive(delay, script):
+            await asyncio.sleep(delay)
+            await script
+
+        await asyncio.gather(*(arrive(self.rng.uniform(0, ramp), script) for script in users))
+
+
+class Command(BaseCommand):
+    help = 'Simulate the lecture-start spike of logins, dashboards and roll-call submits.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server to load (ignored with --spawn).')
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--tutors', type=int, default=20)
+        parser.add_argument('--ramp', type=float, default=10.0, help='Seconds over which users arrive.')
+        parser.add_argument('--think', type=float, default=0.5, help='Mean seconds between a user\'s steps.')
+        parser.add_argument('--prefix', default='SYN', help='seed_synthetic --prefix of the accounts to use.')
+        parser.add_argument('--passport', default='synthetic')
+        parser.add_argument('--semester', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Also write the report as JSON to this file.')
+        parser.add_argument('--spawn', action='store_true', help='Start gunicorn with gunicorn_config.py for the run.')
+        parser.add_argument(
+            '--worker-class', choices=('sync', 'gthread', 'asgi'), help='With --spawn: the worker model.',
+        )
+        parser.add_argument('--workers', type=int, help='With --spawn: number of workers.')
+        parser.add_argument('--threads', type=int, help='With --spawn: threads per gthread worker.')
+        parser.add_argument('--async-api', action='store_true', help='Read the /api/async/ endpoints.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users_spec = self._accounts(options, rng)
+        with ExitStack() as stack:
+            if options['spawn']:
+                base_url = stack.enter_context(
+                    spawn_gunicorn(options['worker_class'], options['workers'], options['threads'])
+                )
+                self.stdout.write(f"Started gunicorn ({options['worker_class'] or 'configured'} workers) at {base_url}")
+            else:
+                base_url = options['url']
+            url = urlsplit(base_url)
+            spike = Spike(
+                url.hostname, url.port or 80, options['passport'], options['think'], rng,
+                api='/api/async' if options['async_api'] else '/api',
+            )
+            users = [spike.student(*spec) for spec in users_spec['students']]
+            users += [spike.tutor(*spec, options['semester'], week) for spec, week in users_spec['tutors']]
+            rng.shuffle(users)
+            started = time.perf_counter()
+            asyncio.run(spike.run(users, options['ramp']))
+            elapsed = time.perf_counter() - started
+        report = self._report(spike, elapsed, options)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                json.dump(report, stream, indent=2)
+                stream.write('\n')
+
+    def _accounts(self, options, rng):
+        prefix = options['prefix']
+        students = list(
+            Student.objects.filter(student_id__startswith=f'{prefix}-S').order_by('?')
+            .values_list('pk', 'student_id')[:options['students']]
+        )
+        tutors = list(
+            Tutor.objects.filter(tutor_id__startswith=f'{prefix}-T').order_by('?')
+            .values_list('pk', 'tutor_id')[:options['tutors']]
+        )
+        if len(students) < options['students'] or len(tutors) < options['tutors']:
+            raise CommandError(
+                f"Found {len(students)} students and {len(tutors)} tutors under '{prefix}-'; "
+                f'run seed_synthetic or lower --students/--tutors.'
+            )
+        first_course = dict(
+            Student.courses.through.objects.filter(student__in=[pk for pk, _ in students])
+            .order_by('-course_id').values_list('student_id', 'course_id')
+        )
+        taught = dict(
+            Tutor.courses.through.objects.filter(tutor__in=[pk for pk, _ in tutors])
+            .order_by('-course_id').values_list('tutor_id', 'course_id')
+        )
+        rosters = {
+            course.pk: list(course.students.values_list('pk', flat=True))
+            for course in Course.objects.filter(pk__in=taught.values())
+        }
+        return {
+            'students': [(student_id, first_course.get(pk, '')) for pk, student_id in students],
+            'tutors': [
+                ((tutor_id, taught[pk], rosters[taught[pk]]), rng.randint(1, WEEKS))
+                for pk, tutor_id in tutors if pk in taught
+            ],
+        }
+
+    def _report(self, spike, elapsed, options):
+        steps = {}
+        total_requests = total_errors = 0
+        self.stdout.write(
+            f"{'step':<20}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        )
+        for name in sorted(spike.timings.keys() | spike.errors.keys()):
+            timings = [seconds * 1000 for seconds in spike.timings[name]]
+            errors = sum(spike.errors[name].values())
+            # Transport failures never produce a timing; HTTP errors do
+            requests = len(timings) + sum(
+                count for reason, count in spike.errors[name].items() if not reason.startswith('HTTP')
+            )
+            total_requests += requests
+            total_errors += errors
+            steps[name] = {
+                'requests': requests,
+                'errors': dict(spike.errors[name]),
+                **({
+                    'p50_ms': round(_percentile(timings, 0.5), 1),
+                    'p95_ms': round(_percentile(timings, 0.95), 1),
+                    'p99_ms': round(_percentile(timings, 0.99), 1),
+                    'max_ms': round(max(timings), 1),
+                } if timings else {}),
+            }
+            row = steps[name]
+            self.stdout.write(
+                f"{name:<20}{requests:>9}{errors:>8}" + ''.join(
+                    f"{row.get(key, float('nan')):>9.1f}" for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+                )
+            )
+        report = {
+            'students': options['students'],
+            'tutors': options['tutors'],
+            'ramp_s': options['ramp'],
+            'think_s': options['think'],
+            'worker_class': options['worker_class'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'async_api': options['async_api'],
+            'elapsed_s': round(elapsed, 2),
+            'requests': total_requests,
+            'throughput_rps': round(total_requests / elapsed, 1),
+            'error_rate': round(total_errors / total_requests, 4) if total_requests else 0,
+            'steps': steps,
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_requests} requests in {elapsed:.1f}s: {report['throughput_rps']} req/s, "
+            f"{report['error_rate']:.2%} errors"
+        ))
+        return report
@@ -0,0 +1,45 @@
+"""Recompute the AttendanceCounter row from the attendance table.
+
+    python manage.py rebuild_attendance_counters          # rebuild
+    python manage.py rebuild_attendance_counters --check  # report drift only
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attendance_records.models import AttendanceCounter
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the incremental attendance counters from scratch, or check them for drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only compare the stored counters with a full recount; exit non-zero on drift.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stored = AttendanceCounter.objects.select_for_update().filter(pk=AttendanceCounter.SINGLETON_PK).first()
+            expected = AttendanceCounter.expected()
+
+            drift = {}
+            for field, value in expected.items():
+                current = getattr(stored, field) if stored is not None else None
+                if current != value:
+                    drift[field] = (current, value)
+
+            for field, (current, value) in drift.items():
+                self.stdout.write(f'{field}: stored={current} actual={value}')
+
+            if options['check']:
+                if drift:
+                    raise CommandError(f'Attendance counters drifted on {len(drift)} field(s).')
+                self.stdout.write(self.style.SUCCESS('Attendance counters match the attendance table.'))
+                return
+
+            AttendanceCounter.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt attendance counters ({sum(expected.values())} records, {len(drift)} field(s) corrected).'
+        ))
@@ -0,0 +1,98 @@
+"""Recompute the AttendanceSummary table from the attendance table, one course per task.
+
+    python manage.py rebuild_attendance_summaries                 # every course
+    python manage.py rebuild_attendance_summaries --course CS101  # selected courses
+    python manage.py rebuild_attendance_summaries --check         # report drift only
+    python manage.py rebuild_attendance_summaries --workers 4     # MySQL: 4 courses at once
+
+Every course is rebuilt in its own transaction, one after the other by
+default. Courses are independent, so --workers hands them to a pool of
+threads, each with its own database connection. SQLite allows one writer at a
+time and answers concurrent rebuilds with "database is locked", so there
+--workers only applies to --check.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from attendance_records.models import AttendanceRecord, AttendanceSummary, Course
+
+
+def rebuild_course(course_id):
+    try:
+        AttendanceSummary.rebuild(course_id)
+        return 0
+    finally:
+        connections.close_all()
+
+
+def check_course(course_id):
+    """Number of (student, semester) scopes of the course whose stored row is wrong or missing."""
+    try:
+        expected = AttendanceSummary.compute(AttendanceRecord.objects.filter(course=course_id))
+        stored = {
+            tuple(row[:3]): tuple(row[3:])
+            for row in AttendanceSummary.objects.filter(course=course_id).values_list(
+                'student_id', 'course_id', 'semester', *AttendanceSummary.STORED_FIELDS,
+            )
+        }
+        return sum(1 for scope in expected.keys() | stored.keys() if expected.get(scope) != stored.get(scope))
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-student, per-course attendance summaries, or check them for drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course', action='append', dest='courses', metavar='CODE',
+            help='Only this course code (repeatable). Defaults to every course.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Courses processed concurrently, each on its own connection (default: 1).',
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only compare the stored summaries with a recount; exit non-zero on drift.',
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('code')
+        if options['courses']:
+            courses = courses.filter(code__in=options['courses'])
+            missing = set(options['courses']) - set(courses.values_list('code', flat=True))
+            if missing:
+                raise CommandError(f"Unknown course code(s): {', '.join(sorted(missing))}")
+        courses = list(courses.values_list('pk', 'code'))
+
+        task = check_course if options['check'] else rebuild_course
+        workers = max(1, options['workers'])
+        if workers > 1 and not options['check'] and connections[router.db_for_write(AttendanceSummary)].vendor == 'sqlite':
+            self.stderr.write('SQLite allows one writer at a time; rebuilding serially.')
+            workers = 1
+        started = time.perf_counter()
+        if workers == 1:
+            results = [(course, task(course[0])) for course in courses]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(zip(courses, pool.map(task, [pk for pk, _ in courses])))
+        elapsed = time.perf_counter() - started
+
+        if not options['check']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt summaries for {len(courses)} course(s) in {elapsed:.2f}s '
+                f'({AttendanceSummary.objects.count()} rows).'
+            ))
+            return
+
+        drifted = [(code, count) for (_, code), count in results if count]
+        for code, count in drifted:
+            self.stdout.write(self.style.ERROR(f'{code}: {count} scope(s) out of date'))
+        if drifted:
+            raise CommandError('Attendance summaries have drifted; run rebuild_attendance_summaries.')
+        self.stdout.write(self.style.SUCCESS(f'All summaries match for {len(courses)} course(s).'))
@@ -0,0 +1,35 @@
+"""Recompute the SearchTerm rows of students, tutors and courses.
+
+    python manage.py rebuild_search_index                     # everything
+    python manage.py rebuild_search_index --kind student      # one kind
+
+Terms are kept current on save; this is for data written around the ORM
+signals (raw SQL, fixtures loaded with loaddata --raw) or after changing the
+normalization in search.py.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance_records.models import Course, SearchTerm, Student, Tutor
+from attendance_records.search import rebuild
+
+MODELS = {'student': Student, 'tutor': Tutor, 'course': Course}
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index used by the student, tutor and course searches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', action='append', dest='kinds', choices=sorted(MODELS),
+            help='Only this kind of object (repeatable). Defaults to all.',
+        )
+
+    def handle(self, *args, **options):
+        for kind in options['kinds'] or MODELS:
+            started = time.perf_counter()
+            indexed = rebuild(MODELS[kind])
+            self.stdout.write(f'{kind}: {indexed} object(s) indexed in {time.perf_counter() - started:.2f}s')
+        self.stdout.write(self.style.SUCCESS(f'{SearchTerm.objects.count()} search terms stored.'))
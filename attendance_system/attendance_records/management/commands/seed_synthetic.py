@@ -0,0 +1,221 @@
+"""Fill the database with a production-sized synthetic dataset.
+
+Generates courses, tutors, students, enrollments and a complete attendance
+history (both semesters, weeks 1-18, for every enrollment), then brings the
+derived tables up to date: the attendance counter, the per-student
+summaries and the search index.
+
+    python manage.py seed_synthetic                                   # ~1.8M records
+    python manage.py seed_synthetic --students 50000 --courses 120    # ~9M records
+    python manage.py seed_synthetic --prefix LOAD2 --seed 7           # a second, disjoint set
+
+Attendance rows and enrollments go in through executemany() on prepared
+INSERTs, one batch at a time, rather than bulk_create(): building millions
+of model instances costs more than writing them, and SQLite caps
+bulk_create() at a few hundred rows per statement. On SQLite, index upkeep
+limits this to roughly 50k rows/s; MySQL folds each batch into multi-row
+INSERTs and goes considerably faster. Those writes bypass
+AttendanceRecordQuerySet, so the derived tables are brought up to date once
+at the end instead of per batch.
+
+Every generated ID starts with --prefix, and every synthetic student and
+tutor logs in with --passport.
+"""
+
+import datetime
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from attendance_records.models import (
+    AttendanceCounter,
+    AttendanceRecord,
+    AttendanceSummary,
+    Course,
+    Student,
+    Tutor,
+)
+from attendance_records.roster import SEMESTERS, WEEKS
+from attendance_records.search import reindex
+
+FIRST_NAMES = (
+    'Aziz', 'Bekzod', 'Dilnoza', 'Elena', 'Farrukh', 'Gulnora', 'Hana', 'Ivan', 'Jasur', 'Kamila',
+    'Laylo', 'Madina', 'Maria', 'Nodir', 'Olga', 'Pavel', 'Rustam', 'Sardor', 'Shahzod', 'Timur',
+    'Umida', 'Valentina', 'Yusuf', 'Zarina', 'Anna', 'Bobur', 'Dmitri', 'Emma', 'Kamol', 'Sevara',
+)
+LAST_NAMES = (
+    'Abdullaev', 'Azimova', 'Bakirov', 'Ergasheva', 'Garcia', 'Ibragimov', 'Ivanova', 'Karimov',
+    'Kowalski', 'Mahmudova', 'Nazarov', 'Nurmatova', 'Petrov', 'Qodirov', 'Rahimova', 'Rashidov',
+    'Saidova', 'Smirnov', 'Tashkentova', 'Tursunov', 'Umarova', 'Usmonov', 'Xolmatov', 'Yuldasheva',
+    'Zakirov', 'Orlova', 'Sultonov', 'Haydarova', 'Aliev', 'Mirzaeva',
+)
+SUBJECTS = (
+    'Algorithms', 'Databases', 'Operating Systems', 'Networks', 'Linear Algebra', 'Statistics',
+    'Calculus', 'Economics', 'Accounting', 'Marketing', 'Physics', 'Chemistry', 'Academic English',
+    'Software Engineering', 'Machine Learning', 'Computer Graphics', 'Business Law', 'Finance',
+)
+# Weeks between the first Mondays of semester 1 and semester 2
+SEMESTER_GAP_WEEKS = 22
+
+
+def _insert_sql(model, columns):
+    quote = connection.ops.quote_name
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic courses, people, enrollments and two semesters of attendance.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=40)
+        parser.add_argument('--students', type=int, default=10_000)
+        parser.add_argument('--tutors', type=int, default=80)
+        parser.add_argument('--courses-per-student', type=int, default=5)
+        parser.add_argument('--prefix', default='SYN', help='Prefix of every generated ID (default: SYN).')
+        parser.add_argument('--passport', default='synthetic', help='Login passport of every generated person.')
+        parser.add_argument(
+            '--start', type=datetime.date.fromisoformat,
+            help='Monday of week 1 of semester 1, YYYY-MM-DD (default: the Monday a year ago).',
+        )
+        parser.add_argument('--batch-size', type=int, default=20_000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if Course.objects.filter(code__startswith=f'{prefix}-').exists():
+            raise CommandError(f"IDs prefixed '{prefix}-' already exist; pick another --prefix.")
+        if not 0 < options['courses_per_student'] <= options['courses']:
+            raise CommandError('--courses-per-student must be between 1 and --courses.')
+        rng = random.Random(options['seed'])
+        start = options['start'] or self._default_start()
+        passport = make_password(options['passport'])
+        timings = {}
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            courses = self._create_courses(prefix, options['courses'], rng)
+            tutors = self._create_people(Tutor, 'tutor_id', f'{prefix}-T', options['tutors'], passport, rng)
+            students = self._create_people(Student, 'student_id', f'{prefix}-S', options['students'], passport, rng)
+            timings['people'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            enrollments = self._enroll(courses, tutors, students, options['courses_per_student'], rng)
+            timings['enrollments'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            delta = self._create_records(enrollments, start, options['batch_size'], rng)
+            timings['attendance'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            AttendanceCounter.apply(delta)
+            for course_id in courses:
+                AttendanceSummary.rebuild(course_id)
+            timings['summaries'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            reindex(Course.objects.filter(pk__in=courses))
+            reindex(Tutor.objects.filter(pk__in=tutors))
+            reindex(Student.objects.filter(pk__in=students))
+            timings['search index'] = time.perf_counter() - started
+
+        records = sum(delta.values())
+        self.stdout.write(
+            f'{len(courses)} courses, {len(tutors)} tutors, {len(students)} students, '
+            f'{len(enrollments)} enrollments, {records} attendance records'
+        )
+        for phase, seconds in timings.items():
+            self.stdout.write(f'  {phase:<13}{seconds:>8.1f}s')
+        self.stdout.write(self.style.SUCCESS(
+            f"{records / timings['attendance']:,.0f} attendance records/s; "
+            f"log in as {prefix}-S000001 / {options['passport']}"
+        ))
+
+    def _default_start(self):
+        today = timezone.localdate()
+        year_ago = today - datetime.timedelta(weeks=52)
+        return year_ago - datetime.timedelta(days=year_ago.weekday())
+
+    def _create_courses(self, prefix, count, rng):
+        Course.objects.bulk_create(
+            Course(code=f'{prefix}-C{i:04d}', name=f'{rng.choice(SUBJECTS)} {i // len(SUBJECTS) + 1}')
+            for i in range(1, count + 1)
+        )
+        return list(Course.objects.filter(code__startswith=f'{prefix}-').order_by('pk').values_list('pk', flat=True))
+
+    def _create_people(self, model, id_field, id_prefix, count, passport, rng):
+        people = []
+        for i in range(1, count + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            people.append(model(**{
+                id_field: f'{id_prefix}{i:06d}',
+                'first_name': first,
+                'last_name': last,
+                'email': f'{first}.{last}.{i}@example.edu'.lower(),
+                'passport_data': passport,
+            }))
+        model.objects.bulk_create(people, batch_size=1000)
+        return list(
+            model.objects.filter(**{f'{id_field}__startswith': id_prefix}).order_by('pk').values_list('pk', flat=True)
+        )
+
+    def _enroll(self, courses, tutors, students, per_student, rng):
+        """Insert tutor and student enrollments; return the (student, course) pairs."""
+        # Every course gets a tutor, then the remaining tutors pick one at random
+        teaching = [(tutors[i % len(tutors)], course) for i, course in enumerate(courses)] if tutors else []
+        teaching += [(tutor, rng.choice(courses)) for tutor in tutors[len(courses):]]
+        enrollments = [(student, course) for student in students for course in rng.sample(courses, per_student)]
+        with connection.cursor() as cursor:
+            cursor.executemany(_insert_sql(Tutor.courses.through, ('tutor_id', 'course_id')), sorted(set(teaching)))
+            cursor.executemany(_insert_sql(Student.courses.through, ('student_id', 'course_id')), enrollments)
+        return enrollments
+
+    def _create_records(self, enrollments, start, batch_size, rng):
+        """Insert a full attendance history per enrollment; return the rows written per status."""
+        columns = ('student_id', 'course_id', 'semester', 'week', 'date', 'status', 'notes', 'created_at')
+        sql = _insert_sql(AttendanceRecord, columns)
+        ops = connection.ops
+        present, absent, excused = AttendanceRecord.STATUS_PRESENT, AttendanceRecord.STATUS_ABSENT, AttendanceRecord.STATUS_EXCUSED
+        # The meeting day and time of each course, and its adapted values per (semester, week)
+        slots = {}
+        for course in {course for _, course in enrollments}:
+            weekday, hour = rng.randrange(5), rng.randrange(8, 18)
+            for semester in SEMESTERS:
+                for week in range(1, WEEKS + 1):
+                    day = start + datetime.timedelta(
+                        weeks=(semester - 1) * SEMESTER_GAP_WEEKS + week - 1, days=weekday
+                    )
+                    marked = timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+                    slots[course, semester, week] = (
+                        ops.adapt_datefield_value(day), ops.adapt_datetimefield_value(marked)
+                    )
+
+        delta = Counter()
+        batch = []
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                # Eight indexes are updated per row; a 256 MB page cache keeps them off the disk
+                cursor.execute('PRAGMA cache_size = -262144')
+            for student, course in enrollments:
+                # Each student attends at their own rate; absences outnumber excused ones 3:1
+                rate = rng.betavariate(8, 1.5)
+                for semester in SEMESTERS:
+                    for week in range(1, WEEKS + 1):
+                        roll = rng.random()
+                        status = present if roll < rate else absent if roll < rate + (1 - rate) * 0.75 else excused
+                        day, marked = slots[course, semester, week]
+                        batch.append((student, course, semester, week, day, status, '', marked))
+                        delta[status] += 1
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            cursor.executemany(sql, batch)
+        return dict(delta)
@@ -0,0 +1,71 @@
+"""Prometheus metrics, aggregated across gunicorn workers.
+
+gunicorn runs several worker processes, so counters kept in one process only
+describe that worker. With PROMETHEUS_MULTIPROC_DIR set (gunicorn_config.py
+sets and clears it when the master starts) prometheus_client writes every
+value to a memory-mapped file per worker, and /metrics merges the files of
+all workers, live and dead, into one exposition. Without it (runserver,
+management commands) the metrics stay in-process.
+
+The variable has to be set before prometheus_client is first imported, which
+is why it is exported from the gunicorn config rather than settings.py.
+
+Ratios such as the cache hit ratio are left to the query side:
+
+    sum by (cache) (rate(attendance_cache_requests_total{result="hit"}[5m]))
+      / sum by (cache) (rate(attendance_cache_requests_total[5m]))
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+UNRESOLVED = '<unresolved>'
+# Request methods labelled as themselves; any other token a client sends is 'other'
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+OTHER_METHOD = 'other'
+
+REQUEST_LATENCY = Histogram(
+    'attendance_request_duration_seconds', 'Time to produce a response, per URL name.',
+    ['view', 'method'],
+)
+REQUEST_QUERIES = Histogram(
+    'attendance_request_queries', 'SQL statements run per request, per URL name.',
+    ['view'], buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+CACHE_REQUESTS = Counter(
+    'attendance_cache_requests', 'Lookups in the application caches, by cache and hit or miss.',
+    ['cache', 'result'],
+)
+LOGIN_ATTEMPTS = Counter(
+    'attendance_login_attempts', 'Login attempts, by outcome.',
+    ['result'],
+)
+ROLL_CALL_SIZE = Histogram(
+    'attendance_roll_call_size', 'Students marked or removed per roll-call submit.',
+    buckets=(0, 5, 10, 20, 30, 50, 75, 100, 150, 250),
+)
+
+
+def record_cache_lookup(cache_name, value):
+    """Count a cache lookup as a hit or miss and hand the looked-up value back."""
+    CACHE_REQUESTS.labels(cache_name, 'miss' if value is None else 'hit').inc()
+    return value
+
+
+def exposition():
+    """The current metrics in the text format, merged across workers when running multi-process."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -8,30 +8,222 @@ Roles set on request.user_role:
 - 'anonymous': not authenticated
 
 This allows templates and views to render different content depending on role.
+The role is kept on the user object for the request and, with a shared
+CACHE_BACKEND, cached per user across requests; the User row itself is never
+cached (see roles.py).
+
+RequestTimingMiddleware reports where a request's time went,
+MetricsMiddleware feeds the Prometheus request metrics and
+ReplicaRoutingMiddleware decides which requests may read from a replica; see
+their docstrings.
 """
 
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.utils.deprecation import MiddlewareMixin
 
+from .instrumentation import RequestTimings, current_timings
+from .metrics import METHODS, OTHER_METHOD, REQUEST_LATENCY, REQUEST_QUERIES, UNRESOLVED
+from .roles import ROLE_ANONYMOUS, get_user_role
+from .routers import PIN_COOKIE, READ_METHODS, RoutingState, allows_replica_reads, current_routing
+
+logger = logging.getLogger(__name__)
+
 
 class RoleMiddleware(MiddlewareMixin):
     def process_request(self, request):
-        role = 'anonymous'
-        user = getattr(request, 'user', None)
-
-        if user and user.is_authenticated:
-            try:
-                if user.is_superuser or user.is_staff:
-                    role = 'admin'
-                elif user.groups.filter(name='Tutors').exists():
-                    role = 'tutor'
-                elif user.groups.filter(name='Students').exists():
-                    role = 'student'
-                else:
-                    # Fallback role for authenticated users without groups
-                    role = 'student'
-            except Exception:
-                # In case auth system not ready, default to anonymous
-                role = 'anonymous'
+        try:
+            role = get_user_role(getattr(request, 'user', None))
+        except Exception:
+            # In case auth system not ready, default to anonymous
+            role = ROLE_ANONYMOUS
 
         request.user_role = role
         return None
+
+
+class InstrumentedMiddleware:
+    """
+    Runs get_response with a RequestTimings collecting the request's queries.
+
+    Works in sync and async mode. Queries are captured by
+    instrumentation.query_hook through a context variable, which follows the
+    request into the threads the async ORM runs queries on. When an outer
+    middleware already started a collection, it is shared rather than
+    restarted. Subclasses implement measure().
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token = self._start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                current_timings.reset(token)
+        return self.measure(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings, token = self._start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                current_timings.reset(token)
+        return self.measure(request, response, timings, time.perf_counter() - started)
+
+    def _start(self):
+        timings = current_timings.get()
+        if timings is not None:
+            return timings, None
+        timings = RequestTimings()
+        return timings, current_timings.set(timings)
+
+    def measure(self, request, response, timings, total):
+        raise NotImplementedError
+
+
+class RequestTimingMiddleware(InstrumentedMiddleware):
+    """Query count, DB, view and template time per request, as Server-Timing and a slow-request log.
+
+    Enabled with REQUEST_TIMING; otherwise Django drops it from the stack at
+    startup and requests never reach it. Every response then carries
+
+        Server-Timing: db;dur=12.4;desc="9 queries", view;dur=30.1, render;dur=8.2, total;dur=41.0
+
+    (milliseconds; db overlaps view and render, which are disjoint). Template
+    time is only measured with the TimedDjangoTemplates backend (see
+    instrumentation.py). A request over SLOW_REQUEST_MS or
+    SLOW_REQUEST_QUERIES is logged as a warning on this module's logger with
+    its most repeated SQL statements, which is how an N+1 loop shows up.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.slow_seconds = settings.SLOW_REQUEST_MS / 1000
+        self.slow_queries = settings.SLOW_REQUEST_QUERIES
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+    def measure(self, request, response, timings, total):
+        view_started = getattr(request, '_view_started', None)
+        view = time.perf_counter() - view_started - timings.render if view_started else 0.0
+        response['Server-Timing'] = (
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.query_count} queries", '
+            f'view;dur={view * 1000:.1f}, render;dur={timings.render * 1000:.1f}, total;dur={total * 1000:.1f}'
+        )
+        if total >= self.slow_seconds or timings.query_count >= self.slow_queries:
+            self._log_slow(request, response, timings, total, view)
+        return response
+
+    def _log_slow(self, request, response, timings, total, view):
+        lines = [
+            f'Slow request {request.method} {request.get_full_path()} -> {response.status_code}: '
+            f'{total * 1000:.0f} ms total, {timings.query_count} queries in {timings.db * 1000:.0f} ms, '
+            f'view {view * 1000:.0f} ms, render {timings.render * 1000:.0f} ms'
+        ]
+        lines.extend(f'  {count}x {sql}' for count, sql in timings.duplicates())
+        logger.warning('\n'.join(lines))
+
+
+class MetricsMiddleware(InstrumentedMiddleware):
+    """Latency and query count per request, labelled with the URL name (see metrics.py).
+
+    Sits first in MIDDLEWARE so the session and user loads count too.
+    Requests that match no URL are labelled '<unresolved>' and methods
+    outside metrics.METHODS 'other', which keeps the label set bounded.
+    Disabled with METRICS=False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def measure(self, request, response, timings, total):
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED
+        method = request.method if request.method in METHODS else OTHER_METHOD
+        REQUEST_LATENCY.labels(view, method).observe(total)
+        REQUEST_QUERIES.labels(view).observe(timings.query_count)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Per-request state for ReplicaRouter (see routers.py).
+
+    A request starts pinned to the primary when it is not a GET or HEAD, or
+    when the client carries the pin cookie from a recent write. process_view
+    enables replica reads for views marked with @replica_reads; a request
+    that writes sets the cookie for REPLICA_PIN_SECONDS. Not installed when
+    there are no replicas.
+
+    Streamed response bodies are produced after the middleware returns and
+    read from the primary.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self._finish(response, state)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self._finish(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = current_routing.get()
+        if state is not None and allows_replica_reads(view_func):
+            state.replica = True
+
+    def _start(self, request):
+        state = RoutingState(
+            random.choice(settings.DATABASE_REPLICAS),
+            pinned=request.method not in READ_METHODS or PIN_COOKIE in request.COOKIES,
+        )
+        return state, current_routing.set(state)
+
+    def _finish(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
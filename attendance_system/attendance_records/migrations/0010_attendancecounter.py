@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:39
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counter(apps, schema_editor):
+    AttendanceRecord = apps.get_model('attendance_records', 'AttendanceRecord')
+    AttendanceCounter = apps.get_model('attendance_records', 'AttendanceCounter')
+    db = schema_editor.connection.alias
+    totals = AttendanceRecord.objects.using(db).aggregate(
+        present=Count('pk', filter=Q(status='P')),
+        absent=Count('pk', filter=Q(status='A')),
+        excused=Count('pk', filter=Q(status='E')),
+    )
+    AttendanceCounter.objects.using(db).create(pk=1, **totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_records', '0009_alter_attendancerecord_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.BigIntegerField(default=0)),
+                ('absent', models.BigIntegerField(default=0)),
+                ('excused', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_counter, migrations.RunPython.noop),
+    ]
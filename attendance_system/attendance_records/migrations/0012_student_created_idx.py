@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_records', '0011_attendancerecord_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_at'], name='student_created_idx'),
+        ),
+    ]
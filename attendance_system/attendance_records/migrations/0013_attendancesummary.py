@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def populate_summaries(apps, schema_editor):
+    AttendanceRecord = apps.get_model('attendance_records', 'AttendanceRecord')
+    AttendanceSummary = apps.get_model('attendance_records', 'AttendanceSummary')
+    db = schema_editor.connection.alias
+    grouped = AttendanceRecord.objects.using(db).order_by().values('student_id', 'course_id', 'semester').annotate(
+        present=Count('pk', filter=Q(status='P')),
+        absent=Count('pk', filter=Q(status='A')),
+        excused=Count('pk', filter=Q(status='E')),
+        last_week=Max('week'),
+    )
+    AttendanceSummary.objects.using(db).bulk_create(
+        (AttendanceSummary(**row) for row in grouped.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_records', '0012_student_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.IntegerField(choices=[(1, 'Semester 1'), (2, 'Semester 2')])),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('excused', models.PositiveIntegerField(default=0)),
+                ('last_week', models.PositiveSmallIntegerField(blank=True, help_text='Latest week marked', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='attendance_records.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='attendance_records.student')),
+            ],
+            options={
+                'verbose_name_plural': 'attendance summaries',
+                'indexes': [models.Index(fields=['course', 'semester'], name='summary_course_idx')],
+                'unique_together': {('student', 'course', 'semester')},
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
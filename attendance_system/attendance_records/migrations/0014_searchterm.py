@@ -0,0 +1,87 @@
+# Generated by Django 5.2.9 on 2026-10-17 07:13
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# The tokenizer of attendance_records/search.py as of this migration, inlined
+# so later changes to it do not change what this migration writes
+TERM_LENGTH = 64
+SEPARATORS = re.compile(r'[\W_]+')
+LETTERS_OR_DIGITS = re.compile(r'\d+|[^\W\d_]+')
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', str(text or '')).casefold()
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return [token[:TERM_LENGTH] for token in SEPARATORS.split(stripped) if token]
+
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def terms_for(values):
+    tokens, grams = set(), set()
+    for value in values:
+        value = str(value or '')
+        if '@' in value:
+            value = value.split('@', 1)[0]
+        parts = normalize(value)
+        for part in parts:
+            pieces = LETTERS_OR_DIGITS.findall(part)
+            words = [part, *pieces] if len(pieces) > 1 else [part]
+            tokens.update(words)
+            grams.update(*(trigrams(word) for word in words))
+        if len(parts) > 1 and ' ' not in value.strip():
+            tokens.add(''.join(parts)[:TERM_LENGTH])
+    return tokens, grams
+
+
+INDEXED = (
+    ('Student', 'S', ('student_id', 'first_name', 'last_name', 'email')),
+    ('Tutor', 'T', ('tutor_id', 'first_name', 'last_name', 'email')),
+    ('Course', 'C', ('code', 'name')),
+)
+
+
+def populate_search_terms(apps, schema_editor):
+    SearchTerm = apps.get_model('attendance_records', 'SearchTerm')
+    db = schema_editor.connection.alias
+
+    terms = []
+    for model_name, kind, fields in INDEXED:
+        model = apps.get_model('attendance_records', model_name)
+        for pk, *values in model.objects.using(db).order_by().values_list('pk', *fields).iterator():
+            tokens, grams = terms_for(values)
+            terms.extend(SearchTerm(kind=kind, object_id=pk, term=token) for token in tokens)
+            terms.extend(SearchTerm(kind=kind, object_id=pk, term_type='G', term=gram) for gram in grams)
+            if len(terms) >= 10_000:
+                SearchTerm.objects.using(db).bulk_create(terms, batch_size=1000)
+                terms = []
+    SearchTerm.objects.using(db).bulk_create(terms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_records', '0013_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('S', 'Student'), ('T', 'Tutor'), ('C', 'Course')], max_length=1)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('term_type', models.CharField(choices=[('W', 'Token'), ('G', 'Trigram')], default='W', max_length=1)),
+                ('term', models.CharField(max_length=64)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term_type', 'term', 'object_id'], name='search_term_idx'), models.Index(fields=['object_id', 'kind', 'term_type', 'term'], name='search_object_idx')],
+            },
+        ),
+        migrations.RunPython(populate_search_terms, migrations.RunPython.noop),
+    ]
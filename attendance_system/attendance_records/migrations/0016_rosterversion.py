@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-17 08:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_records', '0015_student_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.IntegerField(choices=[(1, 'Semester 1'), (2, 'Semester 2')])),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roster_versions', to='attendance_records.course')),
+            ],
+            options={
+                'unique_together': {('course', 'semester')},
+            },
+        ),
+    ]
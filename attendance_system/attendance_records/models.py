@@ -1,14 +1,84 @@
-from django.db import models
+import datetime
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, models, router, transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.expressions import Combinable
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.hashers import make_password, check_password
+from django.utils import timezone
+from .signals import attendance_changed
+
+def _related_count(queryset, field, outer_ref='pk', **filters):
+    """Correlated COUNT(*) over `queryset` rows whose `field` equals the outer row's `outer_ref`."""
+    counted = (
+        queryset.filter(**{field: OuterRef(outer_ref)}, **filters)
+        .order_by()
+        .values(field)
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def _summary_sum(field, expression, outer_ref='pk'):
+    """Coalesced subquery summing `expression` over the AttendanceSummary rows of the outer object."""
+    summed = (
+        AttendanceSummary.objects.filter(**{field: OuterRef(outer_ref)})
+        .order_by()
+        .values(field)
+        .annotate(total=Sum(expression))
+        .values('total')
+    )
+    return Coalesce(Subquery(summed, output_field=IntegerField()), Value(0))
+
+
+def _summary_records():
+    return F('present') + F('absent') + F('excused')
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_stats(self, *names):
+        """
+        Annotate num_students and num_records without joining both relations at once.
+
+        Pass names to annotate only some of them (sparse API fieldsets).
+        """
+        names = names or ('num_students', 'num_records')
+        figures = {}
+        if 'num_students' in names:
+            figures['num_students'] = _related_count(Student.courses.through.objects, 'course')
+        if 'num_records' in names:
+            figures['num_records'] = _summary_sum('course', _summary_records())
+        return self.annotate(**figures)
+
 
 class Course(models.Model):
     name = models.CharField(max_length=200)
     code = models.CharField(max_length=20, unique=True)
 
+    objects = CourseQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.code} - {self.name}"
 
 
+class StudentQuerySet(models.QuerySet):
+    def with_attendance_stats(self):
+        """
+        Annotate num_records and num_present from the student's AttendanceSummary rows.
+
+        Correlated per-row sums rather than a JOIN + GROUP BY, so a page of
+        students only reads the summaries of the students on it.
+        """
+        return self.annotate(
+            num_records=_summary_sum('student', _summary_records()),
+            num_present=_summary_sum('student', F('present')),
+        )
+
+
 class Student(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
@@ -18,8 +88,16 @@ class Student(models.Model):
     courses = models.ManyToManyField(Course, related_name='students', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = StudentQuerySet.as_manager()
+
     class Meta:
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Cursor pages of the student API (see OptionalCursorPagination)
+            models.Index(fields=['created_at'], name='student_created_idx'),
+            # The default ordering: student lists, admin changelist and pickers
+            models.Index(fields=['last_name', 'first_name'], name='student_name_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.student_id})"
@@ -57,6 +135,269 @@ class Tutor(models.Model):
         return check_password(raw_password, self.passport_data)
 
 
+def _merge_delta(delta, status, change):
+    delta[status] = delta.get(status, 0) + change
+    return delta
+
+
+def _scope_change(changes, scope):
+    return changes.setdefault(scope, {'delta': {}, 'week': None, 'removed': False})
+
+
+def record_added(changes, scope, status, week):
+    """Note a new record in `scope` for attendance_changed's per-scope `changes`."""
+    change = _scope_change(changes, scope)
+    _merge_delta(change['delta'], status, 1)
+    if week is not None and (change['week'] is None or week > change['week']):
+        change['week'] = week
+
+
+def record_removed(changes, scope, status, count=1):
+    """Note records deleted from, or moved out of, `scope`."""
+    change = _scope_change(changes, scope)
+    _merge_delta(change['delta'], status, -count)
+    change['removed'] = True
+
+
+def status_changed(changes, scope, previous, status, count=1):
+    """Note records in `scope` whose status alone changed."""
+    change = _scope_change(changes, scope)
+    _merge_delta(change['delta'], previous, -count)
+    _merge_delta(change['delta'], status, count)
+
+
+def _scope(record):
+    return (record.student_id, record.course_id, record.semester)
+
+
+class AttendanceRecordQuerySet(models.QuerySet):
+    # Writes that touch none of these leave every derived figure unchanged
+    TRACKED_FIELDS = frozenset({'status', 'week', 'semester', 'student', 'student_id', 'course', 'course_id'})
+    # Changing these moves a record to another (student, course, semester) scope
+    SCOPE_FIELDS = frozenset({'semester', 'student', 'student_id', 'course', 'course_id'})
+
+    def status_totals(self):
+        """Row count per status code for this queryset, in one conditional aggregation."""
+        totals = self.order_by().aggregate(**{
+            code: Count('pk', filter=Q(status=code))
+            for code, _ in AttendanceRecord.STATUS_CHOICES
+        })
+        return {code: totals[code] or 0 for code in totals}
+
+    def scoped_totals(self):
+        """
+        Row count per status code, overall and per (student, course, semester)
+        scope, from one grouped query.
+        """
+        totals = {code: 0 for code, _ in AttendanceRecord.STATUS_CHOICES}
+        by_scope = defaultdict(dict)
+        grouped = (
+            self.order_by()
+            .values_list('student_id', 'course_id', 'semester', 'status')
+            .annotate(rows=Count('pk'))
+        )
+        for student_id, course_id, semester, status, rows in grouped:
+            totals[status] = totals.get(status, 0) + rows
+            by_scope[student_id, course_id, semester][status] = rows
+        return totals, by_scope
+
+    def _scopes_of(self, objs):
+        """Scopes of the given records, loading deferred values in one query."""
+        scopes, deferred = set(), []
+        for obj in objs:
+            if {'student_id', 'course_id', 'semester'} <= obj.__dict__.keys():
+                scopes.add(_scope(obj))
+            else:
+                deferred.append(obj.pk)
+        if deferred:
+            scopes.update(
+                AttendanceRecord.objects.using(self.db).filter(pk__in=deferred).order_by()
+                .values_list('student_id', 'course_id', 'semester').distinct()
+            )
+        return scopes
+
+    # bulk_update() is implemented on top of update(); a muted queryset lets the
+    # outer call report the change once instead of both layers reporting it.
+    _changes_muted = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._changes_muted = self._changes_muted
+        return clone
+
+    def _send_changed(self, delta, scopes, changes):
+        if self._changes_muted:
+            return
+        if delta is None or scopes is None or any(delta.values()) or scopes:
+            attendance_changed.send(sender=self.model, delta=delta, scopes=scopes, changes=changes)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+            # Skipped or upserted rows are not reported back; recount.
+            delta = changes = None
+        else:
+            delta, changes = {}, {}
+            for obj in objs:
+                _merge_delta(delta, obj.status, 1)
+                record_added(changes, _scope(obj), obj.status, obj.week)
+                obj._loaded_status = obj.status
+        self._send_changed(delta, {_scope(obj) for obj in objs}, changes)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        muted = self._chain()
+        muted._changes_muted = True
+        rows = super(AttendanceRecordQuerySet, muted).bulk_update(objs, fields, *args, **kwargs)
+        tracked = self.TRACKED_FIELDS.intersection(fields)
+        if tracked:
+            delta = {}
+            # Per-scope changes are only derived for status-only updates of
+            # records whose scope is loaded; anything else is recounted
+            changes = {} if tracked == {'status'} else None
+            if 'status' in fields:
+                for obj in objs:
+                    previous = getattr(obj, '_loaded_status', None)
+                    if previous is None:
+                        delta = changes = None
+                        break
+                    if previous != obj.status:
+                        _merge_delta(delta, previous, -1)
+                        _merge_delta(delta, obj.status, 1)
+                        if changes is not None:
+                            if {'student_id', 'course_id', 'semester'} <= obj.__dict__.keys():
+                                status_changed(changes, _scope(obj), previous, obj.status)
+                            else:
+                                changes = None
+                for obj in objs:
+                    obj._loaded_status = obj.status
+            # Records moved between scopes leave their old scope unknown
+            scopes = None if self.SCOPE_FIELDS.intersection(fields) else self._scopes_of(objs)
+            self._send_changed(delta, scopes, changes)
+        return rows
+
+    def update(self, **kwargs):
+        if self._changes_muted or not self.TRACKED_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            totals, by_scope = self.scoped_totals()
+            scopes = set(by_scope)
+            new_status = kwargs.get('status')
+            changes = None
+            if 'status' not in kwargs:
+                delta = {}
+            elif isinstance(new_status, Combinable):
+                delta = None
+            else:
+                delta = {}
+                for status, count in totals.items():
+                    _merge_delta(delta, status, -count)
+                    _merge_delta(delta, new_status, count)
+                if self.TRACKED_FIELDS.intersection(kwargs) == {'status'}:
+                    changes = {}
+                    for scope, counts in by_scope.items():
+                        for status, count in counts.items():
+                            status_changed(changes, scope, status, new_status, count)
+            if self.SCOPE_FIELDS.intersection(kwargs):
+                scopes = None
+            rows = super().update(**kwargs)
+            self._send_changed(delta, scopes, changes)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            totals, by_scope = self.scoped_totals()
+            changes = {}
+            for scope, counts in by_scope.items():
+                for status, count in counts.items():
+                    record_removed(changes, scope, status, count)
+            result = super().delete()
+            self._send_changed({status: -count for status, count in totals.items()}, set(by_scope), changes)
+        return result
+
+    def created_on(self, day):
+        """
+        Records created on `day` in the current time zone.
+
+        Written as a half-open range on created_at rather than created_at__date,
+        which wraps the column in a date cast and rules out its index.
+        """
+        start = datetime.datetime.combine(day, datetime.time.min)
+        end = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min)
+        if settings.USE_TZ:
+            start, end = timezone.make_aware(start), timezone.make_aware(end)
+        return self.filter(created_at__gte=start, created_at__lt=end)
+
+    def with_related_stats(self, *relations):
+        """
+        Join student and course and annotate their aggregate figures on each row.
+
+        The figures are prefixed (student_num_records, course_num_students, ...)
+        and handed down to the nested serializers, so a page of records costs a
+        single query however large it is. Pass 'student' and/or 'course' to
+        join and annotate only those.
+        """
+        relations = relations or ('student', 'course')
+        figures = {}
+        if 'student' in relations:
+            figures.update(
+                student_num_records=_summary_sum('student', _summary_records(), 'student'),
+                student_num_present=_summary_sum('student', F('present'), 'student'),
+            )
+        if 'course' in relations:
+            figures.update(
+                course_num_students=_related_count(Student.courses.through.objects, 'course', 'course'),
+                course_num_records=_summary_sum('course', _summary_records(), 'course'),
+            )
+        return self.select_related(*relations).annotate(**figures)
+
+    def apply_roll_call(self, course, semester, week, statuses, removals=()):
+        """
+        Apply a whole roll-call for one (course, semester, week) as one batch.
+
+        statuses maps student pk -> status code, removals holds the student pks
+        whose record should be deleted. Existing rows are read once, new rows are
+        bulk inserted, only rows whose status changed are bulk updated and all
+        removals go out in a single DELETE. Returns (created, updated, deleted).
+        """
+        with transaction.atomic(using=self.db):
+            scope = self.filter(course=course, semester=semester, week=week).order_by()
+            existing = {
+                record.student_id: record
+                for record in scope.select_for_update().only('id', 'student_id', 'course_id', 'semester', 'status')
+            }
+
+            to_create = []
+            to_update = []
+            for student_id, status in statuses.items():
+                if student_id in removals:
+                    continue
+                record = existing.get(student_id)
+                if record is None:
+                    to_create.append(self.model(
+                        student_id=student_id,
+                        course=course,
+                        semester=semester,
+                        week=week,
+                        status=status,
+                    ))
+                elif record.status != status:
+                    record.status = status
+                    to_update.append(record)
+
+            to_delete = [existing[pk].pk for pk in removals if pk in existing]
+
+            if to_create:
+                self.bulk_create(to_create)
+            if to_update:
+                self.bulk_update(to_update, ['status'])
+            if to_delete:
+                self.filter(pk__in=to_delete).delete()
+
+        return len(to_create), len(to_update), len(to_delete)
+
+
 class AttendanceRecord(models.Model):
     STATUS_PRESENT = 'P'
     STATUS_ABSENT = 'A'
@@ -79,9 +420,344 @@ class AttendanceRecord(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = AttendanceRecordQuerySet.as_manager()
+
     class Meta:
         ordering = ['-semester', '-week', 'student']
         unique_together = ('student', 'course', 'semester', 'week')
+        # The unique index above already serves lookups by student and by
+        # (student, course), e.g. the student dashboard.
+        indexes = [
+            # Roll call reads and writes one course/semester/week at a time
+            models.Index(fields=['course', 'semester', 'week'], name='attendance_course_week_idx'),
+            # Admin attendance list without a course filter, newest week first
+            models.Index(fields=['semester', 'week'], name='attendance_week_idx'),
+            # API lists and exports: newest first, overall or per student/course,
+            # and created-on-day ranges
+            models.Index(fields=['created_at'], name='attendance_created_idx'),
+            models.Index(fields=['student', 'created_at'], name='attendance_student_created_idx'),
+            models.Index(fields=['course', 'created_at'], name='attendance_course_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Sem {self.semester} Week {self.week} - {self.student} - {self.get_status_display()}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status, scope and week so saves can report what
+        # actually changed
+        loaded = instance.__dict__
+        instance._loaded_status = loaded.get('status')
+        instance._loaded_scope = (loaded.get('student_id'), loaded.get('course_id'), loaded.get('semester'))
+        instance._loaded_week = loaded.get('week')
+        return instance
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=self._state.db):
+            status = getattr(self, '_loaded_status', None) or self.status
+            scope = _scope(self)
+            result = super().delete(*args, **kwargs)
+            changes = {}
+            record_removed(changes, scope, status)
+            attendance_changed.send(sender=type(self), delta={status: -1}, scopes={scope}, changes=changes)
+        return result
+
+
+class AttendanceCounter(models.Model):
+    """
+    Running AttendanceRecord totals per status, kept in a single row.
+
+    Maintained incrementally from attendance_changed (see receivers.py), so
+    /api/stats/ reads one row instead of scanning the attendance table. The
+    rebuild_attendance_counters command recomputes it and reports drift.
+    """
+    SINGLETON_PK = 1
+    FIELD_BY_STATUS = {
+        AttendanceRecord.STATUS_PRESENT: 'present',
+        AttendanceRecord.STATUS_ABSENT: 'absent',
+        AttendanceRecord.STATUS_EXCUSED: 'excused',
+    }
+
+    present = models.BigIntegerField(default=0)
+    absent = models.BigIntegerField(default=0)
+    excused = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.total} records ({self.present} P / {self.absent} A / {self.excused} E)"
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.excused
+
+    @classmethod
+    def current(cls):
+        counter = cls.objects.filter(pk=cls.SINGLETON_PK).first()
+        return counter if counter is not None else cls.rebuild()
+
+    @classmethod
+    async def acurrent(cls):
+        counter = await cls.objects.filter(pk=cls.SINGLETON_PK).afirst()
+        return counter if counter is not None else await sync_to_async(cls.rebuild)()
+
+    @classmethod
+    def apply(cls, delta):
+        """Add a status -> change mapping; a None delta triggers a full recount."""
+        if delta is None:
+            cls.rebuild()
+            return
+        changes = {
+            cls.FIELD_BY_STATUS[status]: F(cls.FIELD_BY_STATUS[status]) + change
+            for status, change in delta.items()
+            if change and status in cls.FIELD_BY_STATUS
+        }
+        if changes and not cls.objects.filter(pk=cls.SINGLETON_PK).update(**changes):
+            cls.rebuild()
+
+    @classmethod
+    def expected(cls):
+        totals = AttendanceRecord.objects.status_totals()
+        return {field: totals[status] for status, field in cls.FIELD_BY_STATUS.items()}
+
+    @classmethod
+    def rebuild(cls):
+        counter, _ = cls.objects.update_or_create(pk=cls.SINGLETON_PK, defaults=cls.expected())
+        return counter
+
+class AttendanceSummary(models.Model):
+    """
+    Attendance totals per (student, course, semester), derived from AttendanceRecord.
+
+    Each write reports its per-scope changes through attendance_changed and
+    receivers.py adds them to the affected rows with F() increments, so
+    writers touching one scope at once cannot overwrite each other's counts
+    and percentages are read from a row or two instead of counting records.
+    Writes whose changes are unknown recount their scopes with the rows
+    locked. rebuild_attendance_summaries recomputes the table from scratch.
+    """
+    REFRESH_BATCH = 500
+    STORED_FIELDS = ('present', 'absent', 'excused', 'last_week')
+    FIELD_BY_STATUS = AttendanceCounter.FIELD_BY_STATUS
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_summaries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendance_summaries')
+    semester = models.IntegerField(choices=AttendanceRecord.SEMESTER_CHOICES)
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    excused = models.PositiveIntegerField(default=0)
+    last_week = models.PositiveSmallIntegerField(null=True, blank=True, help_text='Latest week marked')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'course', 'semester')
+        indexes = [
+            models.Index(fields=['course', 'semester'], name='summary_course_idx'),
+        ]
+        verbose_name_plural = 'attendance summaries'
+
+    def __str__(self):
+        return f"{self.student} - {self.course} - Sem {self.semester}: {self.percentage}%"
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.excused
+
+    @property
+    def percentage(self):
+        return round(self.present / self.total * 100, 2) if self.total else 0
+
+    @classmethod
+    def compute(cls, records):
+        """Map each scope in an AttendanceRecord queryset to its stored field values."""
+        grouped = records.order_by().values_list('student_id', 'course_id', 'semester').annotate(
+            present=Count('pk', filter=Q(status=AttendanceRecord.STATUS_PRESENT)),
+            absent=Count('pk', filter=Q(status=AttendanceRecord.STATUS_ABSENT)),
+            excused=Count('pk', filter=Q(status=AttendanceRecord.STATUS_EXCUSED)),
+            last_week=Max('week'),
+        )
+        return {tuple(row[:3]): tuple(row[3:]) for row in grouped}
+
+    @staticmethod
+    def _scope_filter(scopes):
+        students = defaultdict(list)
+        for student_id, course_id, semester in scopes:
+            students[course_id, semester].append(student_id)
+        condition = Q()
+        for (course_id, semester), student_ids in students.items():
+            condition |= Q(course_id=course_id, semester=semester, student_id__in=student_ids)
+        return condition
+
+    @classmethod
+    def _store(cls, computed):
+        if not computed:
+            return
+        options = {'update_conflicts': True, 'update_fields': [*cls.STORED_FIELDS, 'updated_at']}
+        if connections[router.db_for_write(cls)].features.supports_update_conflicts_with_target:
+            options['unique_fields'] = ['student', 'course', 'semester']
+        cls.objects.bulk_create(
+            [
+                cls(student_id=student_id, course_id=course_id, semester=semester, **dict(zip(cls.STORED_FIELDS, values)))
+                for (student_id, course_id, semester), values in computed.items()
+            ],
+            batch_size=cls.REFRESH_BATCH,
+            **options,
+        )
+
+    @classmethod
+    def apply(cls, changes):
+        """Add attendance_changed's per-scope `changes` to the stored rows."""
+        if not changes:
+            return
+        # Scopes that gained records may not have a row yet
+        added = [scope for scope, change in changes.items() if change['week'] is not None]
+        cls.objects.bulk_create(
+            [cls(student_id=student_id, course_id=course_id, semester=semester) for student_id, course_id, semester in added],
+            batch_size=cls.REFRESH_BATCH,
+            ignore_conflicts=True,
+        )
+        # One UPDATE per distinct change: a roll-call needs one per status
+        groups = defaultdict(list)
+        for scope, change in changes.items():
+            increments = tuple(sorted(
+                (cls.FIELD_BY_STATUS[status], n) for status, n in change['delta'].items()
+                if n and status in cls.FIELD_BY_STATUS
+            ))
+            if increments or change['week'] is not None:
+                groups[increments, change['week']].append(scope)
+        now = timezone.now()
+        for (increments, week), scopes in groups.items():
+            values = {field: F(field) + n for field, n in increments}
+            if week is not None:
+                values['last_week'] = Greatest(
+                    Coalesce('last_week', Value(0)), Value(week), output_field=models.PositiveSmallIntegerField(),
+                )
+            for start in range(0, len(scopes), cls.REFRESH_BATCH):
+                batch = scopes[start:start + cls.REFRESH_BATCH]
+                cls.objects.filter(cls._scope_filter(batch)).update(updated_at=now, **values)
+
+        # Removed records may have held the latest week, or been the last ones
+        removed = [scope for scope, change in changes.items() if change['removed']]
+        latest_week = AttendanceRecord.objects.filter(
+            student=OuterRef('student'), course=OuterRef('course'), semester=OuterRef('semester'),
+        ).order_by('-week').values('week')[:1]
+        for start in range(0, len(removed), cls.REFRESH_BATCH):
+            batch = cls._scope_filter(removed[start:start + cls.REFRESH_BATCH])
+            cls.objects.filter(batch).update(last_week=Subquery(latest_week))
+            cls.objects.filter(batch, present=0, absent=0, excused=0).delete()
+
+    @classmethod
+    def refresh(cls, scopes):
+        """Recompute the given (student, course, semester) scopes; None rebuilds everything."""
+        if scopes is None:
+            cls.rebuild()
+            return
+        scopes = list(scopes)
+        for start in range(0, len(scopes), cls.REFRESH_BATCH):
+            batch = scopes[start:start + cls.REFRESH_BATCH]
+            with transaction.atomic():
+                # Held until the writer's transaction ends, so a concurrent
+                # refresh of the same rows waits instead of overwriting this one
+                list(cls.objects.filter(cls._scope_filter(batch)).select_for_update().values_list('pk', flat=True))
+                computed = cls.compute(AttendanceRecord.objects.filter(cls._scope_filter(batch)))
+                cls._store(computed)
+                emptied = [scope for scope in batch if scope not in computed]
+                if emptied:
+                    cls.objects.filter(cls._scope_filter(emptied)).delete()
+
+    @classmethod
+    def rebuild(cls, course=None):
+        """Recompute all rows of one course, or of every course one at a time."""
+        if course is None:
+            for course_id in Course.objects.order_by('pk').values_list('pk', flat=True):
+                cls.rebuild(course_id)
+            return
+        with transaction.atomic():
+            cls.objects.filter(course=course).delete()
+            cls._store(cls.compute(AttendanceRecord.objects.filter(course=course)))
+
+
+class RosterVersion(models.Model):
+    """
+    Change stamp per (course, semester), keying the cached roster matrices.
+
+    Every change that alters a roster bumps it in the writer's transaction
+    (roster.invalidate_rosters). roster.py reads the stamp before the cache
+    and keys its entries on it, so once the change commits no worker serves
+    the old grid, whichever cache it talks to.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='roster_versions')
+    semester = models.IntegerField(choices=AttendanceRecord.SEMESTER_CHOICES)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'semester')
+
+    def __str__(self):
+        return f"{self.course} - Sem {self.semester}: v{self.version}"
+
+    @classmethod
+    def current(cls, course_id, semester):
+        version = cls.objects.filter(course_id=course_id, semester=semester).values_list('version', flat=True).first()
+        return version or 0
+
+    @classmethod
+    def bump(cls, course_ids, semesters):
+        """Advance the stamp of every (course, semester) pair, creating missing rows."""
+        course_ids, semesters = set(course_ids), set(semesters)
+        stamps = cls.objects.filter(course_id__in=course_ids, semester__in=semesters)
+        if stamps.update(version=F('version') + 1) < len(course_ids) * len(semesters):
+            # Deleted courses are skipped; their rows went with them
+            cls.objects.bulk_create(
+                [
+                    cls(course_id=course_id, semester=semester)
+                    for course_id in Course.objects.filter(pk__in=course_ids).values_list('pk', flat=True)
+                    for semester in semesters
+                ],
+                ignore_conflicts=True,
+            )
+            stamps.update(version=F('version') + 1)
+
+
+class SearchTerm(models.Model):
+    """
+    Normalized search terms of a student, tutor or course (see search.py).
+
+    Each object owns one row per token of its searchable fields and one per
+    trigram of those tokens, so a search is an index range or IN lookup on
+    (kind, term_type, term) rather than a leading-wildcard LIKE over every row.
+    Rows are rewritten by receivers.py whenever the object is saved.
+    """
+    KIND_STUDENT = 'S'
+    KIND_TUTOR = 'T'
+    KIND_COURSE = 'C'
+    KIND_CHOICES = [
+        (KIND_STUDENT, 'Student'),
+        (KIND_TUTOR, 'Tutor'),
+        (KIND_COURSE, 'Course'),
+    ]
+
+    TYPE_TOKEN = 'W'
+    TYPE_TRIGRAM = 'G'
+    TYPE_CHOICES = [
+        (TYPE_TOKEN, 'Token'),
+        (TYPE_TRIGRAM, 'Trigram'),
+    ]
+
+    kind = models.CharField(max_length=1, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    # A char rather than a boolean so that it is an equality in the index
+    # prefix; SQLite compiles a boolean filter to NOT "column"
+    term_type = models.CharField(max_length=1, choices=TYPE_CHOICES, default=TYPE_TOKEN)
+    term = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            # Prefix ranges and trigram lookups; object_id makes it covering
+            models.Index(fields=['kind', 'term_type', 'term', 'object_id'], name='search_term_idx'),
+            # Rewriting one object's rows, and ranking each match from its own rows
+            models.Index(fields=['object_id', 'kind', 'term_type', 'term'], name='search_object_idx'),
+        ]
 
     def __str__(self):
-        return f"Sem {self.semester} Week {self.week} - {self.student} - {self.get_status_display()}"
\ No newline at end of file
+        return f"{self.get_kind_display()} {self.object_id}: {self.term}"
@@ -0,0 +1,150 @@
+"""Keyset ("seek") pagination helpers.
+
+Offset paging gets slower the deeper a client walks because the database still
+has to produce and throw away every skipped row. Keyset paging instead remembers
+the sort key of the last row served and asks for rows strictly after it, which
+an index on the ordering columns answers directly at any depth.
+
+CappedCountPaginator covers the admin changelists, which still page by number
+but no longer count a whole filtered table to do so.
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(values):
+    """Encode the sort-key values of the last row on a page into an opaque token."""
+    raw = json.dumps([str(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, model, fields):
+    """
+    Decode a token produced by encode_cursor back into typed values.
+
+    Returns None when the token is missing or malformed so callers can fall
+    back to the first page instead of erroring.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(raw, list) or len(raw) != len(fields):
+            return None
+        return [
+            model._meta.get_field(name.lstrip('-')).to_python(value)
+            for name, value in zip(fields, raw)
+        ]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+def keyset_filter(ordering, values):
+    """
+    Build a Q matching rows that sort strictly after `values` under `ordering`.
+
+    `ordering` is a sequence of field names, each optionally prefixed with '-'
+    for descending order, and must end in a unique column so the position is
+    unambiguous. For ('-semester', '-week', '-id') this expands to
+
+        semester <= s AND (semester < s OR (semester = s AND week < w)
+                                        OR (semester = s AND week = w AND id < i))
+
+    The redundant leading bound lets the database seek straight to the position
+    in an index on the ordering instead of walking it from the start.
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        condition |= equal_prefix & Q(**{f'{field}__{lookup}': value})
+        equal_prefix &= Q(**{field: value})
+    leading = ordering[0]
+    bound = 'lte' if leading.startswith('-') else 'gte'
+    return Q(**{f'{leading.lstrip("-")}__{bound}': values[0]}) & condition
+
+
+def cursor_values(obj, ordering):
+    """Read the sort-key values for `ordering` off a model instance or a values() row."""
+    if isinstance(obj, dict):
+        return [obj[name.lstrip('-')] for name in ordering]
+    return [getattr(obj, name.lstrip('-')) for name in ordering]
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to keyset cursors on request.
+
+    Clients opt in by sending `?cursor=` (empty for the first page) and then
+    follow `next`. Cursor pages are ordered by `ordering`, skip the COUNT(*)
+    and OFFSET of page numbers, and so cost the same at any depth. Without the
+    parameter responses are unchanged.
+    """
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        after = decode_cursor(request.query_params[self.cursor_query_param], queryset.model, self.ordering)
+        if after is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, after))
+        rows = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        page, self.has_next = rows[:page_size], len(rows) > page_size
+        self.next_cursor = encode_cursor(cursor_values(page[-1], self.ordering)) if self.has_next else None
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+
+class CappedCountPaginator(Paginator):
+    """
+    Paginator that counts at most `count_limit` rows of a filtered list.
+
+    The count runs over a LIMIT count_limit + 1 subquery, so it reads at most
+    that many index entries however many rows match; past the cap the list
+    reports count_limit results and pages up to there. An unfiltered list is
+    sized by unfiltered_count() when a subclass can answer it cheaply.
+    """
+    count_limit = 10_000
+
+    def unfiltered_count(self):
+        return None
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.has_filters():
+            total = self.unfiltered_count()
+            if total is not None:
+                return total
+        return min(self.object_list.order_by()[:self.count_limit + 1].count(), self.count_limit)
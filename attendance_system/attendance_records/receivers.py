@@ -0,0 +1,201 @@
+"""Signal receivers keeping derived and cached data in step with its source.
+
+Connected from AttendanceRecordsConfig.ready(). Every attendance write path
+funnels into attendance_changed (see signals.py); the receivers here translate
+the single-object cases into that signal and apply it to the derived tables.
+User and group changes drop the cached roles from roles.py, attendance,
+enrollment, student and course changes bump the roster version stamps, and
+student, tutor and course saves rewrite their search terms (search.py).
+Login outcomes are counted for /metrics (metrics.py), and new database
+connections get the per-request query hook or, for metrics alone, the query
+counter (instrumentation.py) and, with replicas configured, the primary's
+write hook (routers.py).
+"""
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import (
+    AttendanceCounter,
+    AttendanceRecord,
+    AttendanceRecordQuerySet,
+    AttendanceSummary,
+    Course,
+    Student,
+    Tutor,
+    record_added,
+    record_removed,
+    status_changed,
+)
+from .instrumentation import install_query_counter, install_query_hook
+from .metrics import LOGIN_ATTEMPTS
+from .roles import invalidate_users
+from .roster import invalidate_rosters, invalidate_scopes
+from .routers import install_write_hook
+from .search import SEARCH_FIELDS, index_objects, unindex
+from .signals import attendance_changed
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def record_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not AttendanceRecordQuerySet.TRACKED_FIELDS.intersection(update_fields):
+        return
+    previous = getattr(instance, '_loaded_status', None)
+    if created:
+        delta = {instance.status: 1}
+    elif previous is None:
+        # Saved without having been loaded: the old status is unknown
+        delta = None
+    elif previous != instance.status:
+        delta = {previous: -1, instance.status: 1}
+    else:
+        delta = {}
+    scope = (instance.student_id, instance.course_id, instance.semester)
+    scopes = {scope}
+    loaded_scope = getattr(instance, '_loaded_scope', None)
+    if loaded_scope is not None and None not in loaded_scope:
+        # Also the scope the record was moved out of, if any
+        scopes.add(loaded_scope)
+    changes = {}
+    if created:
+        record_added(changes, scope, instance.status, instance.week)
+    elif delta is None:
+        changes = None
+    elif (
+        update_fields is not None and AttendanceRecordQuerySet.TRACKED_FIELDS.intersection(update_fields) == {'status'}
+        or (loaded_scope, getattr(instance, '_loaded_week', None)) == (scope, instance.week)
+    ):
+        status_changed(changes, scope, previous, instance.status)
+    elif loaded_scope is not None and None not in loaded_scope:
+        # The week or scope may have changed too: take the record out of where
+        # it was and add it where it is now
+        record_removed(changes, loaded_scope, previous)
+        record_added(changes, scope, instance.status, instance.week)
+    else:
+        changes = None
+    instance._loaded_status = instance.status
+    instance._loaded_scope = scope
+    instance._loaded_week = instance.week
+    attendance_changed.send(sender=sender, delta=delta, scopes=scopes, changes=changes)
+
+
+@receiver(pre_delete, sender=Student)
+@receiver(pre_delete, sender=Course)
+def owner_deleted(sender, instance, **kwargs):
+    # Cascaded attendance rows are fast-deleted without any signal of their own.
+    # Their summaries cascade along with them, so no scope needs refreshing.
+    records = AttendanceRecord.objects.filter(**{sender._meta.model_name: instance})
+    delta = {status: -count for status, count in records.status_totals().items() if count}
+    if delta:
+        attendance_changed.send(sender=AttendanceRecord, delta=delta, scopes=set(), changes={})
+
+
+@receiver(attendance_changed, sender=AttendanceRecord)
+def update_counters(sender, delta, **kwargs):
+    AttendanceCounter.apply(delta)
+
+
+@receiver(attendance_changed, sender=AttendanceRecord)
+def update_summaries(sender, scopes, changes=None, **kwargs):
+    if changes is not None:
+        AttendanceSummary.apply(changes)
+    else:
+        AttendanceSummary.refresh(scopes)
+
+
+@receiver(attendance_changed, sender=AttendanceRecord)
+def drop_roster_records(sender, scopes, **kwargs):
+    invalidate_scopes(scopes)
+
+
+@receiver(post_save, sender=Student)
+@receiver(pre_delete, sender=Student)
+def drop_student_rosters(sender, instance, **kwargs):
+    # Names and ids appear in every roster the student is enrolled on
+    invalidate_rosters(instance.courses.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def drop_course_rosters(sender, instance, **kwargs):
+    invalidate_rosters([instance.pk])
+
+
+@receiver(m2m_changed, sender=Student.courses.through)
+def enrollment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        invalidate_rosters([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_rosters(instance.courses.values_list('pk', flat=True))
+    elif pk_set:
+        invalidate_rosters(pk_set)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Tutor)
+@receiver(post_save, sender=Course)
+def update_search_terms(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(SEARCH_FIELDS[sender]).intersection(update_fields):
+        return
+    index_objects(sender, [instance])
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Tutor)
+@receiver(post_delete, sender=Course)
+def drop_search_terms(sender, instance, **kwargs):
+    unindex(sender, [instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_users([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_users([instance.pk])
+    elif action == 'pre_clear':
+        # group.user_set.clear() does not report which users it removed
+        invalidate_users(instance.user_set.values_list('pk', flat=True))
+    elif pk_set:
+        invalidate_users(pk_set)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    invalidate_users(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(user_logged_in)
+def count_login(sender, **kwargs):
+    LOGIN_ATTEMPTS.labels('success').inc()
+
+
+@receiver(user_login_failed)
+def count_failed_login(sender, **kwargs):
+    LOGIN_ATTEMPTS.labels('failure').inc()
+
+
+@receiver(connection_created)
+def hook_queries(sender, connection, **kwargs):
+    if settings.REQUEST_TIMING:
+        install_query_hook(connection)
+    elif settings.METRICS:
+        install_query_counter(connection)
+    if settings.DATABASE_REPLICAS and connection.alias == DEFAULT_DB_ALIAS:
+        install_write_hook(connection)
@@ -0,0 +1,71 @@
+"""Per-user role: admin, tutor or student, derived from the User and its groups.
+
+Resolving it costs up to one group query. RoleMiddleware and the DRF
+IsTutorOrAdmin permission both ask, so the role is kept on the user object
+for the rest of the request. With a shared CACHE_BACKEND (anything but the
+per-process LocMemCache) the role string is also cached per user for
+ROLE_CACHE_TIMEOUT seconds and dropped whenever the user row, its group
+membership or one of its groups changes (see receivers.py). A per-process
+cache is not used: invalidation would only reach the worker that handled the
+change, and a demoted or removed user would keep their role on the others.
+
+The User row itself is never cached. AuthenticationMiddleware loads it on
+every request, so is_active and the password hash checked against the
+session are always current.
+"""
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .metrics import record_cache_lookup
+
+ROLE_ADMIN = 'admin'
+ROLE_TUTOR = 'tutor'
+ROLE_STUDENT = 'student'
+ROLE_ANONYMOUS = 'anonymous'
+
+TUTORS_GROUP = 'Tutors'
+STUDENTS_GROUP = 'Students'
+
+ROLE_CACHE_KEY = 'attendance_records:role:{}'
+
+
+def compute_role(user):
+    """Resolve a role from staff flags and group membership (at most one query)."""
+    if user.is_superuser or user.is_staff:
+        return ROLE_ADMIN
+    groups = set(
+        user.groups.filter(name__in=(TUTORS_GROUP, STUDENTS_GROUP)).values_list('name', flat=True)
+    )
+    if TUTORS_GROUP in groups:
+        return ROLE_TUTOR
+    # Students, and the fallback for authenticated users without groups
+    return ROLE_STUDENT
+
+
+def _shared_cache():
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def get_user_role(user):
+    """Return the role for a user object, or 'anonymous'."""
+    if user is None or not user.is_authenticated:
+        return ROLE_ANONYMOUS
+    role = getattr(user, '_attendance_role', None)
+    if role is None:
+        if _shared_cache():
+            key = ROLE_CACHE_KEY.format(user.pk)
+            role = record_cache_lookup('role', cache.get(key))
+            if role is None:
+                role = compute_role(user)
+                cache.set(key, role, settings.ROLE_CACHE_TIMEOUT)
+        else:
+            role = compute_role(user)
+        user._attendance_role = role
+    return role
+
+
+def invalidate_users(user_ids):
+    if _shared_cache():
+        cache.delete_many([ROLE_CACHE_KEY.format(user_id) for user_id in user_ids])
@@ -0,0 +1,148 @@
+"""Course roster matrix: every enrolled student against weeks 1-18 of a semester.
+
+A matrix is built from two queries, the course's enrollments and its records
+for the semester, and pivoted into a bytearray holding one status byte per
+cell ('-' when unmarked), so even a 500-student course is a 9 kB grid. Row
+totals are byte counts over a row slice.
+
+Built matrices and their rendered JSON/CSV payloads are cached per (course,
+semester) under that pair's RosterVersion stamp. receivers.py bumps the stamp
+whenever a record, an enrollment or a student in that course changes, so every
+worker moves on to a fresh entry after one small query, even with the
+per-process LocMemCache; outdated entries expire after ROSTER_CACHE_TIMEOUT
+seconds.
+"""
+
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import record_cache_lookup
+from .models import AttendanceRecord, Course, RosterVersion
+
+WEEKS = 18
+UNMARKED = '-'
+STATUS_CODES = tuple(code for code, _ in AttendanceRecord.STATUS_CHOICES)
+SEMESTERS = tuple(value for value, _ in AttendanceRecord.SEMESTER_CHOICES)
+
+ROSTER_CACHE_KEY = 'attendance_records:roster:{}:{}:{}:{}'
+
+
+def _percentage(present, marked):
+    return round(present / marked * 100, 2) if marked else 0
+
+
+class RosterMatrix:
+    def __init__(self, course, semester, students, grid):
+        self.course = course
+        self.semester = semester
+        # (pk, student_id, first_name, last_name) per row, in display order
+        self.students = students
+        self.grid = grid
+
+    @classmethod
+    def build(cls, course, semester):
+        students = list(
+            course.students.order_by('last_name', 'first_name', 'pk')
+            .values_list('pk', 'student_id', 'first_name', 'last_name')
+        )
+        row_of = {student[0]: row for row, student in enumerate(students)}
+        grid = bytearray(UNMARKED.encode()) * (len(students) * WEEKS)
+        records = AttendanceRecord.objects.filter(course=course, semester=semester).order_by()
+        for student_pk, week, status in records.values_list('student_id', 'week', 'status'):
+            # Records of students no longer enrolled have no row
+            row = row_of.get(student_pk)
+            if row is not None and 1 <= week <= WEEKS:
+                grid[row * WEEKS + week - 1] = ord(status)
+        return cls(course, semester, students, grid)
+
+    def cells(self, row):
+        return self.grid[row * WEEKS:(row + 1) * WEEKS].decode()
+
+    def totals(self, row):
+        cells = self.grid[row * WEEKS:(row + 1) * WEEKS]
+        return {code: cells.count(ord(code)) for code in STATUS_CODES}
+
+    def rows(self):
+        """Yield (student tuple, cells string, {status: count}) per enrolled student."""
+        for row, student in enumerate(self.students):
+            yield student, self.cells(row), self.totals(row)
+
+    def to_json(self):
+        status_names = dict(AttendanceRecord.STATUS_CHOICES)
+        students = []
+        for (pk, student_id, first_name, last_name), cells, totals in self.rows():
+            marked = sum(totals.values())
+            students.append({
+                'id': pk,
+                'student_id': student_id,
+                'first_name': first_name,
+                'last_name': last_name,
+                'cells': cells,
+                'present': totals[AttendanceRecord.STATUS_PRESENT],
+                'absent': totals[AttendanceRecord.STATUS_ABSENT],
+                'excused': totals[AttendanceRecord.STATUS_EXCUSED],
+                'attendance_percentage': _percentage(totals[AttendanceRecord.STATUS_PRESENT], marked),
+            })
+        return json.dumps({
+            'course': {'id': self.course.pk, 'code': self.course.code, 'name': self.course.name},
+            'semester': self.semester,
+            'weeks': WEEKS,
+            'legend': {**status_names, UNMARKED: 'Not marked'},
+            'students': students,
+        }, separators=(',', ':'))
+
+    def to_csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([
+            'student_id', 'first_name', 'last_name',
+            *(f'week_{week}' for week in range(1, WEEKS + 1)),
+            'present', 'absent', 'excused', 'attendance_percentage',
+        ])
+        for (_, student_id, first_name, last_name), cells, totals in self.rows():
+            present = totals[AttendanceRecord.STATUS_PRESENT]
+            writer.writerow([
+                student_id, first_name, last_name,
+                *(cell if cell != UNMARKED else '' for cell in cells),
+                present,
+                totals[AttendanceRecord.STATUS_ABSENT],
+                totals[AttendanceRecord.STATUS_EXCUSED],
+                _percentage(present, sum(totals.values())),
+            ])
+        return buffer.getvalue()
+
+
+def get_roster(course, semester, kind='matrix', version=None):
+    """Return the cached matrix ('matrix') or its rendering ('json', 'csv'), building it on a miss."""
+    if version is None:
+        version = RosterVersion.current(course.pk, semester)
+    key = ROSTER_CACHE_KEY.format(course.pk, semester, version, kind)
+    value = record_cache_lookup('roster', cache.get(key))
+    if value is None:
+        if kind == 'matrix':
+            value = RosterMatrix.build(course, semester)
+        else:
+            matrix = get_roster(course, semester, version=version)
+            value = matrix.to_json() if kind == 'json' else matrix.to_csv()
+        cache.set(key, value, settings.ROSTER_CACHE_TIMEOUT)
+    return value
+
+
+def invalidate_rosters(course_ids, semesters=SEMESTERS):
+    RosterVersion.bump(course_ids, semesters)
+
+
+def invalidate_scopes(scopes):
+    """Drop the rosters affected by an attendance_changed scope set (None: all of them)."""
+    if scopes is None:
+        invalidate_rosters(Course.objects.values_list('pk', flat=True))
+        return
+    by_semester = {}
+    for _, course_id, semester in scopes:
+        by_semester.setdefault(semester, set()).add(course_id)
+    for semester, course_ids in by_semester.items():
+        invalidate_rosters(course_ids, (semester,))
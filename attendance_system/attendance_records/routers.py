@@ -0,0 +1,105 @@
+"""Send the reads of selected views to read replicas, keeping writers on the primary.
+
+Replicas are the aliases in settings.DATABASE_REPLICAS (from
+DATABASE_REPLICA_URLS). Nothing reads from them by default: a view opts in
+with @replica_reads, and then only its GET and HEAD requests do. Each request
+reads from one replica, chosen at random when it starts, so its count, page
+and related rows all come from the same replication position. Everything
+else stays on 'default':
+
+- requests with any other method;
+- the rest of a request once it has written anything (write_hook saw an
+  INSERT, UPDATE or DELETE run on 'default'), and reads inside a
+  transaction on 'default';
+- every request from a client for REPLICA_PIN_SECONDS after one of its
+  requests wrote, tracked by a cookie that ReplicaRoutingMiddleware sets.
+  A tutor who submits a roll call therefore sees it on the next page even
+  while the replicas are still catching up.
+
+The per-request state lives in a context variable, like instrumentation.py's
+timings, so it follows async views into the threads the ORM runs on.
+
+Locally, SQLite files can stand in for replicas:
+
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 python manage.py runserver
+
+Nothing copies writes to such a file, which makes reads that reached it easy
+to tell apart.
+"""
+
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_pin'
+READ_METHODS = ('GET', 'HEAD')
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+current_routing = ContextVar('attendance_records_routing', default=None)
+
+
+class RoutingState:
+    """Where the current request's reads may go: `alias`, the request's replica, or 'default'."""
+
+    __slots__ = ('alias', 'replica', 'pinned', 'wrote')
+
+    def __init__(self, alias, pinned=False):
+        self.alias = alias
+        self.replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+    @property
+    def use_replica(self):
+        return self.replica and not self.pinned and not self.wrote
+
+
+def replica_reads(view):
+    """Let a view's GET and HEAD requests read from a replica; works on functions and view classes."""
+    view.replica_reads = True
+    return view
+
+
+def allows_replica_reads(view_func):
+    """Whether a resolved view, or the class behind it, is marked with @replica_reads."""
+    candidates = (view_func, getattr(view_func, 'view_class', None), getattr(view_func, 'cls', None))
+    return any(getattr(candidate, 'replica_reads', False) for candidate in candidates)
+
+
+def write_hook(execute, sql, params, many, context):
+    """execute_wrapper for connections to 'default': marks the current request as having written."""
+    state = current_routing.get()
+    if state is not None and not state.wrote and sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def install_write_hook(connection):
+    if write_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(write_hook)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+        if state is None or not state.use_replica or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        # Also asked by code that only wants the primary for a read, so the
+        # request is marked as writing by write_hook instead
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication, not migrate
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,220 @@
+"""Indexed search over students, tutors and courses.
+
+Searchable field values are normalized (accents stripped, case folded, split
+on anything that is not a letter or digit) into SearchTerm rows: one per
+token, plus one per trigram of each token. A query is normalized the same way
+and answered from those rows alone:
+
+- prefix match: every query token must be a prefix of some term of the
+  object. Terms equal to a query token score EXACT_WEIGHT, other prefixes
+  PREFIX_WEIGHT, and the sum is the object's search_rank;
+- trigram match: only when nothing matches by prefix (typos, fragments from
+  the middle of a word), objects sharing at least TRIGRAM_MATCH of the
+  query's trigrams, ranked by how many they share.
+
+On SQLite a prefix is matched as a term >= 'abc' AND term < 'abd' range,
+because its LIKE only uses an index declared NOCASE. MySQL's LIKE 'abc%' is
+already an index range under the column's case-insensitive collation, and a
+computed upper bound would not sort correctly there.
+
+Rows are rewritten by receivers.py when an object is saved and by
+import_roster after its bulk writes; rebuild_search_index recomputes the
+whole table.
+"""
+
+import math
+import re
+import unicodedata
+from functools import reduce
+from operator import or_
+
+from django.db import connections, router, transaction
+from django.db.models import Case, Count, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Course, SearchTerm, Student, Tutor
+
+SEARCH_FIELDS = {
+    Student: ('student_id', 'first_name', 'last_name', 'email'),
+    Tutor: ('tutor_id', 'first_name', 'last_name', 'email'),
+    Course: ('code', 'name'),
+}
+KINDS = {
+    Student: SearchTerm.KIND_STUDENT,
+    Tutor: SearchTerm.KIND_TUTOR,
+    Course: SearchTerm.KIND_COURSE,
+}
+
+EXACT_WEIGHT = 2
+PREFIX_WEIGHT = 1
+# Share of the query's trigrams an object needs for a fuzzy match
+TRIGRAM_MATCH = 0.5
+MAX_QUERY_TOKENS = 5
+INDEX_BATCH = 1000
+TERM_LENGTH = SearchTerm._meta.get_field('term').max_length
+
+_SEPARATORS = re.compile(r'[\W_]+')
+_LETTERS_OR_DIGITS = re.compile(r'\d+|[^\W\d_]+')
+
+
+def normalize(text):
+    """Split text into case-folded, accent-free tokens of letters and digits."""
+    decomposed = unicodedata.normalize('NFKD', str(text or '')).casefold()
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return [token[:TERM_LENGTH] for token in _SEPARATORS.split(stripped) if token]
+
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def terms_for(values):
+    """(tokens, trigrams) to index for an object's searchable field values."""
+    tokens, grams = set(), set()
+    for value in values:
+        value = str(value or '')
+        if '@' in value:
+            # Emails: only the local part; addresses share a handful of domains
+            value = value.split('@', 1)[0]
+        parts = normalize(value)
+        for part in parts:
+            # 'cs101' is also found as '101'
+            pieces = _LETTERS_OR_DIGITS.findall(part)
+            words = [part, *pieces] if len(pieces) > 1 else [part]
+            tokens.update(words)
+            grams.update(*(trigrams(word) for word in words))
+        if len(parts) > 1 and ' ' not in value.strip():
+            # Identifiers and emails: 'CS-101' is also found as 'cs101'
+            tokens.add(''.join(parts)[:TERM_LENGTH])
+    return tokens, grams
+
+
+def index_rows(model, rows):
+    """Replace the terms of each (pk, *SEARCH_FIELDS values) row."""
+    kind = KINDS[model]
+    rows = list(rows)
+    for start in range(0, len(rows), INDEX_BATCH):
+        batch = rows[start:start + INDEX_BATCH]
+        terms = []
+        for pk, *values in batch:
+            tokens, grams = terms_for(values)
+            terms.extend(SearchTerm(kind=kind, object_id=pk, term=token) for token in tokens)
+            terms.extend(SearchTerm(kind=kind, object_id=pk, term_type=SearchTerm.TYPE_TRIGRAM, term=gram) for gram in grams)
+        with transaction.atomic(using=router.db_for_write(SearchTerm)):
+            SearchTerm.objects.filter(kind=kind, object_id__in=[row[0] for row in batch]).delete()
+            SearchTerm.objects.bulk_create(terms, batch_size=INDEX_BATCH)
+
+
+def index_objects(model, objects):
+    fields = SEARCH_FIELDS[model]
+    index_rows(model, [(obj.pk, *(getattr(obj, field) for field in fields)) for obj in objects])
+
+
+def reindex(queryset):
+    """Rewrite the terms of every object in queryset, INDEX_BATCH objects at a time."""
+    model = queryset.model
+    rows = queryset.order_by('pk').values_list('pk', *SEARCH_FIELDS[model])
+    last_pk = None
+    indexed = 0
+    while True:
+        batch = list((rows if last_pk is None else rows.filter(pk__gt=last_pk))[:INDEX_BATCH])
+        if not batch:
+            return indexed
+        index_rows(model, batch)
+        indexed += len(batch)
+        last_pk = batch[-1][0]
+
+
+def rebuild(model):
+    """Drop and recompute every term of one model; returns the number of objects indexed."""
+    SearchTerm.objects.filter(kind=KINDS[model]).delete()
+    return reindex(model.objects.all())
+
+
+def unindex(model, pks):
+    SearchTerm.objects.filter(kind=KINDS[model], object_id__in=list(pks)).delete()
+
+
+def _prefix(token, vendor):
+    """Q for terms starting with token, written so the term index is range-scanned."""
+    if vendor == 'sqlite':
+        return Q(term__gte=token, term__lt=token[:-1] + chr(ord(token[-1]) + 1))
+    return Q(term__istartswith=token)
+
+
+def _query_tokens(query):
+    return list(dict.fromkeys(normalize(query)))[:MAX_QUERY_TOKENS]
+
+
+def _prefix_match(kind, tokens):
+    """(one object-id subquery per query token, per-object rank query) for the prefix phase."""
+    vendor = connections[router.db_for_read(SearchTerm)].vendor
+    prefixes = [_prefix(token, vendor) for token in tokens]
+    terms = SearchTerm.objects.filter(kind=kind, term_type=SearchTerm.TYPE_TOKEN).order_by()
+    # One range subquery per token, intersected by the caller; a single
+    # GROUP BY ... HAVING over all of them makes planners walk the whole kind
+    subqueries = [terms.filter(prefix).values('object_id') for prefix in prefixes]
+    score = Sum(Case(
+        When(term__in=tokens, then=Value(EXACT_WEIGHT)),
+        default=Value(PREFIX_WEIGHT),
+        output_field=IntegerField(),
+    ))
+    rank = (
+        terms.filter(reduce(or_, prefixes), object_id=OuterRef('pk'))
+        .values('object_id')
+        .annotate(score=score)
+        .values('score')
+    )
+    return subqueries, rank
+
+
+def _trigram_match(kind, tokens):
+    """([object-id subquery], per-object rank query) for the trigram phase, or None without trigrams."""
+    grams = set().union(*(trigrams(token) for token in tokens))
+    if not grams:
+        return None
+    terms = SearchTerm.objects.filter(kind=kind, term_type=SearchTerm.TYPE_TRIGRAM, term__in=grams).order_by()
+    matching = (
+        terms.values('object_id')
+        .annotate(shared=Count('*'))
+        .filter(shared__gte=max(1, math.ceil(len(grams) * TRIGRAM_MATCH)))
+        .values('object_id')
+    )
+    rank = terms.filter(object_id=OuterRef('pk')).values('object_id').annotate(shared=Count('*')).values('shared')
+    return [matching], rank
+
+
+def _filter_matching(queryset, subqueries):
+    for subquery in subqueries:
+        queryset = queryset.filter(pk__in=subquery)
+    return queryset
+
+
+def _match(model, query):
+    tokens = _query_tokens(query)
+    if not tokens:
+        return None
+    kind = KINDS[model]
+    match = _prefix_match(kind, tokens)
+    if _filter_matching(model._default_manager.all(), match[0]).exists():
+        return match
+    return _trigram_match(kind, tokens)
+
+
+def matching_ids(model, query):
+    """Subquery of the pks of `model` objects matching query, for use in filter(...__in=)."""
+    match = _match(model, query)
+    if match is None:
+        return model._default_manager.none().values('pk')
+    return _filter_matching(model._default_manager.all(), match[0]).values('pk')
+
+
+def search(queryset, query):
+    """Filter queryset to objects matching query, annotated with search_rank (higher is better)."""
+    match = _match(queryset.model, query)
+    if match is None:
+        return queryset.none()
+    subqueries, rank = match
+    return _filter_matching(queryset, subqueries).annotate(
+        search_rank=Coalesce(Subquery(rank, output_field=IntegerField()), Value(0)),
+    )
@@ -2,13 +2,30 @@ from rest_framework import serializers
 from .models import Student, Course, AttendanceRecord
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """Takes a `fields` argument naming the only fields to output (see fieldsets.py)."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def _percentage(part, total):
+    if total == 0:
+        return 0
+    return round((part / total) * 100, 2)
+
+
+class StudentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
-    
+
     # Add attendance statistics
     total_records = serializers.SerializerMethodField()
     attendance_percentage = serializers.SerializerMethodField()
-    
+
     class Meta:
         model = Student
         fields = [
@@ -16,43 +33,170 @@ class StudentSerializer(serializers.ModelSerializer):
             'email', 'created_at', 'total_records', 'attendance_percentage'
         ]
         read_only_fields = ['id', 'created_at']
-    
+
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
-    
+
+    # Figures come from Student.objects.with_attendance_stats() when the view
+    # annotated them; the COUNT fallbacks keep unannotated instances working.
+    def _num_records(self, obj):
+        if not hasattr(obj, 'num_records'):
+            obj.num_records = obj.attendances.count()
+        return obj.num_records
+
+    def _num_present(self, obj):
+        if not hasattr(obj, 'num_present'):
+            obj.num_present = obj.attendances.filter(status=AttendanceRecord.STATUS_PRESENT).count()
+        return obj.num_present
+
     def get_total_records(self, obj):
-        return obj.attendances.count()
-    
+        return self._num_records(obj)
+
     def get_attendance_percentage(self, obj):
-        total = obj.attendances.count()
-        if total == 0:
-            return 0
-        present = obj.attendances.filter(status='P').count()
-        return round((present / total) * 100, 2)
+        return _percentage(self._num_present(obj), self._num_records(obj))
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     student_count = serializers.SerializerMethodField()
     total_records = serializers.SerializerMethodField()
-    
+
     class Meta:
         model = Course
         fields = ['id', 'code', 'name', 'student_count', 'total_records']
         read_only_fields = ['id']
-    
+
+    def get_student_count(self, obj):
+        if hasattr(obj, 'num_students'):
+            return obj.num_students
+        return obj.students.count()
+
     def get_total_records(self, obj):
+        if hasattr(obj, 'num_records'):
+            return obj.num_records
         return obj.attendances.count()
 
 
-class AttendanceRecordSerializer(serializers.ModelSerializer):
+class AttendanceRecordSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     student_detail = StudentSerializer(source='student', read_only=True)
     course_detail = CourseSerializer(source='course', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    
+
     class Meta:
         model = AttendanceRecord
         fields = [
             'id', 'student', 'student_detail', 'course', 'course_detail',
             'status', 'status_display', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at']
+
+    def to_representation(self, instance):
+        # AttendanceRecord.objects.with_related_stats() annotates the row itself;
+        # move the figures onto the related objects the nested serializers read.
+        for related, names in (
+            ('student', ('num_records', 'num_present')),
+            ('course', ('num_students', 'num_records')),
+        ):
+            for name in names:
+                annotated = f'{related}_{name}'
+                if hasattr(instance, annotated):
+                    setattr(getattr(instance, related), name, getattr(instance, annotated))
+        return super().to_representation(instance)
+
+
+class AttendanceRecordSimpleSerializer(serializers.ModelSerializer):
+    """Flat record used by the per-student and per-course attendance actions."""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = AttendanceRecord
+        fields = [
+            'id', 'student', 'course', 'semester', 'week',
+            'status', 'status_display', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+# Row builders: the exact output of AttendanceRecordSerializer and
+# AttendanceRecordSimpleSerializer, built from values_list tuples instead of
+# model instances and per-field serializer calls. The large list endpoints use
+# them for their default shape (see renderers.py); keep them in step with the
+# serializers above.
+
+_datetime = serializers.DateTimeField().to_representation
+_status_labels = {code: str(label) for code, label in AttendanceRecord.STATUS_CHOICES}
+
+# Needs AttendanceRecord.objects.with_related_stats() for the annotated figures
+ATTENDANCE_ROW_LOOKUPS = (
+    'id', 'status', 'created_at',
+    'student', 'student__student_id', 'student__first_name', 'student__last_name', 'student__email',
+    'student__created_at', 'student_num_records', 'student_num_present',
+    'course', 'course__code', 'course__name', 'course_num_students', 'course_num_records',
+)
+SIMPLE_ATTENDANCE_ROW_LOOKUPS = ('id', 'student', 'course', 'semester', 'week', 'status', 'created_at')
+
+
+def attendance_values(queryset):
+    """`queryset` as the named values_list rows attendance_rows() takes (named, for the cursor paginator)."""
+    return queryset.values_list(*ATTENDANCE_ROW_LOOKUPS, named=True)
+
+
+def attendance_rows(rows):
+    """AttendanceRecordSerializer(many=True).data for rows of ATTENDANCE_ROW_LOOKUPS."""
+    students, courses, data = {}, {}, []
+    for (pk, status, created_at, student_pk, student_id, first_name, last_name, email, student_created_at,
+         num_records, num_present, course_pk, code, name, num_students, course_records) in rows:
+        # Rows of one page share few students and courses; their objects are built once
+        student = students.get(student_pk)
+        if student is None:
+            student = students[student_pk] = {
+                'id': student_pk,
+                'student_id': student_id,
+                'first_name': first_name,
+                'last_name': last_name,
+                'full_name': f"{first_name} {last_name}",
+                'email': email,
+                'created_at': _datetime(student_created_at),
+                'total_records': num_records,
+                'attendance_percentage': _percentage(num_present, num_records),
+            }
+        course = courses.get(course_pk)
+        if course is None:
+            course = courses[course_pk] = {
+                'id': course_pk,
+                'code': code,
+                'name': name,
+                'student_count': num_students,
+                'total_records': course_records,
+            }
+        data.append({
+            'id': pk,
+            'student': student_pk,
+            'student_detail': student,
+            'course': course_pk,
+            'course_detail': course,
+            'status': status,
+            'status_display': _status_labels.get(status, status),
+            'created_at': _datetime(created_at),
+        })
+    return data
+
+
+def simple_attendance_values(queryset):
+    return queryset.values_list(*SIMPLE_ATTENDANCE_ROW_LOOKUPS)
+
+
+def simple_attendance_rows(rows):
+    """AttendanceRecordSimpleSerializer(many=True).data for rows of SIMPLE_ATTENDANCE_ROW_LOOKUPS."""
+    return [
+        {
+            'id': pk,
+            'student': student,
+            'course': course,
+            'semester': semester,
+            'week': week,
+            'status': status,
+            'status_display': _status_labels.get(status, status),
+            'created_at': _datetime(created_at),
+        }
+        for pk, student, course, semester, week, status, created_at in rows
+    ]
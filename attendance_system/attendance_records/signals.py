@@ -0,0 +1,21 @@
+"""Custom signals for attendance data.
+
+Django's post_save/post_delete do not fire for bulk_create, bulk_update,
+QuerySet.update() or QuerySet.delete(), and fast-path cascades skip them too.
+AttendanceRecord's model and queryset methods send attendance_changed from
+every write path instead, so derived data (counters, summaries, caches) only
+has to listen in one place. Receivers live in receivers.py.
+"""
+
+from django.dispatch import Signal
+
+# Sent with sender=AttendanceRecord after rows were written or removed.
+#   delta:  dict of status code -> change in row count, or None when the change
+#           could not be derived cheaply and listeners should recount.
+#   scopes: set of (student_id, course_id, semester) whose records changed, or
+#           None when they are unknown and per-scope data must be rebuilt.
+#   changes: dict of scope -> {'delta': status -> change in row count in that
+#           scope, 'week': latest week of the records added to it or None,
+#           'removed': whether records left it}, built with models.record_added,
+#           record_removed and status_changed; None when only `scopes` is known.
+attendance_changed = Signal()
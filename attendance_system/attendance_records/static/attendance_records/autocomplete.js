@@ -0,0 +1,89 @@
+// Search box for <select data-autocomplete-url> pickers (see widgets.py).
+// The select starts with just its selected options; typing fetches one page
+// of matches from the endpoint and "More results" appends the next one.
+(function () {
+  'use strict';
+
+  var DELAY_MS = 250;
+
+  function setup(select) {
+    var url = select.dataset.autocompleteUrl;
+    var input = document.createElement('input');
+    var more = document.createElement('button');
+    var timer = null;
+    var query = '';
+    var page = 1;
+
+    input.type = 'search';
+    input.className = 'form-control mb-2';
+    input.placeholder = 'Type to search...';
+    input.setAttribute('aria-label', 'Search ' + (select.name || 'options'));
+    more.type = 'button';
+    more.className = 'btn btn-sm btn-outline-secondary mt-2';
+    more.textContent = 'More results';
+    more.hidden = true;
+    select.parentNode.insertBefore(input, select);
+    select.parentNode.insertBefore(more, select.nextSibling);
+    if (select.multiple && !select.size) {
+      select.size = 8;
+    }
+
+    function load(append) {
+      var params = new URLSearchParams({q: query, page: page});
+      select.dataset.autocompleteLoaded = '1';
+      fetch(url + '?' + params, {credentials: 'same-origin', headers: {Accept: 'application/json'}})
+        .then(function (response) { return response.ok ? response.json() : Promise.reject(response); })
+        .then(function (data) {
+          if (!append) {
+            // Keep what is selected (and the empty choice) so the form value survives a new search
+            Array.prototype.slice.call(select.options).forEach(function (option) {
+              if (!option.selected && option.value !== '') {
+                option.remove();
+              }
+            });
+          }
+          var present = {};
+          Array.prototype.forEach.call(select.options, function (option) { present[option.value] = true; });
+          data.results.forEach(function (item) {
+            if (!present[item.id]) {
+              select.add(new Option(item.text, item.id));
+            }
+          });
+          more.hidden = !data.pagination.more;
+        })
+        .catch(function () { more.hidden = true; });
+    }
+
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        query = input.value.trim();
+        page = 1;
+        load(false);
+      }, DELAY_MS);
+    });
+    more.addEventListener('click', function () {
+      page += 1;
+      load(true);
+    });
+    if (select.multiple) {
+      // A plain click toggles one option instead of replacing the whole selection
+      select.addEventListener('mousedown', function (event) {
+        if (event.target.tagName === 'OPTION') {
+          event.preventDefault();
+          event.target.selected = !event.target.selected;
+          select.dispatchEvent(new Event('change', {bubbles: true}));
+        }
+      });
+    }
+    select.addEventListener('focus', function () {
+      if (!select.dataset.autocompleteLoaded) {
+        load(false);
+      }
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(setup);
+  });
+})();
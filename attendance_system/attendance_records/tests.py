@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from prometheus_client.parser import text_string_to_metric_families
+
+from .models import Course, Student
+
+
+class MetricsExpositionTests(TestCase):
+    """/metrics parses as the Prometheus text format and carries the application's families."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('metrics-admin', 'admin@example.com', 'secret')
+        cls.course = Course.objects.create(code='MET101', name='Metrics')
+        cls.student = Student.objects.create(student_id='MET0001', first_name='Ada', last_name='Lovelace')
+        cls.student.courses.add(cls.course)
+
+    def scrape(self):
+        self.client.force_login(self.admin)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        return {family.name: family for family in text_string_to_metric_families(response.content.decode())}
+
+    def value(self, families, family, sample_name, **labels):
+        return sum(
+            sample.value for sample in families[family].samples
+            if sample.name == sample_name and all(sample.labels.get(k) == v for k, v in labels.items())
+        )
+
+    def test_families(self):
+        before = self.scrape()
+        self.client.logout()
+        self.client.post('/login/', {'username': 'nobody', 'password': 'wrong'})
+        self.client.force_login(self.admin)
+        self.client.get('/api/stats/')
+        self.client.post('/mark-attendance/', {
+            'course': self.course.pk, 'semester': 1, 'week': 1, f'status_{self.student.pk}': 'P',
+        })
+        after = self.scrape()
+
+        expected = {
+            'attendance_request_duration_seconds': 'histogram',
+            'attendance_request_queries': 'histogram',
+            'attendance_cache_requests': 'counter',
+            'attendance_login_attempts': 'counter',
+            'attendance_roll_call_size': 'histogram',
+        }
+        for name, kind in expected.items():
+            self.assertIn(name, after)
+            self.assertEqual(after[name].type, kind)
+
+        def delta(*args, **labels):
+            return self.value(after, *args, **labels) - self.value(before, *args, **labels)
+
+        self.assertEqual(delta('attendance_login_attempts', 'attendance_login_attempts_total', result='failure'), 1)
+        self.assertEqual(delta('attendance_cache_requests', 'attendance_cache_requests_total', cache='stats'), 1)
+        self.assertEqual(delta('attendance_roll_call_size', 'attendance_roll_call_size_count'), 1)
+        self.assertEqual(delta('attendance_roll_call_size', 'attendance_roll_call_size_sum'), 1)
+        self.assertEqual(delta(
+            'attendance_request_duration_seconds', 'attendance_request_duration_seconds_count',
+            view='attendance_records:api-stats', method='GET',
+        ), 1)
+        self.assertEqual(delta(
+            'attendance_request_queries', 'attendance_request_queries_count', view='attendance_records:api-stats',
+        ), 1)
+
+    def test_unknown_methods_share_one_label(self):
+        self.client.generic('BREW', '/api/stats/')
+        self.client.generic('PROPFIND', '/api/stats/')
+        families = self.scrape()
+        methods = {sample.labels['method'] for sample in families['attendance_request_duration_seconds'].samples}
+        self.assertIn('other', methods)
+        self.assertFalse(methods & {'BREW', 'PROPFIND'})
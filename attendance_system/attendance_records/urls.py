@@ -3,6 +3,7 @@ from django.contrib.auth import views as auth_views
 from rest_framework.routers import DefaultRouter
 from . import views
 from . import api_views
+from . import async_api_views
 
 app_name = 'attendance_records'
 
@@ -14,6 +15,7 @@ router.register(r'attendance', api_views.AttendanceRecordViewSet, basename='api-
 urlpatterns = [
     # Web Interface Routes
     path('', views.index, name='index'),
+    path('metrics', views.metrics, name='metrics'),
     
     # Auth routes
     path('login/', auth_views.LoginView.as_view(template_name='attendance_records/login.html'), name='login'),
@@ -42,6 +44,7 @@ urlpatterns = [
     path('courses/add/', views.CourseCreateView.as_view(), name='courses_add'),
     path('courses/<int:pk>/edit/', views.CourseUpdateView.as_view(), name='courses_edit'),
     path('courses/<int:pk>/delete/', views.CourseDeleteView.as_view(), name='courses_delete'),
+    path('courses/<int:pk>/roster/', views.CourseRosterView.as_view(), name='course_roster'),
 
     # Admin CRUD - Attendance
     path('attendance/', views.AttendanceListView.as_view(), name='attendance_list'),
@@ -50,8 +53,22 @@ urlpatterns = [
     path('attendance/<int:pk>/delete/', views.AttendanceDeleteView.as_view(), name='attendance_delete'),
     
     # API Routes
+    # Before the router so 'export' is not taken for a record pk
+    path('api/attendance/export/', api_views.export_attendance, name='api-attendance-export'),
     path('api/', include(router.urls)),
     path('api/my-attendance/', api_views.my_attendance, name='api-my-attendance'),
     path('api/stats/', api_views.api_stats, name='api-stats'),
+    path('api/analytics/', api_views.api_analytics, name='api-analytics'),
+    path('api/autocomplete/students/', api_views.api_autocomplete, {'kind': 'students'},
+         name='api-autocomplete-students'),
+    path('api/autocomplete/courses/', api_views.api_autocomplete, {'kind': 'courses'},
+         name='api-autocomplete-courses'),
+    # Async variants of the read-only endpoints (see async_api_views.py)
+    path('api/async/my-attendance/', async_api_views.my_attendance, name='api-async-my-attendance'),
+    path('api/async/stats/', async_api_views.api_stats, name='api-async-stats'),
+    path('api/async/students/<int:pk>/attendance/', async_api_views.student_attendance,
+         name='api-async-student-attendance'),
+    path('api/async/courses/<int:pk>/attendance/', async_api_views.course_attendance,
+         name='api-async-course-attendance'),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
 ]
\ No newline at end of file
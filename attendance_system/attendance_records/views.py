@@ -1,11 +1,20 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.views import generic
-from .models import Student, Course, AttendanceRecord, Tutor
+from .models import Student, Course, AttendanceRecord, AttendanceSummary, Tutor
 from django import forms
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.utils.http import urlencode
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils.crypto import constant_time_compare
+from .metrics import ROLL_CALL_SIZE, exposition
+from .pagination import cursor_values, decode_cursor, encode_cursor, keyset_filter
+from .roster import SEMESTERS, WEEKS, get_roster
+from .routers import replica_reads
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
 
 
 class StudentForm(forms.ModelForm):
@@ -24,7 +33,7 @@ class StudentForm(forms.ModelForm):
         model = Student
         fields = ['first_name', 'last_name', 'student_id', 'email', 'passport_data', 'courses']
         widgets = {
-            'courses': forms.CheckboxSelectMultiple(),
+            'courses': AutocompleteSelectMultiple('attendance_records:api-autocomplete-courses'),
         }
     
     def __init__(self, *args, **kwargs):
@@ -103,7 +112,7 @@ class TutorForm(forms.ModelForm):
         model = Tutor
         fields = ['first_name', 'last_name', 'tutor_id', 'email', 'passport_data', 'courses']
         widgets = {
-            'courses': forms.CheckboxSelectMultiple(),
+            'courses': AutocompleteSelectMultiple('attendance_records:api-autocomplete-courses'),
         }
     
     def __init__(self, *args, **kwargs):
@@ -176,6 +185,10 @@ class AttendanceForm(forms.ModelForm):
     class Meta:
         model = AttendanceRecord
         fields = ['student', 'course', 'semester', 'week', 'status']
+        widgets = {
+            'student': AutocompleteSelect('attendance_records:api-autocomplete-students'),
+            'course': AutocompleteSelect('attendance_records:api-autocomplete-courses'),
+        }
 
 
 class RoleContextMixin:
@@ -211,6 +224,8 @@ class StudentListView(RoleContextMixin, generic.ListView):
     model = Student
     template_name = 'attendance_records/student_list.html'
     context_object_name = 'students'
+    paginate_by = 50
+    ordering = ['last_name', 'first_name', 'pk']
 
 
 @method_decorator(login_required(login_url='attendance_records:login'), name='dispatch')
@@ -238,9 +253,61 @@ class StudentDeleteView(AdminRequiredMixin, RoleContextMixin, generic.DeleteView
 
 @method_decorator(login_required(login_url='attendance_records:login'), name='dispatch')
 class AttendanceListView(RoleContextMixin, generic.ListView):
+    """
+    Attendance records, newest week first, with keyset paging.
+
+    Pages are addressed by an opaque ``after`` cursor holding the sort key of the
+    last row shown, so page 1000 costs the same as page 1. Student and course are
+    joined in the same query to keep the per-page query count constant.
+    """
     model = AttendanceRecord
     template_name = 'attendance_records/attendance_list.html'
     context_object_name = 'records'
+    page_size = 50
+    keyset = ('-semester', '-week', '-id')
+    filter_params = ('course', 'semester', 'week', 'status')
+
+    def get_filters(self):
+        filters = {}
+        for name in self.filter_params:
+            value = self.request.GET.get(name, '').strip()
+            if not value:
+                continue
+            if name == 'status':
+                if value in dict(AttendanceRecord.STATUS_CHOICES):
+                    filters[name] = value
+            elif value.isdigit():
+                filters[name] = int(value)
+        return filters
+
+    def get_queryset(self):
+        self.filters = self.get_filters()
+        queryset = AttendanceRecord.objects.select_related('student', 'course').filter(**self.filters)
+        after = decode_cursor(self.request.GET.get('after'), AttendanceRecord, self.keyset)
+        if after:
+            queryset = queryset.filter(keyset_filter(self.keyset, after))
+        # One extra row tells us whether a next page exists without a COUNT(*)
+        return queryset.order_by(*self.keyset)[:self.page_size + 1]
+
+    def get_context_data(self, **kwargs):
+        records = list(self.object_list)
+        has_next = len(records) > self.page_size
+        records = records[:self.page_size]
+        context = super().get_context_data(object_list=records, **kwargs)
+
+        filter_query = urlencode(self.filters)
+        context['filter_query'] = filter_query
+        context['filters'] = self.filters
+        context['is_first_page'] = not self.request.GET.get('after')
+        context['next_query'] = None
+        if has_next:
+            next_params = dict(self.filters, after=encode_cursor(cursor_values(records[-1], self.keyset)))
+            context['next_query'] = urlencode(next_params)
+        context['courses'] = Course.objects.order_by('code')
+        context['semesters'] = AttendanceRecord.SEMESTER_CHOICES
+        context['weeks'] = range(1, 19)
+        context['statuses'] = AttendanceRecord.STATUS_CHOICES
+        return context
 
 
 @method_decorator(login_required(login_url='attendance_records:login'), name='dispatch')
@@ -270,7 +337,18 @@ def index(request):
     return render(request, 'attendance_records/index.html')
 
 
+def metrics(request):
+    """Prometheus exposition for a scraper presenting METRICS_TOKEN as a bearer token, or for staff."""
+    token = settings.METRICS_TOKEN
+    authorized = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not (authorized or request.user.is_staff):
+        return HttpResponse(status=403)
+    body, content_type = exposition()
+    return HttpResponse(body, content_type=content_type)
+
+
 @method_decorator(login_required(login_url='attendance_records:login'), name='dispatch')
+@replica_reads
 class StudentDashboardView(RoleContextMixin, generic.TemplateView):
     template_name = 'attendance_records/student_dashboard.html'
 
@@ -289,6 +367,10 @@ class StudentDashboardView(RoleContextMixin, generic.TemplateView):
                 course=selected_course
             ).order_by('-semester', '-week')
             context['attendance_records'] = records
+            context['summaries'] = AttendanceSummary.objects.filter(
+                student__student_id=self.request.user.username,
+                course=selected_course
+            ).order_by('semester')
 
         return context
 
@@ -328,52 +410,73 @@ class TutorMarkAttendanceView(TutorAdminRequiredMixin, RoleContextMixin, generic
                     course=selected_course,
                     semester=semester,
                     week=week
-                )
+                ).order_by()  # keyed by student below; skip the Meta ordering's join
             }
 
         return context
 
     def post(self, request, *args, **kwargs):
         course_id = request.POST.get('course')
-        semester = request.POST.get('semester')
-        week = request.POST.get('week')
+        try:
+            semester = int(request.POST.get('semester'))
+            week = int(request.POST.get('week'))
+        except (TypeError, ValueError):
+            return HttpResponseBadRequest('Semester and week must be numbers.')
+        if semester not in SEMESTERS or not 1 <= week <= WEEKS:
+            return HttpResponseBadRequest(f"Semester must be one of {', '.join(map(str, SEMESTERS))} and week between 1 and {WEEKS}.")
         course = get_object_or_404(Course, pk=course_id)
 
-        # Filter students who are enrolled in this course
-        students = Student.objects.filter(courses=course)
-        
-        for student in students:
-            status = request.POST.get(f'status_{student.id}')
-            remove = request.POST.get(f'remove_{student.id}')
-
-            if remove:
+        # Only students enrolled in this course can be marked
+        valid_statuses = {code for code, _ in AttendanceRecord.STATUS_CHOICES}
+        statuses = {}
+        removals = set()
+        for student_id in course.students.values_list('id', flat=True):
+            status = request.POST.get(f'status_{student_id}')
+            if request.POST.get(f'remove_{student_id}'):
                 # Delete attendance record if "Remove Attendance" was clicked
-                AttendanceRecord.objects.filter(
-                    student=student,
-                    course=course,
-                    semester=semester,
-                    week=week
-                ).delete()
-            elif status:
-                # Update or create attendance record
-                record, _ = AttendanceRecord.objects.get_or_create(
-                    student=student,
-                    course=course,
-                    semester=semester,
-                    week=week,
-                    defaults={'status': status}
-                )
-                record.status = status
-                record.save()
+                removals.add(student_id)
+            elif status in valid_statuses:
+                statuses[student_id] = status
+
+        AttendanceRecord.objects.apply_roll_call(course, semester, week, statuses, removals)
+        ROLL_CALL_SIZE.observe(len(statuses) + len(removals))
 
         return redirect(f"{reverse_lazy('attendance_records:tutor_mark')}?course={course_id}&semester={semester}&week={week}")
 
 
+@method_decorator(login_required(login_url='attendance_records:login'), name='dispatch')
+class CourseRosterView(TutorAdminRequiredMixin, RoleContextMixin, generic.TemplateView):
+    """Whole-semester grid for a course: every enrolled student against weeks 1-18."""
+    template_name = 'attendance_records/course_roster.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        course = get_object_or_404(Course, pk=self.kwargs['pk'])
+        try:
+            semester = int(self.request.GET.get('semester', 1))
+        except ValueError:
+            semester = 1
+        if semester not in SEMESTERS:
+            semester = 1
+        matrix = get_roster(course, semester)
+        context['course'] = course
+        context['selected_semester'] = semester
+        context['semesters'] = AttendanceRecord.SEMESTER_CHOICES
+        context['weeks'] = range(1, WEEKS + 1)
+        context['rows'] = [
+            {'student': student, 'cells': cells, 'totals': totals}
+            for student, cells, totals in matrix.rows()
+        ]
+        return context
+
+
 @method_decorator(login_required(login_url='attendance_records:login'), name='dispatch')
 class CourseListView(AdminRequiredMixin, RoleContextMixin, generic.ListView):
     model = Course
     template_name = 'attendance_records/course_list.html'
     context_object_name = 'courses'
+    paginate_by = 50
+    ordering = ['code']
 
 
 @method_decorator(login_required(login_url='attendance_records:login'), name='dispatch')
@@ -404,6 +507,12 @@ class TutorListView(AdminRequiredMixin, RoleContextMixin, generic.ListView):
     model = Tutor
     template_name = 'attendance_records/tutor_list.html'
     context_object_name = 'tutors'
+    paginate_by = 50
+    ordering = ['last_name', 'first_name', 'pk']
+
+    def get_queryset(self):
+        # Course badges are rendered per tutor; fetch them all in one extra query
+        return super().get_queryset().prefetch_related('courses')
 
 
 @method_decorator(login_required(login_url='attendance_records:login'), name='dispatch')
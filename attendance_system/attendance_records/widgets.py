@@ -0,0 +1,44 @@
+"""Select widgets that render only their selected options.
+
+The remaining choices are fetched from an autocomplete endpoint (see
+autocomplete.py) by static/attendance_records/autocomplete.js, so rendering a
+form never iterates the field's whole queryset.
+"""
+
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteMixin:
+    def __init__(self, url_name, attrs=None, **kwargs):
+        self.url_name = url_name
+        super().__init__(attrs, **kwargs)
+
+    class Media:
+        js = ('attendance_records/autocomplete.js',)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse(self.url_name)
+        attrs['class'] = f"{attrs.get('class', '')} form-select".strip()
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """Options for the selected primary keys only, plus the empty choice of an optional select."""
+        selected = [str(pk) for pk in value if str(pk).isdigit()]
+        options = []
+        if not self.allow_multiple_selected and not self.is_required:
+            options.append(self.create_option(name, '', '---------', not selected, 0))
+        if selected:
+            field = self.choices.field
+            for obj in self.choices.queryset.filter(pk__in=selected):
+                options.append(self.create_option(name, obj.pk, field.label_from_instance(obj), True, len(options)))
+        return [(None, options, 0)]
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
@@ -2,7 +2,7 @@ from pathlib import Path
 import pymysql
 import dj_database_url
 import os
-from decouple import config
+from decouple import Csv, config
 
 
 pymysql.install_as_MySQLdb()
@@ -25,6 +25,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'attendance_records.middleware.MetricsMiddleware',
+    'attendance_records.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -32,6 +34,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'attendance_records.middleware.RequestTimingMiddleware',
     'attendance_records.middleware.RoleMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
@@ -61,8 +64,91 @@ DATABASES = {
     )
 }
 
+# Reuse database connections across requests through a per-worker pool
+# (see attendance_records/dbpool/__init__.py). Off by default; only MySQL and
+# SQLite have pooled backends, other engines are left as they are
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_ENGINES = {
+    'django.db.backends.mysql': 'attendance_records.dbpool.mysql',
+    'django.db.backends.sqlite3': 'attendance_records.dbpool.sqlite3',
+}
+# Connections each worker process may hold open to one database
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=8, cast=int)
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+# A connection is closed after this many checkouts or seconds (0: no age limit)
+DB_POOL_MAX_USES = config('DB_POOL_MAX_USES', default=1000, cast=int)
+DB_POOL_MAX_AGE = config('DB_POOL_MAX_AGE', default=600, cast=int)
+
+# Read replicas, comma-separated database URLs added as 'replica1', 'replica2', ...
+# Only views marked @replica_reads read from them (see attendance_records/routers.py)
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='', cast=Csv())
+for number, url in enumerate(DATABASE_REPLICA_URLS, 1):
+    DATABASES[f'replica{number}'] = {**dj_database_url.parse(url), 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['attendance_records.routers.ReplicaRouter']
+# Seconds a client keeps reading from the primary after one of its requests wrote
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=15, cast=int)
+
+if DB_POOL:
+    for database in DATABASES.values():
+        database['ENGINE'] = DB_POOL_ENGINES.get(database['ENGINE'], database['ENGINE'])
+
+# The default LocMemCache is per process. The roster and stats caches tolerate
+# that, but user roles are only cached across requests when CACHE_BACKEND is
+# shared between workers (e.g. django.core.cache.backends.redis.RedisCache),
+# so that a demotion invalidates the role everywhere (see attendance_records/roles.py)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='attendance-system'),
+    }
+}
+
+# Seconds /api/stats/ responses are served from cache
+STATS_CACHE_TIMEOUT = config('STATS_CACHE_TIMEOUT', default=15, cast=int)
+
+# Seconds a user's resolved role stays cached; ignored unless CACHE_BACKEND is shared (see CACHES above)
+ROLE_CACHE_TIMEOUT = config('ROLE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds a course roster matrix stays cached (see attendance_records/roster.py)
+ROSTER_CACHE_TIMEOUT = config('ROSTER_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds /api/analytics/ reports are served from cache
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds a page of picker results stays cached (see attendance_records/autocomplete.py)
+AUTOCOMPLETE_CACHE_TIMEOUT = config('AUTOCOMPLETE_CACHE_TIMEOUT', default=30, cast=int)
+
+# Per-request Server-Timing header and slow-request log (see attendance_records/middleware.py)
+REQUEST_TIMING = config('REQUEST_TIMING', default=False, cast=bool)
+if REQUEST_TIMING:
+    # DjangoTemplates that also reports render time to RequestTimingMiddleware
+    TEMPLATES[0]['BACKEND'] = 'attendance_records.instrumentation.TimedDjangoTemplates'
+# Requests slower than this many milliseconds, or running this many queries, are logged
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+SLOW_REQUEST_QUERIES = config('SLOW_REQUEST_QUERIES', default=50, cast=int)
+
+# Prometheus request metrics, served at /metrics (see attendance_records/metrics.py)
+METRICS = config('METRICS', default=True, cast=bool)
+# Bearer token a scraper sends to read /metrics; staff users can always read it
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'attendance_records.middleware': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
 # In settings.py
 AUTHENTICATION_BACKENDS = [
+    'attendance_records.backends.PassportBackend',  # Students and tutors
+    # Sessions from before PassportBackend name these; they only load the user
     'attendance_records.backends.StudentAuthBackend',
     'attendance_records.backends.TutorAuthBackend',
     'django.contrib.auth.backends.ModelBackend',  # For admin/superuser login
@@ -93,7 +179,12 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    # orjson-backed, same bytes as DRF's JSONRenderer (see attendance_records/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'attendance_records.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 LANGUAGE_CODE = 'en-us'
@@ -1,12 +1,51 @@
 import multiprocessing
 import os
+import shutil
+import tempfile
+
+# Workers write their Prometheus metrics here and /metrics merges them
+# (see attendance_records/metrics.py). Exported before any worker imports
+# prometheus_client, which reads it at import time.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "attendance-prometheus")
+)
+# Imported here rather than in child_exit: the hook runs from the SIGCHLD
+# handler, and a second worker exiting mid-import sees a half-loaded module
+from prometheus_client import multiprocess  # noqa: E402
+
+# WEB_WORKER_CLASS picks the worker model:
+#   sync     one request at a time per worker process (the default)
+#   gthread  WEB_THREADS requests at a time per process, in threads
+#   asgi     uvicorn's event-loop worker serving attendance_system.asgi; the
+#            /api/async/ views (attendance_records/async_api_views.py) wait on
+#            the database without holding the worker
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "asgi": "uvicorn_worker.UvicornWorker",
+}
+worker_mode = os.environ.get("WEB_WORKER_CLASS", "sync")
 
 bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+worker_class = WORKER_CLASSES[worker_mode]
+wsgi_app = "attendance_system.asgi:application" if worker_mode == "asgi" else "attendance_system.wsgi"
+threads = int(os.environ.get("WEB_THREADS", 4)) if worker_mode == "gthread" else 1
 timeout = 30
 keepalive = 5
 max_requests = 1000
 max_requests_jitter = 100
 access_log = "-"
 error_log = "-"
+
+
+def on_starting(server):
+    # Files left by a previous master would be merged into this run's totals
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    # Keep the counters of a recycled worker (max_requests), drop its live-only gauges
+    multiprocess.mark_process_dead(worker.pid)